@@ -32,6 +32,9 @@ from routes.monitoring.alert_routes import alert_bp
 from routes.monitoring.check_image_seat_student import identity_routes
 from routes.monitoring.model_config_routes import model_config_bp
 #-----------------------------------------------
+from database.connection import get_pool_stats
+from database import prepared_statements
+from services import reference_cache
 
 app = Flask(__name__)
 
@@ -88,5 +91,49 @@ def home():
 def ping():
     return jsonify({'message': 'pong'}), 200
 
+@app.route('/api/db/pool-stats', methods=['GET'])
+def db_pool_stats():
+    """
+    Database connection pool size and wait metrics
+    ---
+    tags:
+      - System
+    responses:
+      200:
+        description: Pool statistics (pool_size, pool_available, requests_waiting, requests_wait_ms, ...)
+      500:
+        description: Pool unavailable
+    """
+    try:
+        return jsonify(get_pool_stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/db/statement-stats', methods=['GET'])
+def db_statement_stats():
+    """
+    Timing of the registered prepared statements
+    ---
+    tags:
+      - System
+    responses:
+      200:
+        description: Per-statement calls, errors, total/avg/max milliseconds
+    """
+    return jsonify(prepared_statements.get_stats()), 200
+
+@app.route('/api/cache/reference-stats', methods=['GET'])
+def reference_cache_stats():
+    """
+    Hit rate and invalidations of the reference-data caches
+    ---
+    tags:
+      - System
+    responses:
+      200:
+        description: Per-dataset entries, hits, misses, hit_rate, invalidations and last_modified
+    """
+    return jsonify(reference_cache.get_all_stats()), 200
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,54 @@
+# asgi.py
+# وضع التشغيل ASGI: المسارات الساخنة (التحقق، البحث، استقبال التنبيهات) تعمل بشكل غير متزامن
+# وبقية المسارات تُمرّر إلى تطبيق Flask كما هو.
+#   uvicorn asgi:application --workers 4
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart
+from werkzeug.exceptions import HTTPException
+
+from app import app as flask_app
+from database.aio.connection import open_async_pool, close_async_pool
+from services.encoding_executor import get_encoding_executor, shutdown_encoding_executor
+from routes.aio.identity_routes import async_identity_routes
+from routes.aio.vectors_routes import async_vectors_routes
+from routes.aio.alert_routes import async_alert_bp
+from routes.aio.model_config_routes import async_model_config_bp
+
+async_app = Quart(__name__, static_folder=None)
+async_app.register_blueprint(async_identity_routes)
+async_app.register_blueprint(async_vectors_routes)
+async_app.register_blueprint(async_alert_bp)
+async_app.register_blueprint(async_model_config_bp)
+
+
+@async_app.before_serving
+async def startup():
+    await open_async_pool()
+    get_encoding_executor()
+
+
+@async_app.after_serving
+async def shutdown():
+    await close_async_pool()
+    shutdown_encoding_executor()
+
+
+wsgi_app = WsgiToAsgi(flask_app)
+_async_urls = async_app.url_map.bind("localhost")
+
+
+def _is_async_route(path, method):
+    try:
+        _async_urls.match(path, method=method)
+        return True
+    except HTTPException:
+        return False
+
+
+async def application(scope, receive, send):
+    """Dispatch each request to the async app when it owns the route, otherwise to Flask."""
+    if scope["type"] == "http" and not _is_async_route(scope["path"], scope["method"]):
+        await wsgi_app(scope, receive, send)
+        return
+    # lifespan والمسارات غير المتزامنة
+    await async_app(scope, receive, send)
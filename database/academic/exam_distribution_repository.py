@@ -1,10 +1,129 @@
 from typing import List, Dict, Optional
 from database.connection import get_db_connection
+from database import prepared_statements
 from psycopg import sql, errors
 from datetime import datetime, date, time
+from database.academic.exams_repository import ExamsRepository
 
 class ExamDistributionRepository:
 
+    # بيانات الطالب في مسار التحقق من الهوية (join على 10 جداول)
+    GET_STUDENT_BY_ID = prepared_statements.register("exam_distribution.get_student_by_id", """
+        SELECT
+            ed.student_id,
+            ed.student_name,
+            d.device_number,
+            d.room_number,
+            ec.center_name,
+            e.exam_id,
+            e.exam_date,
+            e.exam_start_time,
+            e.exam_end_time,
+            c.name AS course_name,
+            col.name AS college_name,
+            m.name AS major_name,
+            l.level_name,
+            s.semester_name,
+            ay.year_name AS academic_year
+        FROM exam_distribution ed
+        JOIN devices d ON ed.device_id = d.id
+        JOIN exam_centers ec ON d.center_id = ec.id
+        JOIN Exams e ON ed.exam_id = e.exam_id
+        JOIN Courses c ON e.course_id = c.course_id
+        JOIN Colleges col ON e.college_id = col.college_id
+        JOIN Majors m ON e.major_id = m.major_id
+        JOIN Levels l ON e.level_id = l.level_id
+        JOIN Semesters s ON e.semester_id = s.semester_id
+        JOIN Academic_Years ay ON e.year_id = ay.year_id
+        WHERE ed.student_id = %s
+        LIMIT 1;
+    """)
+
+    # نموذج القراءة student_checkin_profiles: نفس أعمدة GET_STUDENT_BY_ID + المتجه، بمفتاح أساسي واحد
+    GET_CHECKIN_PROFILE = prepared_statements.register("exam_distribution.get_checkin_profile", """
+        SELECT
+            student_id, student_name, device_number, room_number, center_name,
+            exam_id, exam_date, exam_start_time, exam_end_time,
+            course_name, college_name, major_name, level_name, semester_name, academic_year,
+            vector, encoder_version
+        FROM student_checkin_profiles
+        WHERE student_id = %s
+    """)
+
+    GET_BY_STUDENT = prepared_statements.register("exam_distribution.get_by_student", """
+        SELECT id, student_id, student_name, exam_id, device_id, assigned_at
+        FROM exam_distribution
+        WHERE student_id = %s
+        LIMIT 1
+    """)
+
+    # إثراء نتائج البحث: التوزيع + بيانات الاختبار + النافذة الزمنية (+ بيانات الطالب) في استعلام واحد
+    # %(now)s هو وقت السيرفر (التطبيق) وليس وقت قاعدة البيانات، كما في المسار القديم
+    _SEARCH_ENRICHMENT_SQL = """
+        WITH ids AS (
+            SELECT student_id, MIN(position) AS position
+            FROM unnest(%(student_ids)s::text[]) WITH ORDINALITY AS t(student_id, position)
+            GROUP BY student_id
+        )
+        SELECT
+            ids.student_id,{profile_columns}
+            ed.id AS distribution_id,
+            ed.student_name,
+            ed.exam_id,
+            ed.device_id,
+            ed.assigned_at,
+            e.exam_id IS NOT NULL AS has_exam,
+            e.exam_date,
+            e.exam_start_time,
+            e.exam_end_time,
+            e.college_id,
+            e.course_id,
+            e.level_id,
+            e.major_id,
+            e.semester_id,
+            e.year_id,
+            w.valid_start,
+            w.valid_end,
+            COALESCE(
+                e.exam_date = %(now)s::date
+                AND %(now)s::timestamp BETWEEN w.valid_start AND w.valid_end,
+                FALSE
+            ) AS is_exam_time_valid
+        FROM ids{profile_join}
+        LEFT JOIN exam_distribution ed ON ed.student_id = ids.student_id
+        LEFT JOIN Exams e ON e.exam_id = ed.exam_id
+        LEFT JOIN LATERAL (
+            SELECT
+                e.exam_date + e.exam_start_time - INTERVAL '30 minutes' AS valid_start,
+                e.exam_date + e.exam_start_time + INTERVAL '60 minutes' AS valid_end
+        ) w ON TRUE
+        ORDER BY ids.position
+    """
+
+    SEARCH_ENRICHMENT = prepared_statements.register(
+        "exam_distribution.search_enrichment",
+        _SEARCH_ENRICHMENT_SQL.format(profile_columns="", profile_join="")
+    )
+
+    # نفس الاستعلام مع بيانات الطالب من جدول students في Postgres
+    SEARCH_ENRICHMENT_WITH_PROFILE = prepared_statements.register(
+        "exam_distribution.search_enrichment_with_profile",
+        _SEARCH_ENRICHMENT_SQL.format(
+            profile_columns="""
+            s.Number AS "Number",
+            s.StudentName AS "StudentName",
+            s.Gender AS "Gender",
+            s.Level AS "Level",
+            s.Specialization AS "Specialization",
+            s.College AS "College",
+            s.ImagePath AS "ImagePath",""",
+            profile_join="""
+        JOIN students s ON s.Number = ids.student_id"""
+        )
+    )
+
+    PROFILE_KEYS = ("Number", "StudentName", "Gender", "Level", "Specialization", "College", "ImagePath")
+
     def assign_exam_to_student(self, student_id: str, student_name: str, exam_id: int, device_id: int = None) -> Dict:
         """Assign an exam to a student with optional device assignment (insert or update)"""
         query = sql.SQL("""
@@ -86,6 +205,108 @@ class ExamDistributionRepository:
         except errors.Error as e:
             raise RuntimeError(f"Database error: {str(e)}")
 
+    def bulk_assign_exams(self, assignments: List[Dict]) -> Dict:
+        """
+        Upsert many (student_id, student_name, exam_id, device_id) rows in one transaction.
+        Rows are COPYed into a temporary staging table, rows with a missing exam/device
+        are reported instead of aborting the batch, and the rest are merged with a single
+        INSERT ... ON CONFLICT. When a student appears more than once, the last row that
+        passed the reference checks wins and the other valid rows are reported against it.
+        Each assignment must carry its request position in "index".
+
+        Returns {"inserted", "updated", "errors": [{"index", "student_id", "error"}]}.
+        """
+        if not assignments:
+            return {"inserted": 0, "updated": 0, "errors": []}
+
+        query_staging = """
+        CREATE TEMP TABLE exam_distribution_staging (
+            row_index INTEGER NOT NULL,
+            student_id VARCHAR(50) NOT NULL,
+            student_name VARCHAR(100) NOT NULL,
+            exam_id INTEGER NOT NULL,
+            device_id INTEGER,
+            error TEXT
+        ) ON COMMIT DROP
+        """
+
+        # أخطاء المراجع أولًا، ثم الصف الفائز لكل طالب يُختار من الصفوف السليمة فقط
+        query_reference_errors = """
+        UPDATE exam_distribution_staging s
+        SET error = CASE
+            WHEN NOT EXISTS (SELECT 1 FROM Exams e WHERE e.exam_id = s.exam_id) THEN 'Exam not found.'
+            WHEN s.device_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM devices d WHERE d.id = s.device_id)
+                THEN 'Device not found.'
+        END
+        """
+
+        query_duplicate_errors = """
+        UPDATE exam_distribution_staging s
+        SET error = 'Duplicate student_id in request; row ' || w.row_index || ' replaces it.'
+        FROM (
+            SELECT DISTINCT ON (student_id) student_id, row_index
+            FROM exam_distribution_staging
+            WHERE error IS NULL
+            ORDER BY student_id, row_index DESC
+        ) w
+        WHERE s.error IS NULL AND s.student_id = w.student_id AND s.row_index <> w.row_index
+        """
+
+        query_errors = """
+        SELECT row_index, student_id, error
+        FROM exam_distribution_staging
+        WHERE error IS NOT NULL
+        ORDER BY row_index
+        """
+
+        query_merge = """
+        WITH merged AS (
+            INSERT INTO exam_distribution (student_id, student_name, exam_id, device_id)
+            SELECT student_id, student_name, exam_id, device_id
+            FROM exam_distribution_staging
+            WHERE error IS NULL
+            ON CONFLICT (student_id)
+            DO UPDATE SET
+                student_name = EXCLUDED.student_name,
+                exam_id = EXCLUDED.exam_id,
+                device_id = EXCLUDED.device_id,
+                assigned_at = CURRENT_TIMESTAMP
+            RETURNING xmax = 0 AS inserted
+        )
+        SELECT
+            COUNT(*) FILTER (WHERE inserted) AS inserted,
+            COUNT(*) FILTER (WHERE NOT inserted) AS updated
+        FROM merged
+        """
+
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query_staging)
+                    with cursor.copy(
+                        "COPY exam_distribution_staging (row_index, student_id, student_name, exam_id, device_id) FROM STDIN"
+                    ) as copy:
+                        for row in assignments:
+                            copy.write_row((
+                                row["index"], row["student_id"], row["student_name"],
+                                row["exam_id"], row.get("device_id")
+                            ))
+
+                    cursor.execute(query_reference_errors)
+                    cursor.execute(query_duplicate_errors)
+                    cursor.execute(query_errors)
+                    row_errors = [
+                        {"index": r["row_index"], "student_id": r["student_id"], "error": r["error"]}
+                        for r in cursor.fetchall()
+                    ]
+
+                    cursor.execute(query_merge)
+                    counts = cursor.fetchone()
+                    conn.commit()
+                    return {"inserted": counts["inserted"], "updated": counts["updated"], "errors": row_errors}
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
     # def assign_exam_to_student(self, student_id: str, student_name: str, exam_id: int, device_id: int = None) -> Dict:
     #     """Assign an exam to a student with optional device assignment"""
     #     query = sql.SQL("""
@@ -255,36 +476,6 @@ class ExamDistributionRepository:
         Returns:
             قاموس يحتوي على بيانات الطالب أو None إذا لم يتم العثور عليه
         """
-        query = sql.SQL("""
-        SELECT
-            ed.student_id,
-            ed.student_name,
-            d.device_number,
-            d.room_number,
-            ec.center_name,
-            e.exam_id,
-            e.exam_date,
-            e.exam_start_time,
-            e.exam_end_time,
-            c.name AS course_name,
-            col.name AS college_name,
-            m.name AS major_name,
-            l.level_name,
-            s.semester_name,
-            ay.year_name AS academic_year
-        FROM exam_distribution ed
-        JOIN devices d ON ed.device_id = d.id
-        JOIN exam_centers ec ON d.center_id = ec.id
-        JOIN Exams e ON ed.exam_id = e.exam_id
-        JOIN Courses c ON e.course_id = c.course_id
-        JOIN Colleges col ON e.college_id = col.college_id
-        JOIN Majors m ON e.major_id = m.major_id
-        JOIN Levels l ON e.level_id = l.level_id
-        JOIN Semesters s ON e.semester_id = s.semester_id
-        JOIN Academic_Years ay ON e.year_id = ay.year_id
-        WHERE ed.student_id = %s
-        LIMIT 1;
-        """)
         
 
 #  with get_db_connection() as conn:
@@ -297,25 +488,40 @@ class ExamDistributionRepository:
         try: 
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (student_id,))
-                    result = cursor.fetchone()
-                    
-                    if not result:
-                        return None
-                    
-                    # تحويل أنواع التاريخ والوقت إلى strings
-                    if isinstance(result.get('exam_date'), date):
-                        result['exam_date'] = result['exam_date'].isoformat()
-                    if isinstance(result.get('exam_start_time'), time):
-                        result['exam_start_time'] = str(result['exam_start_time'])
-                    if isinstance(result.get('exam_end_time'), time):
-                        result['exam_end_time'] = str(result['exam_end_time'])
-                    
-                    return result
+                    prepared_statements.execute(cursor, self.GET_STUDENT_BY_ID, (student_id,))
+                    return self._format_student_row(cursor.fetchone())
             
         except errors.Error as e:
             raise RuntimeError(f"Database error: {str(e)}")
 
+    def get_checkin_profile(self, student_id: str) -> Optional[Dict]:
+        """
+        بيانات الطالب لمسار التحقق + متجهه المخزن من نموذج القراءة (primary-key lookup)
+        Returns the GET_STUDENT_BY_ID fields plus 'vector' and 'encoder_version', or None.
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    prepared_statements.execute(cursor, self.GET_CHECKIN_PROFILE, (student_id,))
+                    return self._format_student_row(cursor.fetchone())
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    @staticmethod
+    def _format_student_row(result: Optional[Dict]) -> Optional[Dict]:
+        if not result:
+            return None
+
+        # تحويل أنواع التاريخ والوقت إلى strings
+        if isinstance(result.get('exam_date'), date):
+            result['exam_date'] = result['exam_date'].isoformat()
+        if isinstance(result.get('exam_start_time'), time):
+            result['exam_start_time'] = str(result['exam_start_time'])
+        if isinstance(result.get('exam_end_time'), time):
+            result['exam_end_time'] = str(result['exam_end_time'])
+
+        return result
+
 
 # جلب مع ترقيم الطلاب 
     def get_exam_distribution_report(self, exam_id: int) -> Dict:
@@ -357,9 +563,36 @@ class ExamDistributionRepository:
         ]
         }
         """
-        # استعلام لجلب بيانات الاختبار المشتركة (الهيدر الأساسي)
-        header_query = """
-        SELECT 
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    base_header = self._fetch_report_header(cursor, exam_id)
+            self.ensure_roster_snapshot(exam_id)
+
+            # الصفوف مرتبة ومرقمة مسبقًا في exam_roster_rows: التجميع مرور واحد
+            groups_list = []
+            for row in self.iter_roster_rows(exam_id):
+                if not groups_list or (groups_list[-1]['header']['center_name'], groups_list[-1]['header']['room_number']) \
+                        != (row['center_name'], row['room_number']):
+                    group_header = base_header.copy()
+                    group_header['center_name'] = row['center_name']
+                    group_header['room_number'] = row['room_number']
+                    groups_list.append({'header': group_header, 'students': []})
+                groups_list[-1]['students'].append({
+                    'device_number': row['device_number'],
+                    'student_id': row['student_id'],
+                    'student_name': row['student_name'],
+                    'number': row['seat_number']
+                })
+
+            return {'groups': groups_list}
+
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    # الهيدر المشترك لكل غرف الاختبار (أسماء المقرر والكلية ... تبقى استعلامًا مباشرًا)
+    REPORT_HEADER = prepared_statements.register("exam_distribution.report_header", """
+        SELECT
             c.name AS course_name,
             e.exam_date,
             e.exam_start_time,
@@ -376,79 +609,120 @@ class ExamDistributionRepository:
         JOIN Levels l ON e.level_id = l.level_id
         JOIN Semesters s ON e.semester_id = s.semester_id
         JOIN Academic_Years ay ON e.year_id = ay.year_id
-        JOIN exam_distribution ed ON e.exam_id = ed.exam_id
         WHERE e.exam_id = %s
-        LIMIT 1;
+          AND EXISTS (SELECT 1 FROM exam_distribution ed WHERE ed.exam_id = e.exam_id)
+    """)
+
+    def _fetch_report_header(self, cursor, exam_id: int) -> Dict:
+        prepared_statements.execute(cursor, self.REPORT_HEADER, (exam_id,))
+        header_data = cursor.fetchone()
+        if not header_data:
+            raise ValueError("Exam not found or no students assigned")
+        return self._format_header(header_data)
+
+    def get_report_header(self, exam_id: int) -> Dict:
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    return self._fetch_report_header(cursor, exam_id)
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    def ensure_roster_snapshot(self, exam_id: int) -> Dict:
         """
+        Return the roster snapshot of an exam ({student_count, room_count, built_at}),
+        rebuilding exam_roster_rows first when a distribution change invalidated it.
+        Seat numbers restart at 1 in every room (ROW_NUMBER over device_number).
+        """
+        query_snapshot = "SELECT student_count, room_count, built_at FROM exam_roster_snapshots WHERE exam_id = %s"
 
-        # استعلام لجلب بيانات الطلاب مع معلومات الغرفة والمركز
-        students_query = """
-        SELECT 
-            d.device_number,
-            ed.student_id,
-            ed.student_name,
-            d.room_number,
-            ec.center_name
-        FROM exam_distribution ed
-        JOIN devices d ON ed.device_id = d.id
-        JOIN exam_centers ec ON d.center_id = ec.id
-        WHERE ed.exam_id = %s
-        ORDER BY ec.center_name, d.room_number, d.device_number;
+        query_rebuild = """
+        WITH inserted AS (
+            INSERT INTO exam_roster_rows
+                (exam_id, center_name, room_number, seat_number, device_number, student_id, student_name)
+            SELECT
+                ed.exam_id, ec.center_name, d.room_number,
+                ROW_NUMBER() OVER (PARTITION BY ec.center_name, d.room_number ORDER BY d.device_number, ed.student_id),
+                d.device_number, ed.student_id, ed.student_name
+            FROM exam_distribution ed
+            JOIN devices d ON ed.device_id = d.id
+            JOIN exam_centers ec ON d.center_id = ec.id
+            WHERE ed.exam_id = %(exam_id)s
+            RETURNING center_name, room_number
+        )
+        INSERT INTO exam_roster_snapshots (exam_id, student_count, room_count)
+        SELECT %(exam_id)s, COUNT(*), COUNT(DISTINCT (center_name, room_number)) FROM inserted
+        RETURNING student_count, room_count, built_at
         """
 
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    # جلب بيانات الهيدر الأساسي
-                    cursor.execute(header_query, (exam_id,))
-                    header_data = cursor.fetchone()
-                    if not header_data:
-                        raise ValueError("Exam not found or no students assigned")
-                    base_header = self._format_header(header_data)
-
-                    # جلب بيانات الطلاب
-                    cursor.execute(students_query, (exam_id,))
-                    students_data = cursor.fetchall()
-
-                    # تجميع الطلاب حسب (center_name, room_number)
-                    groups = {}
-                    for student in students_data:
-                        # المفتاح هو (center_name, room_number)
-                        key = (student['center_name'], student['room_number'])
-                        if key not in groups:
-                            groups[key] = {
-                                'students': [],
-                                'center_name': student['center_name'],
-                                'room_number': student['room_number']
-                            }
-                        groups[key]['students'].append({
-                            'device_number': student['device_number'],
-                            'student_id': student['student_id'],
-                            'student_name': student['student_name']
-                        })
-
-                    # بناء النتيجة النهائية بحيث يتم دمج الهيدر مع بيانات المجموعة وترقيم الطلاب
-                    groups_list = []
-                    for group in groups.values():
-                        # إنشاء نسخة من الهيدر الأساسي وإضافة معلومات المجموعة
-                        group_header = base_header.copy()
-                        group_header['center_name'] = group['center_name']
-                        group_header['room_number'] = group['room_number']
-                        
-                        # ترقيم الطلاب داخل المجموعة بحيث يبدأ الترقيم من 1
-                        for idx, student in enumerate(group['students'], start=1):
-                            student['number'] = idx
-
-                        groups_list.append({
-                            'header': group_header,
-                            'students': group['students']
-                        })
-
-                    return {'groups': groups_list}
+                    cursor.execute(query_snapshot, (exam_id,))
+                    snapshot = cursor.fetchone()
+                    if snapshot:
+                        return snapshot
 
+                    # نفس القفل الذي يأخذه invalidate_exam_rosters: لا كتابة على التوزيع أثناء البناء
+                    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('exam_roster'), %s)", (exam_id,))
+                    cursor.execute(query_snapshot, (exam_id,))
+                    snapshot = cursor.fetchone()
+                    if not snapshot:
+                        cursor.execute("DELETE FROM exam_roster_rows WHERE exam_id = %s", (exam_id,))
+                        cursor.execute(query_rebuild, {"exam_id": exam_id})
+                        snapshot = cursor.fetchone()
+                    conn.commit()
+                    return snapshot
         except errors.Error as e:
             raise RuntimeError(f"Database error: {str(e)}")
 
+    def iter_roster_rows(self, exam_id: int, offset: int = 0, limit: Optional[int] = None,
+                         fetch_size: int = 2000):
+        """
+        Yield the snapshot rows of an exam ordered by center, room and seat, one page of
+        `fetch_size` rows at a time, so a whole exam day never sits in worker memory.
+        Pages use keyset queries on the primary key and each is read on a short-lived
+        connection: a slow download never holds a pooled connection or a transaction.
+        Call ensure_roster_snapshot() first.
+        """
+        query_first = """
+        SELECT center_name, room_number, seat_number, device_number, student_id, student_name
+        FROM exam_roster_rows
+        WHERE exam_id = %s
+        ORDER BY center_name, room_number, seat_number
+        OFFSET %s LIMIT %s
+        """
+        query_next = """
+        SELECT center_name, room_number, seat_number, device_number, student_id, student_name
+        FROM exam_roster_rows
+        WHERE exam_id = %s AND (center_name, room_number, seat_number) > (%s, %s, %s)
+        ORDER BY center_name, room_number, seat_number
+        LIMIT %s
+        """
+        remaining = limit
+        last = None
+        while remaining is None or remaining > 0:
+            page_size = fetch_size if remaining is None else min(fetch_size, remaining)
+            try:
+                with get_db_connection() as conn:
+                    with conn.cursor() as cursor:
+                        if last is None:
+                            cursor.execute(query_first, (exam_id, offset, page_size))
+                        else:
+                            cursor.execute(query_next, (
+                                exam_id, last['center_name'], last['room_number'], last['seat_number'], page_size
+                            ))
+                        rows = cursor.fetchall()
+            except errors.Error as e:
+                raise RuntimeError(f"Database error: {str(e)}")
+
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
+            if remaining is not None:
+                remaining -= len(rows)
+
     def _format_header(self, header_data: Dict) -> Dict:
         """Convert header data types to JSON-serializable formats"""
         return {
@@ -463,21 +737,263 @@ class ExamDistributionRepository:
             'academic_year': header_data['academic_year']
         }
 
-    # دالة لجلب بيانات توزيع الاختبار لطالب معين
-    def get_exam_distribution_by_student(self,student_id: str) -> dict:
+    def get_room_roster(self, exam_id: int, center_id: int, room_number: str) -> List[Dict]:
+        """Get the students distributed to a room (center + room number) for an exam"""
         query = sql.SQL("""
-            SELECT id, student_id, student_name, exam_id, device_id, assigned_at
-            FROM exam_distribution
-            WHERE student_id = %s
-            LIMIT 1
+        SELECT ed.student_id, ed.student_name, d.device_number
+        FROM exam_distribution ed
+        JOIN devices d ON ed.device_id = d.id
+        WHERE ed.exam_id = %s AND d.center_id = %s AND d.room_number = %s
+        ORDER BY d.device_number;
         """)
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (student_id,))
+                    cursor.execute(query, (exam_id, center_id, room_number))
+                    return cursor.fetchall()
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    def lock_allocation(self) -> None:
+        """
+        Serialize seat allocations until the end of the current transaction (use inside
+        unit_of_work()), so two plans can't hand out the same free device.
+        """
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('exam_distribution.allocate'))")
+
+    def get_allocation_devices(self, exam_id: int, center_ids: List[int]) -> List[Dict]:
+        """
+        Active devices (status = 1) of the candidate centers, ordered by center (input order),
+        room and device number. `busy` is true when the device is already seated for another
+        exam whose slot overlaps this one (a missing date/time counts as overlapping).
+        """
+        query = """
+        WITH target AS (
+            SELECT exam_id, exam_date, exam_start_time, exam_end_time FROM Exams WHERE exam_id = %(exam_id)s
+        )
+        SELECT d.id, d.device_number, d.room_number, d.center_id,
+            EXISTS (
+                SELECT 1
+                FROM exam_distribution ed
+                JOIN Exams o ON o.exam_id = ed.exam_id
+                WHERE ed.device_id = d.id
+                  AND ed.exam_id <> t.exam_id
+                  AND (o.exam_date IS NULL OR t.exam_date IS NULL OR o.exam_date = t.exam_date)
+                  AND (o.exam_start_time IS NULL OR o.exam_end_time IS NULL
+                       OR t.exam_start_time IS NULL OR t.exam_end_time IS NULL
+                       OR (o.exam_start_time < t.exam_end_time AND t.exam_start_time < o.exam_end_time))
+            ) AS busy
+        FROM target t
+        CROSS JOIN unnest(%(center_ids)s::int[]) WITH ORDINALITY AS c(center_id, position)
+        JOIN devices d ON d.center_id = c.center_id AND d.status = 1
+        ORDER BY c.position, d.room_number, d.device_number
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, {"exam_id": exam_id, "center_ids": list(center_ids)})
+                    return cursor.fetchall()
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    def resolve_import_references(self, exam_ids: List[int], device_numbers: List[int],
+                                  center_names: List[str]) -> Dict:
+        """
+        Set-based lookups for a distribution import, in one round trip:
+        {"exams": {exam_id: slot}, "devices": {device_number: row}, "centers": {center_name: id}},
+        where slot is {exam_id, exam_date, exam_start_time, exam_end_time}.
+        """
+        query = """
+        SELECT 'exam' AS kind, e.exam_id::text AS key, e.exam_id AS id, NULL::int AS status,
+               NULL::int AS center_id, NULL::text AS room_number,
+               e.exam_date, e.exam_start_time, e.exam_end_time
+        FROM Exams e WHERE e.exam_id = ANY(%(exam_ids)s::int[])
+        UNION ALL
+        SELECT 'device', d.device_number::text, d.id, d.status, d.center_id, d.room_number, NULL, NULL, NULL
+        FROM devices d WHERE d.device_number = ANY(%(device_numbers)s::int[])
+        UNION ALL
+        SELECT 'center', ec.center_name, ec.id, ec.status, NULL, NULL, NULL, NULL, NULL
+        FROM exam_centers ec WHERE ec.center_name = ANY(%(center_names)s::text[])
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, {
+                        "exam_ids": list(exam_ids),
+                        "device_numbers": list(device_numbers),
+                        "center_names": list(center_names)
+                    })
+                    refs = {"exams": {}, "devices": {}, "centers": {}}
+                    for row in cursor.fetchall():
+                        if row["kind"] == "exam":
+                            refs["exams"][row["id"]] = {
+                                "exam_id": row["id"],
+                                "exam_date": row["exam_date"],
+                                "exam_start_time": row["exam_start_time"],
+                                "exam_end_time": row["exam_end_time"]
+                            }
+                        elif row["kind"] == "device":
+                            refs["devices"][int(row["key"])] = row
+                        else:
+                            refs["centers"][row["key"]] = row["id"]
+                    return refs
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    def find_device_conflicts(self, rows: List[Dict]) -> Dict[int, str]:
+        """
+        Rows ({index, student_id, exam_id, device_id}) whose device is already seated,
+        by a student outside `rows`, for the same exam or an exam with an overlapping slot.
+        Returns {index: student_id holding the device}.
+        """
+        if not rows:
+            return {}
+        query = """
+        WITH incoming AS (
+            SELECT * FROM unnest(%(indexes)s::int[], %(student_ids)s::text[], %(exam_ids)s::int[], %(device_ids)s::int[])
+                AS r(row_index, student_id, exam_id, device_id)
+        )
+        SELECT DISTINCT ON (i.row_index) i.row_index, ed.student_id
+        FROM incoming i
+        JOIN Exams t ON t.exam_id = i.exam_id
+        JOIN exam_distribution ed ON ed.device_id = i.device_id
+        JOIN Exams o ON o.exam_id = ed.exam_id
+        WHERE ed.student_id NOT IN (SELECT student_id FROM incoming)
+          AND (o.exam_id = t.exam_id
+               OR ((o.exam_date IS NULL OR t.exam_date IS NULL OR o.exam_date = t.exam_date)
+                   AND (o.exam_start_time IS NULL OR o.exam_end_time IS NULL
+                        OR t.exam_start_time IS NULL OR t.exam_end_time IS NULL
+                        OR (o.exam_start_time < t.exam_end_time AND t.exam_start_time < o.exam_end_time))))
+        ORDER BY i.row_index
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, {
+                        "indexes": [row["index"] for row in rows],
+                        "student_ids": [row["student_id"] for row in rows],
+                        "exam_ids": [row["exam_id"] for row in rows],
+                        "device_ids": [row["device_id"] for row in rows]
+                    })
+                    return {row["row_index"]: row["student_id"] for row in cursor.fetchall()}
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    def get_exam_assignments(self, exam_id: int) -> List[Dict]:
+        """Students already distributed to an exam, with their current device (may be NULL)"""
+        query = """
+        SELECT student_id, student_name, device_id
+        FROM exam_distribution
+        WHERE exam_id = %s
+        ORDER BY student_id
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (exam_id,))
+                    return cursor.fetchall()
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    def get_overlapping_exam_assignments(self, exam_id: int, student_ids: List[str]) -> Dict[str, int]:
+        """
+        Students of `student_ids` distributed to another exam whose slot overlaps this one
+        (a missing date/time counts as overlapping): {student_id: exam_id}.
+        """
+        if not student_ids:
+            return {}
+        query = """
+        SELECT ed.student_id, ed.exam_id
+        FROM exam_distribution ed
+        JOIN Exams o ON o.exam_id = ed.exam_id
+        JOIN Exams t ON t.exam_id = %s
+        WHERE ed.student_id = ANY(%s::text[])
+          AND ed.exam_id <> t.exam_id
+          AND (o.exam_date IS NULL OR t.exam_date IS NULL OR o.exam_date = t.exam_date)
+          AND (o.exam_start_time IS NULL OR o.exam_end_time IS NULL
+               OR t.exam_start_time IS NULL OR t.exam_end_time IS NULL
+               OR (o.exam_start_time < t.exam_end_time AND t.exam_start_time < o.exam_end_time))
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (exam_id, list(student_ids)))
+                    return {row["student_id"]: row["exam_id"] for row in cursor.fetchall()}
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    # دالة لجلب بيانات توزيع الاختبار لطالب معين
+    def get_exam_distribution_by_student(self,student_id: str) -> dict:
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    prepared_statements.execute(cursor, self.GET_BY_STUDENT, (student_id,))
                     row = cursor.fetchone()
                     if not row:
                         raise ValueError(f"No exam distribution found for student_id: {student_id}")
                     return row
         except Exception as e:
             raise RuntimeError(f"Failed to fetch exam distribution for student_id={student_id}") from e
+
+    def get_search_enrichment(self, student_ids: List[str], current_datetime: datetime,
+                              include_profile: bool = True) -> List[Dict]:
+        """
+        One row per student ID (input order) with its distribution, exam data and time window.
+        include_profile=False skips the students join (students kept in SQLite).
+        """
+        if not student_ids:
+            return []
+        statement = self.SEARCH_ENRICHMENT_WITH_PROFILE if include_profile else self.SEARCH_ENRICHMENT
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    prepared_statements.execute(cursor, statement, {
+                        "student_ids": [str(student_id) for student_id in student_ids],
+                        "now": current_datetime
+                    })
+                    return cursor.fetchall()
+        except errors.Error as e:
+            raise RuntimeError(f"Failed to fetch search enrichment: {str(e)}") from e
+
+    @classmethod
+    def _format_search_enrichment(cls, rows: List[Dict], current_datetime: datetime,
+                                  profiles: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Build the /vectors/search student entries keyed by student_id (same shape as before).
+        `profiles` maps Number -> student fields when they did not come from the query.
+        """
+        current_time = current_datetime.strftime("%Y-%m-%d %H:%M:%S")
+        enrichment = {}
+        for row in rows:
+            if profiles is None:
+                student_info = {key: row[key] for key in cls.PROFILE_KEYS}
+            else:
+                profile = profiles.get(row["student_id"])
+                if not profile:
+                    continue
+                student_info = dict(profile)
+
+            if row["distribution_id"] is None:
+                student_info["exam_distribution_error"] = "No exam distribution data found."
+            elif not row["has_exam"]:
+                student_info["exam_error"] = "No exam data found."
+            else:
+                student_info["exam_distribution"] = {
+                    "id": row["distribution_id"],
+                    "student_id": row["student_id"],
+                    "student_name": row["student_name"],
+                    "exam_id": row["exam_id"],
+                    "device_id": row["device_id"],
+                    "assigned_at": row["assigned_at"]
+                }
+                student_info["exam_data"] = ExamsRepository._format_exam_data(row)
+                student_info["isExamTimeValid"] = row["is_exam_time_valid"]
+                student_info["time_window"] = {
+                    "valid_start": row["valid_start"].strftime("%Y-%m-%d %H:%M:%S") if row["valid_start"] else None,
+                    "valid_end": row["valid_end"].strftime("%Y-%m-%d %H:%M:%S") if row["valid_end"] else None,
+                    "current_time": current_time
+                }
+            enrichment[row["student_id"]] = student_info
+        return enrichment
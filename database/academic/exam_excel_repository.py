@@ -1,75 +1,81 @@
 # repository.py
-import psycopg
-from psycopg import sql, errors
-from datetime import date, time
-from typing import List, Tuple
+from psycopg import errors
+from typing import Dict, Iterable, List, Tuple
 from database.connection import get_db_connection
 
 class ExamsExcelRepository:
 
-    def validate_exams_data(self, exams_data: List[Tuple]) -> List[Tuple[int, str]]:
-        invalid_records = []
-        
+    COLUMNS = (
+        "course_id", "major_id", "college_id", "level_id",
+        "year_id", "semester_id", "exam_date", "exam_start_time", "exam_end_time"
+    )
+
+    # (العمود في الملف، الجدول المرجعي، المفتاح) للتحقق من المراجع دفعة واحدة
+    REFERENCES = (
+        ("course_id", "Courses", "course_id"),
+        ("major_id", "Majors", "major_id"),
+        ("college_id", "Colleges", "college_id"),
+        ("level_id", "Levels", "level_id"),
+        ("year_id", "Academic_Years", "year_id"),
+        ("semester_id", "Semesters", "semester_id"),
+    )
+
+    def import_exams(self, records: Iterable[Tuple]) -> Tuple[int, List[Dict]]:
+        """
+        Insert exams from (row_number, course_id, ..., exam_end_time) tuples in one transaction.
+        The rows are COPYed into a staging table and checked against every reference table
+        with one anti-join; if any row points to a missing reference nothing is inserted
+        and [{"row", "column"}] is returned instead (one error per row: its first failing column).
+        Returns (inserted_count, reference_errors).
+        """
+        columns = ", ".join(self.COLUMNS)
+        missing_checks = " UNION ALL ".join(
+            f"SELECT s.row_number, {position} AS position, '{column}' AS column_name FROM temp_exams_import s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} r WHERE r.{key} = s.{column})"
+            for position, (column, table, key) in enumerate(self.REFERENCES)
+        )
+
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Create temporary table matching exams structure
                     cursor.execute("""
-                        CREATE TEMP TABLE IF NOT EXISTS temp_exams_validation (
-                            course_id INTEGER,
-                            major_id INTEGER,
-                            college_id INTEGER,
-                            level_id INTEGER,
-                            year_id INTEGER,
-                            semester_id INTEGER,
-                            exam_date DATE,
-                            exam_start_time TIME,
-                            exam_end_time TIME
+                        CREATE TEMP TABLE temp_exams_import (
+                            row_number INTEGER NOT NULL,
+                            course_id INTEGER NOT NULL,
+                            major_id INTEGER NOT NULL,
+                            college_id INTEGER NOT NULL,
+                            level_id INTEGER NOT NULL,
+                            year_id INTEGER NOT NULL,
+                            semester_id INTEGER NOT NULL,
+                            exam_date DATE NOT NULL,
+                            exam_start_time TIME NOT NULL,
+                            exam_end_time TIME NOT NULL
                         ) ON COMMIT DROP
                     """)
-                    
-                    for idx, record in enumerate(exams_data):
-                        try:
-                            cursor.execute(
-                                """
-                                INSERT INTO temp_exams_validation 
-                                (course_id, major_id, college_id, level_id,
-                                year_id, semester_id, exam_date, exam_start_time, exam_end_time)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                """,
-                                record
-                            )
-                        except errors.Error as e:
-                            invalid_records.append((idx, str(e)))
-                    
-                    conn.rollback()
-                    
-        except errors.Error as e:
-            raise RuntimeError(f"Validation failed: {str(e)}")
-        
-        return invalid_records    
 
-    def bulk_create_exams(self, exams_data: List[Tuple]) -> None:
-        try:
-            with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    if exams_data:
-                        print("First record for insertion:", exams_data[0])
-                        print("Data types:", [type(x) for x in exams_data[0]])
-                    
-                    query = """
-                        INSERT INTO exams (
-                            course_id, major_id, college_id, level_id,
-                            year_id, semester_id, exam_date, exam_start_time, exam_end_time
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """
-                    print("SQL query:", query)
-                    
-                    cursor.executemany(query, exams_data)
+                    with cursor.copy(f"COPY temp_exams_import (row_number, {columns}) FROM STDIN") as copy:
+                        for record in records:
+                            copy.write_row(record)
+
+                    cursor.execute(f"""
+                        SELECT DISTINCT ON (row_number) row_number, column_name
+                        FROM ({missing_checks}) m
+                        ORDER BY row_number, position
+                    """)
+                    reference_errors = [
+                        {"row": r["row_number"], "column": r["column_name"]} for r in cursor.fetchall()
+                    ]
+                    if reference_errors:
+                        conn.rollback()
+                        return 0, reference_errors
+
+                    cursor.execute(f"""
+                        INSERT INTO Exams ({columns})
+                        SELECT {columns} FROM temp_exams_import ORDER BY row_number
+                    """)
+                    inserted = cursor.rowcount
                     conn.commit()
-                    
+                    return inserted, []
+
         except errors.Error as e:
-            conn.rollback()
-            print("Database error details:", str(e))
-            raise RuntimeError(f"Bulk insert failed: {str(e)}")
\ No newline at end of file
+            raise RuntimeError(f"Bulk insert failed: {str(e)}")
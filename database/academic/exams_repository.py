@@ -1,9 +1,19 @@
 from typing import List, Dict, Optional, Tuple, Union
 from database.connection import get_db_connection
+from database import prepared_statements
+from database.pipeline import run_pipeline
 from psycopg import sql, errors
 from datetime import datetime, date, time
 
 class ExamsRepository:
+
+    GET_EXAM_DATA = prepared_statements.register("exams.get_exam_data", """
+            SELECT exam_date, exam_start_time, exam_end_time, college_id, course_id,
+                level_id, major_id, semester_id, year_id
+            FROM Exams
+            WHERE exam_id = %s
+            LIMIT 1
+        """)
    
     def create_exam(self, course_id: int, major_id: int, college_id: int, 
                 level_id: int, year_id: int, semester_id: int,
@@ -164,17 +174,10 @@ class ExamsRepository:
 
         try:
             with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    # Execute the update
-                    cursor.execute(update_query, params)
-                    updated = cursor.fetchone()
-                    conn.commit()
-
-                    if not updated:
-                        return None  # Exam not found
-
-                    # Fetch detailed info after update
-                    cursor.execute("""
+                # التحديث ثم جلب البيانات التفصيلية في رحلة شبكة واحدة
+                update_result, details = run_pipeline(conn, [
+                    (update_query, params),
+                    ("""
                         SELECT 
                                     e.exam_id,
                                     e.course_id,
@@ -202,9 +205,12 @@ class ExamsRepository:
                                 JOIN Semesters s ON e.semester_id = s.semester_id
                         WHERE e.exam_id = %s;
                     """, [exam_id])
+                ])
 
-                    result = cursor.fetchone()
-                    return result if result else None 
+                if not update_result["rows"]:
+                    return None  # Exam not found
+
+                return details["rows"][0] if details["rows"] else None
 
 
         except errors.ForeignKeyViolation as e:
@@ -363,39 +369,35 @@ class ExamsRepository:
 
     # دالة لجلب بيانات الاختبار باستخدام exam_id
     def get_exam_data(self,exam_id: int) -> dict:
-        query = """
-            SELECT exam_date, exam_start_time, exam_end_time, college_id, course_id,
-                level_id, major_id, semester_id, year_id
-            FROM Exams
-            WHERE exam_id = %s
-            LIMIT 1
-        """
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (exam_id,))
+                    prepared_statements.execute(cursor, self.GET_EXAM_DATA, (exam_id,))
                     row = cursor.fetchone()
                     if not row:
                         raise ValueError(f"No exam found with exam_id: {exam_id}")
-                    
-                    exam_date = row.get("exam_date")
-                    exam_start_time = row.get("exam_start_time")
-                    exam_end_time = row.get("exam_end_time")
-
-                    exam_date_str = exam_date.strftime("%Y-%m-%d") if hasattr(exam_date, "strftime") else exam_date
-                    exam_start_time_str = exam_start_time.strftime("%H:%M:%S") if hasattr(exam_start_time, "strftime") else exam_start_time
-                    exam_end_time_str = exam_end_time.strftime("%H:%M:%S") if hasattr(exam_end_time, "strftime") else exam_end_time
-
-                    return {
-                        "exam_date": exam_date_str,
-                        "exam_start_time": exam_start_time_str,
-                        "exam_end_time": exam_end_time_str,
-                        "college_id": row.get("college_id"),
-                        "course_id": row.get("course_id"),
-                        "level_id": row.get("level_id"),
-                        "major_id": row.get("major_id"),
-                        "semester_id": row.get("semester_id"),
-                        "year_id": row.get("year_id")
-                    }
+                    return self._format_exam_data(row)
         except Exception as e:
             raise RuntimeError(f"Failed to fetch exam data for exam_id={exam_id}") from e
+
+    @staticmethod
+    def _format_exam_data(row: Dict) -> Dict:
+        exam_date = row.get("exam_date")
+        exam_start_time = row.get("exam_start_time")
+        exam_end_time = row.get("exam_end_time")
+
+        exam_date_str = exam_date.strftime("%Y-%m-%d") if hasattr(exam_date, "strftime") else exam_date
+        exam_start_time_str = exam_start_time.strftime("%H:%M:%S") if hasattr(exam_start_time, "strftime") else exam_start_time
+        exam_end_time_str = exam_end_time.strftime("%H:%M:%S") if hasattr(exam_end_time, "strftime") else exam_end_time
+
+        return {
+            "exam_date": exam_date_str,
+            "exam_start_time": exam_start_time_str,
+            "exam_end_time": exam_end_time_str,
+            "college_id": row.get("college_id"),
+            "course_id": row.get("course_id"),
+            "level_id": row.get("level_id"),
+            "major_id": row.get("major_id"),
+            "semester_id": row.get("semester_id"),
+            "year_id": row.get("year_id")
+        }
@@ -0,0 +1,59 @@
+# database/aio/alert_repository.py
+from typing import Dict, List, Optional
+from psycopg.errors import ForeignKeyViolation, UndefinedTable
+from database.aio.connection import get_async_db_connection
+from database.monitoring.alert_repository import AlertRepository
+from database import prepared_statements
+
+
+class AsyncAlertRepository:
+    """Async alert ingestion used by the monitoring devices."""
+
+    async def get_alert_type(self, type_id: int) -> Optional[Dict]:
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("SELECT id, type_name FROM alert_types WHERE id = %s", (type_id,))
+                    return await cursor.fetchone()
+        except Exception as e:
+            raise Exception(f"Database error: {str(e)}")
+
+    async def get_alert_types(self) -> List[Dict]:
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("SELECT id, type_name FROM alert_types ORDER BY id")
+                    return await cursor.fetchall()
+        except Exception as e:
+            raise Exception(f"Database error: {str(e)}")
+
+    async def create_batch(self, items: List[Dict]) -> List[Dict]:
+        """Async counterpart of AlertRepository.create_batch (same statement)."""
+        if not items:
+            return []
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(AlertRepository.CREATE_BATCH_SQL, AlertRepository.batch_params(items))
+                    return await cursor.fetchall()
+        except UndefinedTable:
+            raise Exception("Alerts table does not exist")
+        except Exception as e:
+            raise Exception(f"Database error: {str(e)}")
+
+    async def create(self, exam_id: int, student_id: int, device_id: int,
+                     alert_type: int, message: str = None) -> Dict:
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(
+                        cursor, AlertRepository.CREATE,
+                        (exam_id, student_id, device_id, alert_type, message)
+                    )
+                    return await cursor.fetchone()
+        except ForeignKeyViolation as e:
+            raise ValueError(f"Invalid foreign key: {str(e)}")
+        except UndefinedTable:
+            raise Exception("Alerts table does not exist")
+        except Exception as e:
+            raise Exception(f"Database error: {str(e)}")
@@ -0,0 +1,103 @@
+# database/aio/connection.py
+# نسخة غير متزامنة (asyncio) من database/connection.py لمسارات ASGI
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from database.connection import (
+    DATABASE_URL, POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_MAX_IDLE, POOL_MAX_LIFETIME, POOL_TIMEOUT
+)
+
+_pool = None
+_current_connection = ContextVar("current_async_db_connection", default=None)
+
+
+async def open_async_pool():
+    """Open the process-wide async pool; called once from the ASGI app startup."""
+    global _pool
+    if _pool is None:
+        _pool = AsyncConnectionPool(
+            DATABASE_URL,
+            min_size=POOL_MIN_SIZE,
+            max_size=POOL_MAX_SIZE,
+            max_idle=POOL_MAX_IDLE,
+            max_lifetime=POOL_MAX_LIFETIME,
+            timeout=POOL_TIMEOUT,
+            kwargs={"row_factory": dict_row},
+            check=AsyncConnectionPool.check_connection,
+            name="vectors_db_async",
+            open=False
+        )
+        await _pool.open()
+    return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def get_async_pool():
+    if _pool is None:
+        raise RuntimeError("Async database pool is not open. Call open_async_pool() at startup.")
+    return _pool
+
+
+class _AsyncUnitOfWorkConnection:
+    """Shared connection of an async unit_of_work(); commit/rollback belong to the unit of work."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+@asynccontextmanager
+async def _join_unit_of_work(joined):
+    async with joined._conn.transaction():
+        yield joined
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """Async counterpart of database.connection.unit_of_work()."""
+    current = _current_connection.get()
+    if current is not None:
+        yield current
+        return
+
+    async with get_async_pool().connection() as conn:
+        async with conn.transaction():
+            joined = _AsyncUnitOfWorkConnection(conn)
+            token = _current_connection.set(joined)
+            try:
+                yield joined
+            finally:
+                _current_connection.reset(token)
+
+
+def get_async_db_connection():
+    """
+    Borrow an AsyncConnection: `async with get_async_db_connection() as conn:`.
+    Inside an async unit_of_work() the block joins the shared connection.
+    """
+    current = _current_connection.get()
+    if current is not None:
+        return _join_unit_of_work(current)
+    return get_async_pool().connection()
+
+
+async def get_async_pool_stats():
+    pool = get_async_pool()
+    stats = pool.get_stats()
+    stats.update({"min_size": pool.min_size, "max_size": pool.max_size})
+    return stats
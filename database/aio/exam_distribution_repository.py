@@ -0,0 +1,76 @@
+# database/aio/exam_distribution_repository.py
+from datetime import datetime
+from typing import Dict, List, Optional
+from psycopg import errors
+from database.aio.connection import get_async_db_connection
+from database.academic.exam_distribution_repository import ExamDistributionRepository
+from database.academic.exams_repository import ExamsRepository
+from database import prepared_statements
+
+
+class AsyncExamDistributionRepository:
+    """Async read path used by check-in and search (student info, distribution, exam data)."""
+
+    async def get_student_by_id(self, student_id: str) -> Optional[Dict]:
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(
+                        cursor, ExamDistributionRepository.GET_STUDENT_BY_ID, (student_id,)
+                    )
+                    return ExamDistributionRepository._format_student_row(await cursor.fetchone())
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    async def get_checkin_profile(self, student_id: str) -> Optional[Dict]:
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(
+                        cursor, ExamDistributionRepository.GET_CHECKIN_PROFILE, (student_id,)
+                    )
+                    return ExamDistributionRepository._format_student_row(await cursor.fetchone())
+        except errors.Error as e:
+            raise RuntimeError(f"Database error: {str(e)}")
+
+    async def get_exam_distribution_by_student(self, student_id: str) -> Optional[Dict]:
+        """Unlike the sync version a missing distribution returns None instead of raising."""
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(
+                        cursor, ExamDistributionRepository.GET_BY_STUDENT, (student_id,)
+                    )
+                    return await cursor.fetchone()
+        except errors.Error as e:
+            raise RuntimeError(f"Failed to fetch exam distribution for student_id={student_id}") from e
+
+    async def get_exam_data(self, exam_id: int) -> Optional[Dict]:
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(cursor, ExamsRepository.GET_EXAM_DATA, (exam_id,))
+                    row = await cursor.fetchone()
+                    return ExamsRepository._format_exam_data(row) if row else None
+        except errors.Error as e:
+            raise RuntimeError(f"Failed to fetch exam data for exam_id={exam_id}") from e
+
+    async def get_search_enrichment(self, student_ids: List[str], current_datetime: datetime,
+                                    include_profile: bool = True) -> List[Dict]:
+        """Async counterpart of ExamDistributionRepository.get_search_enrichment()."""
+        if not student_ids:
+            return []
+        statement = (
+            ExamDistributionRepository.SEARCH_ENRICHMENT_WITH_PROFILE if include_profile
+            else ExamDistributionRepository.SEARCH_ENRICHMENT
+        )
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(cursor, statement, {
+                        "student_ids": [str(student_id) for student_id in student_ids],
+                        "now": current_datetime
+                    })
+                    return await cursor.fetchall()
+        except errors.Error as e:
+            raise RuntimeError(f"Failed to fetch search enrichment: {str(e)}") from e
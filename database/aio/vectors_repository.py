@@ -0,0 +1,44 @@
+# database/aio/vectors_repository.py
+from database.aio.connection import get_async_db_connection
+from database.vectors_repository import VectorsRepository
+from database import prepared_statements
+
+
+class AsyncVectorsRepository:
+    """Async read path of VectorsRepository (same prepared statements)."""
+
+    async def get_vector_by_student_id(self, student_id):
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(
+                        cursor, VectorsRepository.GET_BY_STUDENT_ID, (student_id,)
+                    )
+                    return await cursor.fetchone()
+        except Exception as e:
+            print("Error fetching vector by student ID:", e)
+            raise
+
+    async def search_similar_vectors(self, vector, threshold=0.8, limit=1):
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(
+                        cursor, VectorsRepository.SEARCH_SIMILAR, (vector, vector, threshold, limit)
+                    )
+                    return await cursor.fetchall()
+        except Exception as e:
+            print("Error searching similar vectors:", e)
+            raise
+
+    async def search_similar_vectors_in_exam(self, vector, exam_id, exclude_student_id=None, threshold=0.6, limit=3):
+        try:
+            async with get_async_db_connection() as conn:
+                async with conn.cursor() as cursor:
+                    await prepared_statements.execute_async(cursor, VectorsRepository.SEARCH_IN_EXAM, (
+                        vector, exam_id, exclude_student_id, exclude_student_id, vector, threshold, limit
+                    ))
+                    return await cursor.fetchall()
+        except Exception as e:
+            print("Error searching similar vectors in exam:", e)
+            raise
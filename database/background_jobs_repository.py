@@ -0,0 +1,101 @@
+# database/background_jobs_repository.py
+import json
+from database.connection import get_db_connection
+
+
+class BackgroundJobsRepository:
+    """حالة المهام الخلفية المشتركة بين عمليات الخادم (workers)"""
+
+    JOB_COLUMNS = """
+    id, name, status, progress, result, error,
+    to_char(started_at, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS started_at,
+    to_char(finished_at, 'YYYY-MM-DD"T"HH24:MI:SS.US') AS finished_at
+    """
+
+    def save(self, job):
+        """
+        Insert or update the job row and refresh its heartbeat. A finished row is never
+        updated again, so a late progress snapshot can't turn it back to 'running'.
+        Returns False when the row was already finished.
+        """
+        try:
+            query = """
+            INSERT INTO background_jobs (id, name, status, progress, result, error, started_at, finished_at, heartbeat_at)
+            VALUES (%s, %s, %s, %s::jsonb, %s::jsonb, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (id) DO UPDATE SET
+                status = EXCLUDED.status,
+                progress = EXCLUDED.progress,
+                result = EXCLUDED.result,
+                error = EXCLUDED.error,
+                finished_at = EXCLUDED.finished_at,
+                heartbeat_at = EXCLUDED.heartbeat_at
+            WHERE background_jobs.status = 'running';
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (
+                        job["id"], job["name"], job["status"],
+                        json.dumps(job["progress"], default=str),
+                        json.dumps(job["result"], default=str),
+                        job["error"], job["started_at"], job["finished_at"]
+                    ))
+                    return cursor.rowcount > 0
+        except Exception as e:
+            print("Error saving background job:", e)
+            raise
+
+    def expire_stale(self, stale_after_seconds):
+        """Fail running jobs whose worker stopped sending heartbeats (e.g. the process died)."""
+        try:
+            query = """
+            UPDATE background_jobs
+            SET status = 'failed', error = 'Job stopped: its worker process is gone.', finished_at = CURRENT_TIMESTAMP
+            WHERE status = 'running' AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => %s);
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (stale_after_seconds,))
+                    return cursor.rowcount
+        except Exception as e:
+            print("Error expiring stale background jobs:", e)
+            raise
+
+    def delete_finished_before(self, retention_days):
+        try:
+            query = """
+            DELETE FROM background_jobs
+            WHERE status <> 'running' AND finished_at < CURRENT_TIMESTAMP - make_interval(days => %s);
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (retention_days,))
+                    return cursor.rowcount
+        except Exception as e:
+            print("Error deleting old background jobs:", e)
+            raise
+
+    def get(self, job_id):
+        try:
+            query = f"SELECT {self.JOB_COLUMNS} FROM background_jobs WHERE id = %s;"
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (job_id,))
+                    return cursor.fetchone()
+        except Exception as e:
+            print("Error fetching background job:", e)
+            raise
+
+    def find_running(self, name):
+        try:
+            query = f"""
+            SELECT {self.JOB_COLUMNS} FROM background_jobs
+            WHERE name = %s AND status = 'running'
+            ORDER BY started_at DESC LIMIT 1;
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (name,))
+                    return cursor.fetchone()
+        except Exception as e:
+            print("Error fetching running background job:", e)
+            raise
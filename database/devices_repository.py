@@ -1,8 +1,16 @@
 # database/devices_repository.py
 from database.connection import get_db_connection
+from database import prepared_statements
 from typing import Optional, List, Dict
 
 class DevicesRepository:
+
+    # يُستدعى مع كل طلب من أجهزة المراقبة
+    GET_BY_TOKEN = prepared_statements.register("devices.get_by_token", """
+    SELECT id, device_number, device_token, status, room_number, center_id, created_at
+    FROM devices
+    WHERE device_token = %s;
+    """)
     
     def add_device(self, device_number: int, device_token: str, room_number: str, center_id: int) -> Dict:
         """إضافة جهاز جديد"""
@@ -152,13 +160,9 @@ class DevicesRepository:
     def get_device_by_token(self, device_token: str) -> Optional[Dict]:
         """البحث عن جهاز بواسطة التوكن"""
         try:
-            query = """
-            SELECT * FROM devices
-            WHERE device_token = %s;
-            """
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (device_token,))
+                    prepared_statements.execute(cursor, self.GET_BY_TOKEN, (device_token,))
                     return cursor.fetchone()
         except Exception as e:
             print(f"Error getting device by token: {e}")
@@ -0,0 +1,98 @@
+# database/encoder_settings_repository.py
+from database.connection import get_db_connection
+
+
+class EncoderSettingsRepository:
+
+    def get_settings(self):
+        try:
+            query = "SELECT active_version, shadow_version, updated_at FROM encoder_settings WHERE id = 1;"
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query)
+                    return cursor.fetchone()
+        except Exception as e:
+            print("Error fetching encoder settings:", e)
+            raise
+
+    def lock_shadow_build(self):
+        """
+        Serialize starting a shadow build and the cutover until the end of the current
+        transaction (use inside unit_of_work()), across every worker process.
+        """
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('encoder_settings.shadow_build'))")
+
+    def set_shadow_version(self, shadow_version):
+        """بدء نسخة ظل جديدة ومسح متجهات الظل القديمة إن كانت لنسخة أخرى"""
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "UPDATE encoder_settings SET shadow_version = %s, updated_at = CURRENT_TIMESTAMP "
+                        "WHERE id = 1;",
+                        (shadow_version,)
+                    )
+                    cursor.execute(
+                        "UPDATE student_vectors SET vector_next = NULL, vector_next_version = NULL "
+                        "WHERE vector_next_version IS NOT NULL AND vector_next_version <> %s;",
+                        (shadow_version,)
+                    )
+                    return True
+        except Exception as e:
+            print("Error setting shadow encoder version:", e)
+            raise
+
+    def cutover(self):
+        """
+        تبديل النسخة النشطة إلى نسخة الظل في معاملة واحدة
+        Writes to student_vectors are blocked for the duration of the swap; reads (search)
+        keep seeing the old vectors until commit, then the new ones.
+
+        Raises:
+            ValueError: If there is no shadow version or coverage is below 100%
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT active_version, shadow_version FROM encoder_settings WHERE id = 1 FOR UPDATE;"
+                    )
+                    settings = cursor.fetchone()
+                    shadow_version = settings["shadow_version"] if settings else None
+                    if not shadow_version:
+                        raise ValueError("No shadow encoder version is being built.")
+
+                    # SHARE ROW EXCLUSIVE يمنع الكتابة المتزامنة ولا يمنع القراءة
+                    cursor.execute("LOCK TABLE student_vectors IN SHARE ROW EXCLUSIVE MODE;")
+                    cursor.execute(
+                        "SELECT COUNT(*) AS pending FROM student_vectors "
+                        "WHERE vector_next_version IS DISTINCT FROM %s;",
+                        (shadow_version,)
+                    )
+                    pending = cursor.fetchone()["pending"]
+                    if pending:
+                        raise ValueError(f"Shadow coverage incomplete: {pending} vectors still pending.")
+
+                    cursor.execute(
+                        "UPDATE student_vectors "
+                        "SET vector = vector_next, encoder_version = vector_next_version, "
+                        "    vector_next = NULL, vector_next_version = NULL;"
+                    )
+                    swapped = cursor.rowcount
+                    cursor.execute(
+                        "UPDATE encoder_settings SET active_version = %s, shadow_version = NULL, "
+                        "updated_at = CURRENT_TIMESTAMP WHERE id = 1;",
+                        (shadow_version,)
+                    )
+                    return {
+                        "previous_version": settings["active_version"],
+                        "active_version": shadow_version,
+                        "vectors_swapped": swapped
+                    }
+        except ValueError:
+            raise
+        except Exception as e:
+            print("Error during encoder cutover:", e)
+            raise
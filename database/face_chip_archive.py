@@ -0,0 +1,169 @@
+# database/face_chip_archive.py
+import os
+import json
+import zlib
+import sqlite3
+import threading
+import numpy as np
+
+
+class FaceChipArchive:
+    """
+    أرشيف صور الوجوه المحاذاة (face chips) لكل طالب في ملف واحد مضغوط
+    Every student has one row in a single SQLite file: the aligned 150x150 chip
+    (zlib-compressed raw pixels), the 5-point landmarks and the detector metadata,
+    so re-embedding only runs the encoder. The file lives next to this module,
+    whatever the working directory of the process is.
+    """
+    ARCHIVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "face_chips.db")
+    # الأرشيف القديم: ملف .npz لكل طالب، يُنقل تلقائيًا إلى الملف الموحد
+    LEGACY_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "face_chips")
+    ITER_BATCH_SIZE = 200
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000"
+    )
+
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path or FaceChipArchive.ARCHIVE_PATH
+        self._local = threading.local()
+        with FaceChipArchive._init_lock:
+            if self.path not in FaceChipArchive._initialized_paths:
+                self._create_table()
+                if path is None:
+                    self._import_legacy_directory()
+                FaceChipArchive._initialized_paths.add(self.path)
+
+    def _connection(self):
+        """Persistent connection of the current thread (recreated after a fork)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self.path)
+        for pragma in self.PRAGMAS:
+            connection.execute(pragma)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _create_table(self):
+        with self._connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS face_chips (
+                student_id TEXT PRIMARY KEY,
+                height INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                channels INTEGER NOT NULL,
+                chip BLOB NOT NULL,
+                landmarks TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+
+    def _import_legacy_directory(self):
+        if not os.path.isdir(self.LEGACY_DIRECTORY):
+            return
+        for name in sorted(os.listdir(self.LEGACY_DIRECTORY)):
+            if not name.endswith(".npz"):
+                continue
+            legacy_path = os.path.join(self.LEGACY_DIRECTORY, name)
+            student_id = name[:-len(".npz")]
+            with np.load(legacy_path) as data:
+                if not self.exists(student_id):
+                    self.save(student_id, {
+                        "chip": data["chip"],
+                        "landmarks": data["landmarks"].tolist(),
+                        "metadata": json.loads(str(data["metadata"]))
+                    })
+            os.remove(legacy_path)
+
+    @staticmethod
+    def _key(student_id):
+        key = str(student_id).strip()
+        if not key:
+            raise ValueError("Invalid student ID for face chip archive.")
+        return key
+
+    def save(self, student_id, record):
+        """Store the chip record of a student, replacing any previous one."""
+        chip = np.ascontiguousarray(record["chip"], dtype=np.uint8)
+        if chip.ndim == 2:
+            chip = chip[:, :, np.newaxis]
+        with self._connection() as conn:
+            conn.execute("""
+            INSERT INTO face_chips (student_id, height, width, channels, chip, landmarks, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (student_id) DO UPDATE SET
+                height = excluded.height, width = excluded.width, channels = excluded.channels,
+                chip = excluded.chip, landmarks = excluded.landmarks, metadata = excluded.metadata,
+                updated_at = CURRENT_TIMESTAMP
+            """, (
+                self._key(student_id), chip.shape[0], chip.shape[1], chip.shape[2],
+                zlib.compress(chip.tobytes(), 6),
+                json.dumps(np.asarray(record["landmarks"], dtype=np.int32).tolist()),
+                json.dumps(record.get("metadata", {}))
+            ))
+        return self.path
+
+    @staticmethod
+    def _record(row):
+        student_id, height, width, channels, chip, landmarks, metadata = row
+        chip = np.frombuffer(zlib.decompress(chip), dtype=np.uint8).reshape(height, width, channels)
+        return {
+            "student_id": student_id,
+            "chip": chip[:, :, 0] if channels == 1 else chip,
+            "landmarks": json.loads(landmarks),
+            "metadata": json.loads(metadata)
+        }
+
+    def load(self, student_id):
+        """Return the chip record of a student or None if it was never archived."""
+        row = self._connection().execute(
+            "SELECT student_id, height, width, channels, chip, landmarks, metadata FROM face_chips WHERE student_id = ?",
+            (self._key(student_id),)
+        ).fetchone()
+        return self._record(row) if row else None
+
+    def exists(self, student_id):
+        return self._connection().execute(
+            "SELECT 1 FROM face_chips WHERE student_id = ?", (self._key(student_id),)
+        ).fetchone() is not None
+
+    def delete(self, student_id):
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM face_chips WHERE student_id = ?", (self._key(student_id),)).rowcount > 0
+
+    def list_student_ids(self):
+        rows = self._connection().execute("SELECT student_id FROM face_chips ORDER BY student_id").fetchall()
+        return [row[0] for row in rows]
+
+    def iter_records(self, student_ids=None):
+        """
+        Yield archived records one by one so large galleries never sit in memory at once.
+        Rows are fetched in small batches (keyset on student_id), so no read stays open
+        while the caller encodes.
+        """
+        if student_ids is not None:
+            for student_id in student_ids:
+                record = self.load(student_id)
+                if record is not None:
+                    yield record
+            return
+
+        last_id = ""
+        while True:
+            rows = self._connection().execute("""
+            SELECT student_id, height, width, channels, chip, landmarks, metadata
+            FROM face_chips WHERE student_id > ? ORDER BY student_id LIMIT ?
+            """, (last_id, self.ITER_BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._record(row)
+            last_id = rows[-1][0]
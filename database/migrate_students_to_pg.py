@@ -0,0 +1,97 @@
+# database/migrate_students_to_pg.py
+# نقل بيانات الطلاب من students.db (SQLite) إلى جدول students في Postgres عبر COPY
+#   python -m database.migrate_students_to_pg [--sqlite database/students.db]
+import argparse
+import sqlite3
+import psycopg
+from database.connection import DATABASE_URL
+
+COLUMNS = (
+    "StudentID", "StudentName", "Number", "College", "Level",
+    "Specialization", "Gender", "ImagePath", "CreatedAt"
+)
+
+
+def migrate_students(sqlite_path="database/students.db", batch_size=5000):
+    """
+    Copy every SQLite student row into Postgres, keeping StudentID.
+    Rows are COPYed into a temporary staging table and merged with ON CONFLICT (Number),
+    so running the migration again only adds the students that are missing.
+    A row whose StudentID already belongs to another Number is not copied and is
+    returned in "conflicts" instead of being counted as already present.
+    """
+    columns = ", ".join(COLUMNS)
+    source = sqlite3.connect(sqlite_path)
+    try:
+        with psycopg.connect(DATABASE_URL) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE students_staging (LIKE students INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+
+                copied = 0
+                rows = source.execute(f"SELECT {columns} FROM students ORDER BY StudentID")
+                with cursor.copy(f"COPY students_staging ({columns}) FROM STDIN") as copy:
+                    while True:
+                        batch = rows.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        for row in batch:
+                            copy.write_row(row)
+                        copied += len(batch)
+
+                # StudentID مستخدم لطالب آخر (رقم قيد مختلف) ورقم القيد غير موجود
+                cursor.execute("""
+                    SELECT s.StudentID, s.Number, p.Number AS existing_number
+                    FROM students_staging s
+                    JOIN students p ON p.StudentID = s.StudentID AND p.Number <> s.Number
+                    WHERE NOT EXISTS (SELECT 1 FROM students e WHERE e.Number = s.Number)
+                    ORDER BY s.StudentID
+                """)
+                conflicts = [
+                    {"StudentID": row[0], "Number": row[1], "existing_number": row[2]}
+                    for row in cursor.fetchall()
+                ]
+
+                cursor.execute(f"""
+                    INSERT INTO students ({columns})
+                    SELECT {columns} FROM students_staging s
+                    WHERE NOT (s.StudentID = ANY(%s::int[]))
+                    ON CONFLICT (Number) DO NOTHING
+                """, ([c["StudentID"] for c in conflicts],))
+                inserted = cursor.rowcount
+
+                # الـ SERIAL يجب أن يبدأ بعد أكبر StudentID منقول
+                cursor.execute("""
+                    SELECT setval(
+                        pg_get_serial_sequence('students', 'studentid'),
+                        COALESCE((SELECT MAX(StudentID) FROM students), 0) + 1,
+                        false
+                    )
+                """)
+    finally:
+        source.close()
+
+    return {
+        "copied": copied,
+        "inserted": inserted,
+        "skipped": copied - inserted - len(conflicts),
+        "conflicts": conflicts
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate students.db into the Postgres students table.")
+    parser.add_argument("--sqlite", default="database/students.db")
+    args = parser.parse_args()
+
+    result = migrate_students(args.sqlite)
+    print(
+        f"Copied {result['copied']} students: {result['inserted']} inserted, "
+        f"{result['skipped']} already present, {len(result['conflicts'])} conflicts."
+    )
+    for conflict in result["conflicts"]:
+        print(
+            f"  StudentID {conflict['StudentID']} (Number {conflict['Number']}) is already used "
+            f"by Number {conflict['existing_number']}"
+        )
@@ -1,36 +1,99 @@
 # database/monitoring/alert_repository.py
 from datetime import time
 from database.connection import get_db_connection
+from database import prepared_statements
+from database.pipeline import run_pipeline
 from psycopg.errors import ForeignKeyViolation, UndefinedTable
 from typing import Dict, List, Optional
 
 class AlertRepository:
 
+    CREATE = prepared_statements.register("alerts.create", """INSERT INTO alerts 
+                        (exam_id, student_id, device_id, alert_type, alert_message) 
+                        VALUES (%s, %s, %s, %s, %s)
+                        RETURNING alert_id, exam_id, student_id, device_id, 
+                                 alert_type, alert_message, alert_timestamp, is_read""")
+
+    # دفعة تنبيهات في جملة واحدة: الصفوف كمصفوفات (unnest)، والصف ذو امتحان/جهاز غير موجود
+    # يُرفض وحده بدل إفشال الدفعة. المعرفات تُحجز من الـ sequence قبل الإدخال لربطها بترتيب الطلب
+    CREATE_BATCH_SQL = """
+        WITH incoming AS (
+            SELECT *
+            FROM unnest(%(exam_ids)s::int[], %(student_ids)s::int[], %(device_ids)s::int[],
+                        %(alert_types)s::int[], %(messages)s::text[], %(timestamps)s::timestamp[])
+                WITH ORDINALITY AS a(exam_id, student_id, device_id, alert_type, alert_message, alert_timestamp, position)
+        ),
+        checked AS (
+            SELECT i.*, e.exam_id IS NULL AS missing_exam, d.id IS NULL AS missing_device
+            FROM incoming i
+            LEFT JOIN Exams e ON e.exam_id = i.exam_id
+            LEFT JOIN devices d ON d.id = i.device_id
+        ),
+        valid AS (
+            SELECT c.*, nextval(pg_get_serial_sequence('alerts', 'alert_id')) AS alert_id
+            FROM checked c
+            WHERE NOT c.missing_exam AND NOT c.missing_device
+        ),
+        inserted AS (
+            INSERT INTO alerts (alert_id, exam_id, student_id, device_id, alert_type, alert_message, alert_timestamp)
+            SELECT alert_id, exam_id, student_id, device_id, alert_type, alert_message,
+                   COALESCE(alert_timestamp, CURRENT_TIMESTAMP)
+            FROM valid
+        )
+        SELECT c.position, v.alert_id, c.missing_exam, c.missing_device
+        FROM checked c
+        LEFT JOIN valid v ON v.position = c.position
+        ORDER BY c.position
+    """
+
+    @staticmethod
+    def batch_params(items: List[Dict]) -> Dict:
+        return {
+            "exam_ids": [item["exam_id"] for item in items],
+            "student_ids": [item["student_id"] for item in items],
+            "device_ids": [item["device_id"] for item in items],
+            "alert_types": [item["alert_type"] for item in items],
+            "messages": [item["message"] for item in items],
+            "timestamps": [item["timestamp"] for item in items]
+        }
+
+    def create_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        Insert a batch of validated alerts in one statement and one transaction.
+        Returns one row per item, in order: {position (1-based), alert_id, missing_exam, missing_device}.
+        """
+        if not items:
+            return []
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(self.CREATE_BATCH_SQL, self.batch_params(items))
+                    rows = cursor.fetchall()
+                    conn.commit()
+                    return rows
+        except UndefinedTable:
+            raise Exception("Alerts table does not exist")
+        except Exception as e:
+            raise Exception(f"Database error: {str(e)}")
+
     def create(self, exam_id: int, student_id: int, device_id: int, 
             alert_type: int, message: str = None) -> Dict:
         """Create new alert"""
         try:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(
-                        """INSERT INTO alerts 
-                        (exam_id, student_id, device_id, alert_type, alert_message) 
-                        VALUES (%s, %s, %s, %s, %s)
-                        RETURNING alert_id, exam_id, student_id, device_id, 
-                                 alert_type, alert_message, alert_timestamp, is_read""",
+                    prepared_statements.execute(
+                        cursor, self.CREATE,
                         (exam_id, student_id, device_id, alert_type, message)
                     )
                     result = cursor.fetchone()
                     conn.commit()
                     return result
         except ForeignKeyViolation as e:
-            conn.rollback()
             raise ValueError(f"Invalid foreign key: {str(e)}")
         except UndefinedTable:
-            conn.rollback()
             raise Exception("Alerts table does not exist")
         except Exception as e:
-            conn.rollback()
             raise Exception(f"Database error: {str(e)}")
 
     def get_alert_devices(self, center_id=None, room_number=None, exam_date=None, start_time=None, end_time=None):
@@ -372,7 +435,7 @@ class AlertRepository:
                     conn.commit()
                     return deleted
         except Exception as e:
-            conn.rollback()
+            raise Exception(f"Database error: {str(e)}")
 
     def delete_multiple_alerts(self, alert_keys: List[Dict]) -> int:
         """
@@ -381,24 +444,15 @@ class AlertRepository:
         """
         try:
             with get_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    total_deleted = 0
-                    for key in alert_keys:
-                        exam_id = key["exam_id"]
-                        student_id = key["student_id"]
-                        device_id = key["device_id"]
-                        print(exam_id)
-                        print(student_id)
-                        print(device_id)
-                        print('--------')
-                        cursor.execute(
-                            "DELETE FROM alerts WHERE exam_id = %s AND student_id = %s AND device_id = %s",
-                            (exam_id, student_id, device_id)
-                        )
-                        total_deleted += cursor.rowcount
-
-                    conn.commit()
-                    return total_deleted
+                # كل عمليات الحذف في رحلة شبكة واحدة (pipeline) وضمن معاملة واحدة
+                results = run_pipeline(conn, [
+                    (
+                        "DELETE FROM alerts WHERE exam_id = %s AND student_id = %s AND device_id = %s",
+                        (key["exam_id"], key["student_id"], key["device_id"])
+                    )
+                    for key in alert_keys
+                ])
+                return sum(result["rowcount"] for result in results)
         except Exception as e:
             raise RuntimeError(f"Failed to delete alerts: {str(e)}")
 
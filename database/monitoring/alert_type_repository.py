@@ -21,7 +21,6 @@ class AlertTypeRepository:
         except UndefinedTable:
             raise Exception("Database table does not exist")
         except Exception as e:
-            conn.rollback()
             raise Exception(f"Database error: {str(e)}")
 
     def get_by_id(self, type_id: int) -> Optional[Dict]:
@@ -67,7 +66,6 @@ class AlertTypeRepository:
         except UniqueViolation:
             raise ValueError("Alert type name already exists")
         except Exception as e:
-            conn.rollback()
             raise Exception(f"Database error: {str(e)}")
 
     def delete(self, type_id: int) -> bool:
@@ -85,5 +83,4 @@ class AlertTypeRepository:
         except ForeignKeyViolation:
             raise ValueError("Cannot delete - type is in use by alerts")
         except Exception as e:
-            conn.rollback()
             raise Exception(f"Database error: {str(e)}")
\ No newline at end of file
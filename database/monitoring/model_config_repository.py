@@ -1,9 +1,15 @@
 from datetime import datetime
 from database.connection import get_db_connection
+from database import prepared_statements
 from psycopg.errors import UndefinedTable
 from typing import Dict, Optional
 
 class ModelConfigRepository:
+    # رقم نسخة الإعدادات النشطة فقط (يُفحص كثيرًا، بدون قراءة الصف كاملًا)
+    GET_ACTIVE_VERSION = prepared_statements.register("model_config.get_active_version", """
+        SELECT MAX(version) AS version FROM model_config
+    """)
+
     def __init__(self):
         pass  # لا نحتاج لـ db_url لأننا نستخدم get_db_connection مباشرة
 
@@ -14,6 +20,7 @@ class ModelConfigRepository:
             
         return {
             "id": row_dict["id"],
+            "version": row_dict["version"],
             "updated_at": row_dict["updated_at"],
             "faceMeshOptions": {
                 "maxNumFaces": row_dict["face_mesh_max_num_faces"],
@@ -92,7 +99,7 @@ class ModelConfigRepository:
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(
-                        "SELECT * FROM model_config ORDER BY updated_at DESC LIMIT 1"
+                        "SELECT * FROM model_config ORDER BY version DESC LIMIT 1"
                     )
                     row = cursor.fetchone()
                     return self._convert_to_model(row)
@@ -101,6 +108,18 @@ class ModelConfigRepository:
         except Exception as e:
             raise Exception(f"Failed to get active config: {str(e)}")
 
+    def get_active_version(self) -> Optional[int]:
+        """رقم نسخة الإعدادات النشطة (None إذا كان الجدول فارغًا)"""
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    prepared_statements.execute(cursor, self.GET_ACTIVE_VERSION)
+                    return cursor.fetchone()["version"]
+        except UndefinedTable:
+            raise Exception("Model config table does not exist")
+        except Exception as e:
+            raise Exception(f"Failed to get active config version: {str(e)}")
+
     def update_config(self, config_id: int, config_data: Dict) -> Dict:
         """تحديث الإعدادات في قاعدة البيانات"""
         try:
@@ -199,10 +218,8 @@ class ModelConfigRepository:
                         raise ValueError("Config not found or no changes made")
                     return self._convert_to_model(updated_row)
         except UndefinedTable as e:
-            conn.rollback()
             raise Exception("Model config table does not exist")
         except Exception as e:
-            conn.rollback()
             raise Exception(f"Failed to update config: {str(e)}")
 
     def get_default_config(self) -> Dict:
@@ -0,0 +1,74 @@
+# database/pipeline.py
+"""
+تنفيذ عدة استعلامات في psycopg pipeline mode: رحلة شبكة واحدة بدل N رحلة
+Each statement gets its own cursor; after the batch is synced the result of each
+statement is read back in order, and a failure is reported with its index.
+"""
+from typing import Dict, Iterable, List, Tuple
+from psycopg import errors
+
+
+def _run_batch(conn, statements: List[Tuple]) -> List[Dict]:
+    cursors = []
+    try:
+        with conn.transaction():
+            with conn.pipeline() as pipeline:
+                for query, params in statements:
+                    cursor = conn.cursor()
+                    cursor.execute(query, params)
+                    cursors.append(cursor)
+                pipeline.sync()
+
+            results = []
+            for cursor in cursors:
+                results.append({
+                    "rowcount": cursor.rowcount,
+                    "rows": cursor.fetchall() if cursor.description else None,
+                    "error": None
+                })
+            return results
+    except errors.Error as e:
+        # النتائج تُربط بالـ cursor بالترتيب؛ أول cursor بلا نتيجة هو الاستعلام الذي فشل
+        e.pipeline_index = next(
+            (i for i, cursor in enumerate(cursors) if cursor.pgresult is None), None
+        )
+        raise
+    finally:
+        for cursor in cursors:
+            cursor.close()
+
+
+def run_pipeline(conn, statements: Iterable[Tuple], continue_on_error: bool = False) -> List[Dict]:
+    """
+    Run (query, params) statements in pipeline mode inside a transaction/savepoint on `conn`.
+
+    Returns one dict per statement: {"rowcount", "rows" (None for commands), "error"}.
+
+    continue_on_error=False: the first failing statement rolls the batch back and its
+    psycopg error is re-raised with a `pipeline_index` attribute.
+    continue_on_error=True: failed statements are recorded in "error" and the batch is
+    replayed without them, so each failure costs one extra round trip instead of N.
+    """
+    statements = list(statements)
+    results: List[Dict] = [None] * len(statements)
+    pending = list(range(len(statements)))
+
+    while pending:
+        try:
+            batch_results = _run_batch(conn, [statements[i] for i in pending])
+        except errors.Error as e:
+            if e.pipeline_index is None:
+                # فشل خارج الاستعلامات نفسها (مثل بدء المعاملة)
+                raise
+            if not continue_on_error:
+                e.pipeline_index = pending[e.pipeline_index]
+                raise
+            failed = pending.pop(e.pipeline_index)
+            results[failed] = {"rowcount": 0, "rows": None, "error": str(e)}
+            continue
+
+        for index, result in zip(pending, batch_results):
+            results[index] = result
+        break
+
+    return results
@@ -0,0 +1,94 @@
+# database/prepared_statements.py
+"""
+سجل الاستعلامات المتكررة (hot queries) التي تُجهّز على الخادم مرة واحدة لكل اتصال
+Repositories register their SQL once under a name and execute it by name.
+psycopg keeps the server-side prepared statement in the cache of each pooled
+connection, so a reconnected connection simply prepares again on first use.
+"""
+import threading
+import time
+from psycopg import errors
+
+_statements = {}
+_stats = {}
+_stats_lock = threading.Lock()
+
+# أخطاء تعني أن الخطة المجهزة لم تعد صالحة على هذا الاتصال (تغيير مخطط أو DEALLOCATE)
+_STALE_PLAN_ERRORS = (errors.InvalidSqlStatementName, errors.FeatureNotSupported)
+
+
+def register(name, query):
+    """Register a named statement and return its name (used as a class attribute in repositories)."""
+    existing = _statements.get(name)
+    if existing is not None and existing != query:
+        raise ValueError(f"Prepared statement '{name}' is already registered with different SQL.")
+    _statements[name] = query
+    with _stats_lock:
+        _stats.setdefault(name, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+    return name
+
+
+def execute(cursor, name, params=None):
+    """Execute a registered statement as a server-side prepared statement and record its timing."""
+    query = _statements[name]
+    start = time.perf_counter()
+    try:
+        cursor.execute(query, params, prepare=True)
+    except _STALE_PLAN_ERRORS:
+        _record(name, start, failed=True)
+        # نغلق الاتصال ليستبدله الـ pool باتصال جديد يعيد تجهيز الاستعلامات
+        cursor.connection.close()
+        raise
+    except Exception:
+        _record(name, start, failed=True)
+        raise
+    _record(name, start)
+    return cursor
+
+
+async def execute_async(cursor, name, params=None):
+    """Async variant of execute() for psycopg.AsyncCursor (same registry and stats)."""
+    query = _statements[name]
+    start = time.perf_counter()
+    try:
+        await cursor.execute(query, params, prepare=True)
+    except _STALE_PLAN_ERRORS:
+        _record(name, start, failed=True)
+        await cursor.connection.close()
+        raise
+    except Exception:
+        _record(name, start, failed=True)
+        raise
+    _record(name, start)
+    return cursor
+
+
+def _record(name, start, failed=False):
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    with _stats_lock:
+        stats = _stats[name]
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if failed:
+            stats["errors"] += 1
+
+
+def get_stats():
+    """Per-statement call count, errors and timing (ms)."""
+    with _stats_lock:
+        return {
+            name: {
+                **stats,
+                "total_ms": round(stats["total_ms"], 3),
+                "max_ms": round(stats["max_ms"], 3),
+                "avg_ms": round(stats["total_ms"] / stats["calls"], 3) if stats["calls"] else 0.0
+            }
+            for name, stats in _stats.items()
+        }
+
+
+def reset_stats():
+    with _stats_lock:
+        for stats in _stats.values():
+            stats.update({"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
@@ -620,6 +620,577 @@ def seed_default_model_config():
     except Exception as e:
         print(f"Error seeding default model config: {e}")   
     
+def create_encoder_versioning():
+    """
+    إضافة نسخة المُرمّز (encoder_version) للمتجهات مع عمود ظل لإعادة الترميز دون توقف البحث
+    """
+    query_alter_vectors = """
+    ALTER TABLE student_vectors
+        ADD COLUMN IF NOT EXISTS encoder_version VARCHAR(50) NOT NULL DEFAULT 'dlib_resnet_v1',
+        ADD COLUMN IF NOT EXISTS vector_next vector(128),
+        ADD COLUMN IF NOT EXISTS vector_next_version VARCHAR(50);
+    """
+
+    query_create_encoder_settings = """
+    CREATE TABLE IF NOT EXISTS encoder_settings (
+        id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        active_version VARCHAR(50) NOT NULL,
+        shadow_version VARCHAR(50),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    query_seed_encoder_settings = """
+    INSERT INTO encoder_settings (id, active_version)
+    VALUES (1, 'dlib_resnet_v1')
+    ON CONFLICT (id) DO NOTHING;
+    """
+
+    query_index_shadow = """
+    CREATE INDEX IF NOT EXISTS idx_student_vectors_next_version
+    ON student_vectors (vector_next_version);
+    """
+
+    try:
+        execute_query(DB_URL, query_alter_vectors)
+        print("Columns 'encoder_version', 'vector_next', 'vector_next_version' added to 'student_vectors'.")
+
+        execute_query(DB_URL, query_create_encoder_settings)
+        execute_query(DB_URL, query_seed_encoder_settings)
+        print("Table 'encoder_settings' created successfully.")
+
+        execute_query(DB_URL, query_index_shadow)
+        print("Index on 'vector_next_version' created successfully.")
+    except Exception as e:
+        print(f"Error creating encoder versioning: {e}")
+        raise
+
+def create_students_table():
+    """
+    جدول الطلاب في Postgres (بديل students.db) بنفس أعمدة SQLite وترتيبها
+    حتى تبقى الصفوف المرجعة (tuples) كما هي في services/students_service.py
+    """
+    query_create_students = """
+    CREATE TABLE IF NOT EXISTS students (
+        StudentID SERIAL PRIMARY KEY,
+        StudentName TEXT NOT NULL,
+        Number TEXT NOT NULL UNIQUE,
+        College TEXT NOT NULL,
+        Level TEXT NOT NULL CHECK (LENGTH(Level) = 1),
+        Specialization TEXT NOT NULL,
+        Gender INTEGER NOT NULL CHECK (Gender IN (0, 1)),
+        ImagePath TEXT NOT NULL,
+        CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    try:
+        execute_query(DB_URL, query_create_students)
+        print("Table 'students' created successfully.")
+    except Exception as e:
+        print(f"Error creating students table: {e}")
+        raise
+
+def create_student_checkin_profiles():
+    """
+    نموذج قراءة (read model) لمسار /identity/verify: صف واحد لكل طالب يحوي كل بيانات الرد + المتجه
+    يُحدَّث تدريجيًا بالـ triggers عند تغيير التوزيع أو الاختبار أو الجهاز أو المركز أو المتجه
+    """
+    query_create_profiles = """
+    CREATE TABLE IF NOT EXISTS student_checkin_profiles (
+        student_id VARCHAR(50) PRIMARY KEY,
+        student_name VARCHAR(100) NOT NULL,
+        device_number INTEGER NOT NULL,
+        room_number VARCHAR(50) NOT NULL,
+        center_name VARCHAR(100) NOT NULL,
+        exam_id INTEGER NOT NULL,
+        exam_date DATE,
+        exam_start_time TIME,
+        exam_end_time TIME,
+        course_name VARCHAR(255),
+        college_name VARCHAR(255),
+        major_name VARCHAR(255),
+        level_name VARCHAR(50),
+        semester_name VARCHAR(50),
+        academic_year VARCHAR(50),
+        vector vector(128),
+        encoder_version VARCHAR(50),
+        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    # إعادة بناء صفوف مجموعة طلاب من الجداول الأصلية (نفس join مسار التحقق)
+    # قفل لكل طالب (بترتيب ثابت) قبل القراءة: التحديثان المتزامنان لنفس الطالب يتتاليان،
+    # والثاني يقرأ بلقطة جديدة (دالة VOLATILE) ترى ما ثبّته الأول، فلا تُكتب بيانات قديمة فوق الجديدة
+    query_refresh_function = """
+    CREATE OR REPLACE FUNCTION refresh_student_checkin_profiles(p_student_ids TEXT[])
+    RETURNS VOID AS $$
+        SELECT pg_advisory_xact_lock(hashtext('student_checkin_profiles'), k)
+        FROM (SELECT DISTINCT hashtext(id) AS k FROM unnest(p_student_ids) AS id ORDER BY k) AS keys;
+
+        WITH fresh AS (
+            SELECT
+                ed.student_id, ed.student_name, d.device_number, d.room_number, ec.center_name,
+                e.exam_id, e.exam_date, e.exam_start_time, e.exam_end_time,
+                c.name AS course_name, col.name AS college_name, m.name AS major_name,
+                l.level_name, s.semester_name, ay.year_name AS academic_year,
+                sv.vector, sv.encoder_version
+            FROM exam_distribution ed
+            JOIN devices d ON ed.device_id = d.id
+            JOIN exam_centers ec ON d.center_id = ec.id
+            JOIN Exams e ON ed.exam_id = e.exam_id
+            JOIN Courses c ON e.course_id = c.course_id
+            JOIN Colleges col ON e.college_id = col.college_id
+            JOIN Majors m ON e.major_id = m.major_id
+            JOIN Levels l ON e.level_id = l.level_id
+            JOIN Semesters s ON e.semester_id = s.semester_id
+            JOIN Academic_Years ay ON e.year_id = ay.year_id
+            LEFT JOIN student_vectors sv ON sv.student_id = ed.student_id
+            WHERE ed.student_id = ANY(p_student_ids)
+        ),
+        upserted AS (
+            INSERT INTO student_checkin_profiles (
+                student_id, student_name, device_number, room_number, center_name,
+                exam_id, exam_date, exam_start_time, exam_end_time,
+                course_name, college_name, major_name, level_name, semester_name, academic_year,
+                vector, encoder_version, refreshed_at
+            )
+            SELECT fresh.*, CURRENT_TIMESTAMP FROM fresh
+            ON CONFLICT (student_id) DO UPDATE SET
+                student_name = EXCLUDED.student_name,
+                device_number = EXCLUDED.device_number,
+                room_number = EXCLUDED.room_number,
+                center_name = EXCLUDED.center_name,
+                exam_id = EXCLUDED.exam_id,
+                exam_date = EXCLUDED.exam_date,
+                exam_start_time = EXCLUDED.exam_start_time,
+                exam_end_time = EXCLUDED.exam_end_time,
+                course_name = EXCLUDED.course_name,
+                college_name = EXCLUDED.college_name,
+                major_name = EXCLUDED.major_name,
+                level_name = EXCLUDED.level_name,
+                semester_name = EXCLUDED.semester_name,
+                academic_year = EXCLUDED.academic_year,
+                vector = EXCLUDED.vector,
+                encoder_version = EXCLUDED.encoder_version,
+                refreshed_at = EXCLUDED.refreshed_at
+            RETURNING student_id
+        )
+        -- الطلاب الذين لم يعد لهم توزيع كامل (حذف التوزيع أو الجهاز أو الاختبار)
+        DELETE FROM student_checkin_profiles p
+        WHERE p.student_id = ANY(p_student_ids)
+          AND p.student_id NOT IN (SELECT student_id FROM upserted);
+    $$ LANGUAGE sql;
+    """
+
+    # exam_distribution و student_vectors: التغيير يخص الطلاب أنفسهم
+    # trigger على مستوى الجملة: الإدخال الجماعي (COPY + upsert) أو التبديل يعيد البناء مرة واحدة
+    query_student_trigger_function = """
+    CREATE OR REPLACE FUNCTION checkin_profiles_on_student_change()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        ids TEXT[] := '{}';
+    BEGIN
+        IF TG_OP = 'UPDATE' AND TG_TABLE_NAME = 'student_vectors' THEN
+            -- تحديث متجه الظل وحده لا يغيّر نموذج القراءة
+            ids := ARRAY(
+                SELECT unnest(ARRAY[o.student_id::TEXT, n.student_id::TEXT])
+                FROM new_rows n
+                JOIN old_rows o ON o.id = n.id
+                WHERE n.vector IS DISTINCT FROM o.vector
+                   OR n.encoder_version IS DISTINCT FROM o.encoder_version
+                   OR n.student_id IS DISTINCT FROM o.student_id
+            );
+        ELSE
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                ids := ids || ARRAY(SELECT DISTINCT student_id::TEXT FROM old_rows);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                ids := ids || ARRAY(SELECT DISTINCT student_id::TEXT FROM new_rows);
+            END IF;
+        END IF;
+        IF cardinality(ids) > 0 THEN
+            PERFORM refresh_student_checkin_profiles(ids);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    # Exams والجداول المرجعية: TG_ARGV[0] هو عمود الربط في Exams (exam_id, course_id, ...)
+    query_exam_trigger_function = """
+    CREATE OR REPLACE FUNCTION checkin_profiles_on_exam_change()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        ids TEXT[];
+    BEGIN
+        EXECUTE format(
+            'SELECT ARRAY(SELECT ed.student_id FROM exam_distribution ed '
+            'JOIN Exams e ON e.exam_id = ed.exam_id WHERE e.%I = $1)',
+            TG_ARGV[0]
+        ) INTO ids USING (to_jsonb(NEW) ->> TG_ARGV[0])::INTEGER;
+        PERFORM refresh_student_checkin_profiles(ids);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    # devices و exam_centers: TG_ARGV[0] هو عمود الربط في devices (id أو center_id)
+    query_device_trigger_function = """
+    CREATE OR REPLACE FUNCTION checkin_profiles_on_device_change()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        ids TEXT[];
+    BEGIN
+        EXECUTE format(
+            'SELECT ARRAY(SELECT ed.student_id FROM exam_distribution ed '
+            'JOIN devices d ON d.id = ed.device_id WHERE d.%I = $1)',
+            TG_ARGV[0]
+        ) INTO ids USING NEW.id;
+        PERFORM refresh_student_checkin_profiles(ids);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    # جداول الانتقال (transition tables) تتطلب trigger لكل عملية ولا تقبل قائمة أعمدة
+    query_student_triggers = "\n".join(
+        f"""
+        DROP TRIGGER IF EXISTS trg_checkin_profiles_{name} ON {table};
+
+        CREATE OR REPLACE TRIGGER trg_checkin_profiles_{name}_insert
+        AFTER INSERT ON {table}
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION checkin_profiles_on_student_change();
+
+        CREATE OR REPLACE TRIGGER trg_checkin_profiles_{name}_update
+        AFTER UPDATE ON {table}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION checkin_profiles_on_student_change();
+
+        CREATE OR REPLACE TRIGGER trg_checkin_profiles_{name}_delete
+        AFTER DELETE ON {table}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION checkin_profiles_on_student_change();
+        """
+        for name, table in (("distribution", "exam_distribution"), ("vectors", "student_vectors"))
+    )
+
+    query_triggers = """
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_exams
+    AFTER UPDATE ON Exams
+    FOR EACH ROW WHEN (OLD IS DISTINCT FROM NEW)
+    EXECUTE FUNCTION checkin_profiles_on_exam_change('exam_id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_courses
+    AFTER UPDATE OF name ON Courses
+    FOR EACH ROW EXECUTE FUNCTION checkin_profiles_on_exam_change('course_id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_colleges
+    AFTER UPDATE OF name ON Colleges
+    FOR EACH ROW EXECUTE FUNCTION checkin_profiles_on_exam_change('college_id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_majors
+    AFTER UPDATE OF name ON Majors
+    FOR EACH ROW EXECUTE FUNCTION checkin_profiles_on_exam_change('major_id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_levels
+    AFTER UPDATE OF level_name ON Levels
+    FOR EACH ROW EXECUTE FUNCTION checkin_profiles_on_exam_change('level_id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_semesters
+    AFTER UPDATE OF semester_name ON Semesters
+    FOR EACH ROW EXECUTE FUNCTION checkin_profiles_on_exam_change('semester_id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_years
+    AFTER UPDATE OF year_name ON Academic_Years
+    FOR EACH ROW EXECUTE FUNCTION checkin_profiles_on_exam_change('year_id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_devices
+    AFTER UPDATE ON devices
+    FOR EACH ROW WHEN (OLD.device_number IS DISTINCT FROM NEW.device_number
+                       OR OLD.room_number IS DISTINCT FROM NEW.room_number
+                       OR OLD.center_id IS DISTINCT FROM NEW.center_id)
+    EXECUTE FUNCTION checkin_profiles_on_device_change('id');
+
+    CREATE OR REPLACE TRIGGER trg_checkin_profiles_centers
+    AFTER UPDATE OF center_name ON exam_centers
+    FOR EACH ROW EXECUTE FUNCTION checkin_profiles_on_device_change('center_id');
+    """
+
+    # تعبئة أولية لكل الطلاب الموزعين
+    query_backfill = """
+    SELECT refresh_student_checkin_profiles(ARRAY(SELECT student_id FROM exam_distribution));
+    """
+
+    try:
+        execute_query(DB_URL, query_create_profiles)
+        print("Table 'student_checkin_profiles' created successfully.")
+
+        execute_query(DB_URL, query_refresh_function)
+        execute_query(DB_URL, query_student_trigger_function)
+        execute_query(DB_URL, query_exam_trigger_function)
+        execute_query(DB_URL, query_device_trigger_function)
+        execute_query(DB_URL, query_student_triggers)
+        execute_query(DB_URL, query_triggers)
+        print("Check-in profile triggers created successfully.")
+
+        execute_query(DB_URL, query_backfill)
+        print("Check-in profiles backfilled successfully.")
+    except Exception as e:
+        print(f"Error creating student check-in profiles: {e}")
+        raise
+
+def create_model_config_versioning():
+    """
+    رقم نسخة متزايد (version) لإعدادات النموذج: كل تعديل يأخذ رقمًا جديدًا من sequence
+    والإعدادات النشطة هي صاحبة أكبر رقم
+    """
+    query_versioning = """
+    CREATE SEQUENCE IF NOT EXISTS model_config_version_seq;
+
+    ALTER TABLE model_config
+        ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('model_config_version_seq');
+
+    CREATE INDEX IF NOT EXISTS idx_model_config_version ON model_config (version);
+
+    -- نفس دالة updated_at مع رفع رقم النسخة في كل UPDATE
+    CREATE OR REPLACE FUNCTION update_model_config_timestamp()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_at = NOW();
+        NEW.version = nextval('model_config_version_seq');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    try:
+        execute_query(DB_URL, query_versioning)
+        print("Column 'version' added to 'model_config' successfully.")
+    except Exception as e:
+        print(f"Error adding model_config versioning: {e}")
+        raise
+
+def create_device_token_notifications():
+    """
+    إشعار (NOTIFY) عند تعديل أو حذف جهاز حتى تُخلي كل عمليات السيرفر توكن الجهاز من الكاش فورًا
+    """
+    query_notify_function = """
+    CREATE OR REPLACE FUNCTION notify_device_token_change()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM pg_notify('device_tokens_changed', OLD.id::TEXT);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    query_notify_trigger = """
+    CREATE OR REPLACE TRIGGER trg_devices_token_notify
+    AFTER UPDATE OR DELETE ON devices
+    FOR EACH ROW EXECUTE FUNCTION notify_device_token_change();
+    """
+
+    try:
+        execute_query(DB_URL, query_notify_function)
+        execute_query(DB_URL, query_notify_trigger)
+        print("Device token notification trigger created successfully.")
+    except Exception as e:
+        print(f"Error creating device token notifications: {e}")
+        raise
+
+def create_exam_roster_snapshots():
+    """
+    كشوف الحضور المحسوبة مسبقًا لكل اختبار (ترقيم المقاعد داخل كل غرفة)
+    exam_roster_snapshots marks an exam whose rows in exam_roster_rows are current.
+    Any change to exam_distribution (or to a device/center used by the exam) removes
+    that mark; the next report rebuilds the rows. Rebuild and invalidation take the
+    same per-exam advisory lock, so a rebuild never publishes rows older than a write.
+    """
+    query_create_rows = """
+    CREATE TABLE IF NOT EXISTS exam_roster_rows (
+        exam_id INT NOT NULL REFERENCES Exams(exam_id) ON DELETE CASCADE,
+        center_name VARCHAR(100) NOT NULL,
+        room_number VARCHAR(50) NOT NULL,
+        seat_number INT NOT NULL,
+        device_number INT NOT NULL,
+        student_id VARCHAR(50) NOT NULL,
+        student_name VARCHAR(100) NOT NULL,
+        PRIMARY KEY (exam_id, center_name, room_number, seat_number)
+    );
+    """
+
+    query_create_snapshots = """
+    CREATE TABLE IF NOT EXISTS exam_roster_snapshots (
+        exam_id INT PRIMARY KEY REFERENCES Exams(exam_id) ON DELETE CASCADE,
+        student_count INT NOT NULL,
+        room_count INT NOT NULL,
+        built_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    query_invalidate_function = """
+    CREATE OR REPLACE FUNCTION invalidate_exam_rosters(exam_ids INT[])
+    RETURNS VOID AS $$
+    DECLARE
+        target_exam INT;
+    BEGIN
+        -- الأقفال بترتيب ثابت لتجنب الـ deadlock
+        FOR target_exam IN
+            SELECT DISTINCT id FROM unnest(exam_ids) AS ids(id) WHERE id IS NOT NULL ORDER BY id
+        LOOP
+            PERFORM pg_advisory_xact_lock(hashtext('exam_roster'), target_exam);
+        END LOOP;
+        DELETE FROM exam_roster_snapshots WHERE exam_id = ANY(exam_ids);
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    query_distribution_function = """
+    CREATE OR REPLACE FUNCTION exam_rosters_on_distribution_change()
+    RETURNS TRIGGER AS $$
+    DECLARE
+        exam_ids INT[] := '{}';
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            exam_ids := exam_ids || ARRAY(SELECT DISTINCT exam_id FROM old_rows);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            exam_ids := exam_ids || ARRAY(SELECT DISTINCT exam_id FROM new_rows);
+        END IF;
+        PERFORM invalidate_exam_rosters(exam_ids);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    # trigger على مستوى الجملة: التوزيع الجماعي يبطل كل اختبار مرة واحدة
+    query_distribution_triggers = [
+        """
+        CREATE OR REPLACE TRIGGER trg_exam_rosters_distribution_insert
+        AFTER INSERT ON exam_distribution
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION exam_rosters_on_distribution_change();
+        """,
+        """
+        CREATE OR REPLACE TRIGGER trg_exam_rosters_distribution_update
+        AFTER UPDATE ON exam_distribution
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION exam_rosters_on_distribution_change();
+        """,
+        """
+        CREATE OR REPLACE TRIGGER trg_exam_rosters_distribution_delete
+        AFTER DELETE ON exam_distribution
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION exam_rosters_on_distribution_change();
+        """
+    ]
+
+    # حذف جهاز يمر عبر ON DELETE SET NULL على exam_distribution فيكفيه trigger التوزيع
+    query_device_function = """
+    CREATE OR REPLACE FUNCTION exam_rosters_on_device_change()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM invalidate_exam_rosters(ARRAY(
+            SELECT DISTINCT exam_id FROM exam_distribution WHERE device_id = NEW.id
+        ));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    query_device_trigger = """
+    CREATE OR REPLACE TRIGGER trg_exam_rosters_device_update
+    AFTER UPDATE OF device_number, room_number, center_id ON devices
+    FOR EACH ROW EXECUTE FUNCTION exam_rosters_on_device_change();
+    """
+
+    query_center_function = """
+    CREATE OR REPLACE FUNCTION exam_rosters_on_center_change()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM invalidate_exam_rosters(ARRAY(
+            SELECT DISTINCT ed.exam_id
+            FROM exam_distribution ed
+            JOIN devices d ON d.id = ed.device_id
+            WHERE d.center_id = NEW.id
+        ));
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+    query_center_trigger = """
+    CREATE OR REPLACE TRIGGER trg_exam_rosters_center_update
+    AFTER UPDATE OF center_name ON exam_centers
+    FOR EACH ROW EXECUTE FUNCTION exam_rosters_on_center_change();
+    """
+
+    try:
+        execute_query(DB_URL, query_create_rows)
+        execute_query(DB_URL, query_create_snapshots)
+        print("Tables 'exam_roster_rows' and 'exam_roster_snapshots' created successfully.")
+
+        execute_query(DB_URL, query_invalidate_function)
+        execute_query(DB_URL, query_distribution_function)
+        for query in query_distribution_triggers:
+            execute_query(DB_URL, query)
+        execute_query(DB_URL, query_device_function)
+        execute_query(DB_URL, query_device_trigger)
+        execute_query(DB_URL, query_center_function)
+        execute_query(DB_URL, query_center_trigger)
+        print("Exam roster invalidation triggers created successfully.")
+    except Exception as e:
+        print(f"Error creating exam roster snapshots: {e}")
+        raise
+
+def create_background_jobs_table():
+    """
+    حالة المهام الخلفية المشتركة بين عمليات الخادم
+    A job started in one worker is polled through any other worker, so its
+    progress and result are kept here as well as in the process that runs it.
+    """
+    query = """
+    CREATE TABLE IF NOT EXISTS background_jobs (
+        id VARCHAR(36) PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        progress JSONB NOT NULL DEFAULT '{}'::jsonb,
+        result JSONB,
+        error TEXT,
+        started_at TIMESTAMP NOT NULL,
+        finished_at TIMESTAMP,
+        heartbeat_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    ALTER TABLE background_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+    CREATE INDEX IF NOT EXISTS idx_background_jobs_running ON background_jobs (name) WHERE status = 'running';
+    CREATE INDEX IF NOT EXISTS idx_background_jobs_finished_at ON background_jobs (finished_at);
+    """
+    try:
+        execute_query(DB_URL, query)
+        print("Table 'background_jobs' created successfully.")
+    except Exception as e:
+        print(f"Error creating background_jobs table: {e}")
+        raise
+
+# خطوات الإعداد بعد model_config بالترتيب؛ كل خطوة قابلة لإعادة التشغيل (IF NOT EXISTS / OR REPLACE)
+# أي خطوة جديدة تُضاف هنا بدل تعديل __main__
+SETUP_STEPS = (
+    create_encoder_versioning,
+    create_students_table,
+    create_student_checkin_profiles,
+    create_model_config_versioning,
+    create_device_token_notifications,
+    create_exam_roster_snapshots,
+    create_background_jobs_table,
+)
+
+def run_setup_steps():
+    for step in SETUP_STEPS:
+        step()
+
 def drop_table(table_name: str):
     """
     حذف الجدول المطلوب من قاعدة البيانات.
@@ -657,3 +1228,4 @@ if __name__ == "__main__":
     drop_table("model_config")
     create_model_config_table()
     seed_default_model_config()
+    run_setup_steps()
@@ -1,11 +1,65 @@
+import os
+import json
 import sqlite3
+import threading
 
 class Student:
     table_name = 'students'
     #db_name=":memory:"
+
+    # إعدادات SQLite لاتصال دائم لكل thread
+    CACHED_STATEMENTS = 256  # الاستعلامات المترجمة المحفوظة لكل اتصال
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",  # القراءة لا تنتظر الكتابة
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA mmap_size=268435456",  # 256MB
+        "PRAGMA cache_size=-65536",  # 64MB
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000"
+    )
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, db_name="database/students.db"):
+        # نسخة واحدة لكل ملف قاعدة بيانات (singleton)
+        with cls._instances_lock:
+            instance = cls._instances.get(db_name)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                cls._instances[db_name] = instance
+            return instance
+
     def __init__(self, db_name="database/students.db"):
-        self.db_name = db_name
-        self.create_table()
+        if self._initialized:
+            return
+        with self._instances_lock:
+            if self._initialized:
+                return
+            self.db_name = db_name
+            self._local = threading.local()
+            self.create_table()
+            self._initialized = True
+
+    def get_connection(self):
+        """Persistent connection of the current thread (recreated after a fork)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self.db_name, cached_statements=self.CACHED_STATEMENTS)
+        for pragma in self.PRAGMAS:
+            connection.execute(pragma)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def close_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local.connection = None
 
     def create_table(self):
         query = """
@@ -25,33 +79,18 @@ class Student:
 
     def execute_query(self, query, params=()):
         try:
-            connection = sqlite3.connect(self.db_name)
-            cursor = connection.cursor()
-            cursor.execute(query, params)
-            connection.commit()
+            connection = self.get_connection()
+            with connection:  # commit أو rollback تلقائي
+                connection.execute(query, params)
         except sqlite3.IntegrityError as e:
             print(f"Integrity Error: {e}")
         except sqlite3.OperationalError as e:
             print(f"Operational Error: {e}")
         except Exception as e:
             print(f"Unexpected Error: {e}")
-        finally:
-            connection.close()
 
     def execute_read_query(self, query, params=()):
-        try:
-            connection = sqlite3.connect(self.db_name)
-            cursor = connection.cursor()
-            cursor.execute(query, params)
-            result = cursor.fetchall()
-            return result
-        except sqlite3.OperationalError as e:
-            print(f"Operational Error: {e}")
-        except Exception as e:
-            print(f"Unexpected Error: {e}")
-            return None
-        finally:
-            connection.close()
+        return self.get_connection().execute(query, params).fetchall()
 
     def create(self, **kwargs):
         try:
@@ -124,15 +163,6 @@ class Student:
             return False
 
 
-    def execute_read_query(self, query, params=()):
-        connection = sqlite3.connect(self.db_name)
-        cursor = connection.cursor()
-        cursor.execute(query, params)
-        result = cursor.fetchall()
-        connection.close()
-        return result
-    
-
     def find_by_number(self, number):
         """البحث عن طالب باستخدام رقم القيد"""
         query = f"SELECT * FROM {self.table_name} WHERE Number = ?"
@@ -158,11 +188,60 @@ class Student:
         Retrieve student data based on a list of IDs.
         """
         try:
-            # بناء الاستعلام باستخدام IN
-            placeholders = ', '.join(['?'] * len(ids))
-            query = f"SELECT StudentID,Number,StudentName,Gender,Level,Specialization,College, ImagePath FROM {self.table_name} WHERE Number IN ({placeholders})"
-            return self.execute_read_query(query, tuple(ids))
+            return list(self.iter_students_by_numbers(ids))
         except Exception as e:
             print(f"Error while fetching students by IDs: {e}")
             return []
 
+    BULK_COLUMNS = ("StudentName", "Number", "College", "Level", "Specialization", "Gender", "ImagePath")
+
+    def bulk_create(self, rows):
+        """
+        Insert many students in one transaction; rows are tuples in BULK_COLUMNS order.
+        Rows that can't be stored (existing or repeated number, CHECK/NOT NULL violation)
+        are skipped. Returns the numbers actually inserted.
+        """
+        if not rows:
+            return []
+        query = f"""
+        INSERT OR IGNORE INTO {self.table_name} ({', '.join(self.BULK_COLUMNS)})
+        VALUES ({', '.join(['?'] * len(self.BULK_COLUMNS))})
+        """
+        inserted = []
+        connection = self.get_connection()
+        with connection:  # كل الصفوف في transaction واحدة
+            cursor = connection.cursor()
+            for row in rows:
+                # OR IGNORE يتجاوز الصف بصمت، فعدد الصفوف المتأثرة هو المرجع الوحيد
+                cursor.execute(query, row)
+                if cursor.rowcount == 1:
+                    inserted.append(row[1])
+        return inserted
+
+    ITER_BATCH_SIZE = 500
+
+    def iter_students_by_numbers(self, numbers):
+        """
+        Yield student rows for any number of enrollment numbers, in input order.
+        Each batch of numbers is passed as one JSON array and joined through json_each,
+        so there is no placeholder-per-ID limit and the lookup uses the Number index.
+        A batch is fully fetched before it is yielded: no cursor (read snapshot) stays
+        open while the caller works, which would block WAL checkpoints.
+        """
+        query = f"""
+        SELECT s.StudentID, s.Number, s.StudentName, s.Gender, s.Level,
+               s.Specialization, s.College, s.ImagePath
+        FROM (
+            SELECT CAST(value AS TEXT) AS number, MIN(key) AS position
+            FROM json_each(?)
+            GROUP BY number
+        ) AS ids
+        JOIN {self.table_name} s ON s.Number = ids.number
+        ORDER BY ids.position
+        """
+        numbers = list(dict.fromkeys(str(n) for n in numbers))
+        for start in range(0, len(numbers), self.ITER_BATCH_SIZE):
+            batch = numbers[start:start + self.ITER_BATCH_SIZE]
+            rows = self.get_connection().execute(query, (json.dumps(batch),)).fetchall()
+            yield from rows
+
@@ -0,0 +1,220 @@
+# database/students_pg.py
+# نسخة Postgres من database/students.py بنفس الواجهة ونفس ترتيب الأعمدة في الصفوف (tuples)
+import threading
+from psycopg import errors, sql
+from psycopg.rows import tuple_row
+from database.connection import get_db_connection
+
+
+class PgStudent:
+    table_name = 'students'
+
+    # الأعمدة المسموح استخدامها في create/update/filters (أسماء Postgres بأحرف صغيرة)
+    COLUMNS = (
+        "studentid", "studentname", "number", "college", "level",
+        "specialization", "gender", "imagepath", "createdat"
+    )
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        # نسخة واحدة؛ الاتصالات نفسها تأتي من الـ pool المشترك
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance.check_table()
+                cls._instance = instance
+            return cls._instance
+
+    def check_table(self):
+        """
+        Fail at startup when the students table was never created: execute_query
+        swallows errors, so a missing table would otherwise look like an empty store.
+        """
+        if self.execute_read_query("SELECT to_regclass(%s)", (self.table_name,))[0][0] is None:
+            raise RuntimeError(
+                "Postgres table 'students' does not exist. Run database/setup_db_vectors.py and "
+                "python -m database.migrate_students_to_pg, or set STUDENTS_BACKEND=sqlite."
+            )
+
+    def _identifier(self, key):
+        column = key.lower()
+        if column not in self.COLUMNS:
+            raise ValueError(f"Unknown student column: {key}")
+        return sql.Identifier(column)
+
+    def _conditions(self, filters, separator=" AND "):
+        return sql.SQL(separator).join(
+            sql.SQL("{} = %s").format(self._identifier(key)) for key in filters
+        )
+
+    def create_table(self):
+        """الجدول يُنشأ من database/setup_db_vectors.create_students_table()"""
+        from database.setup_db_vectors import create_students_table
+        create_students_table()
+
+    def execute_query(self, query, params=()):
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    conn.commit()
+                    return cursor.rowcount
+        except errors.IntegrityError as e:
+            print(f"Integrity Error: {e}")
+        except errors.OperationalError as e:
+            print(f"Operational Error: {e}")
+        except Exception as e:
+            print(f"Unexpected Error: {e}")
+        return 0
+
+    def execute_read_query(self, query, params=()):
+        with get_db_connection() as conn:
+            with conn.cursor(row_factory=tuple_row) as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+    def create(self, **kwargs):
+        try:
+            query = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+                sql.Identifier(self.table_name),
+                sql.SQL(", ").join(self._identifier(key) for key in kwargs),
+                sql.SQL(", ").join(sql.Placeholder() * len(kwargs))
+            )
+            self.execute_query(query, tuple(kwargs.values()))
+            print("Student added successfully.")
+        except Exception as e:
+            print(f"Unexpected Error: {e}")
+
+    def all(self, **filters):
+        try:
+            query = sql.SQL("SELECT * FROM {}").format(sql.Identifier(self.table_name))
+            if filters:
+                query += sql.SQL(" WHERE ") + self._conditions(filters)
+                return self.execute_read_query(query, tuple(filters.values()))
+            return self.execute_read_query(query)
+        except Exception as e:
+            print(f"Error while fetching data: {e}")
+            return []
+
+    def first(self, **filters):
+        result = self.all(**filters)
+        return result[0] if result else None
+
+    def last(self, **filters):
+        result = self.all(**filters)
+        return result[-1] if result else None
+
+    def update(self, identifier, **kwargs):
+        try:
+            query = sql.SQL("UPDATE {} SET {} WHERE studentid = %s").format(
+                sql.Identifier(self.table_name), self._conditions(kwargs, ", ")
+            )
+            self.execute_query(query, tuple(kwargs.values()) + (identifier,))
+            print(f"Student with ID {identifier} updated successfully.")
+        except Exception as e:
+            print(f"Error while updating: {e}")
+
+    def delete(self, **kwargs):
+        try:
+            query = sql.SQL("DELETE FROM {} WHERE {}").format(
+                sql.Identifier(self.table_name), self._conditions(kwargs)
+            )
+            self.execute_query(query, tuple(kwargs.values()))
+            print("Student deleted successfully.")
+        except Exception as e:
+            print(f"Error while deleting: {e}")
+
+    def exists(self, **kwargs):
+        try:
+            query = sql.SQL("SELECT EXISTS (SELECT 1 FROM {} WHERE {})").format(
+                sql.Identifier(self.table_name), self._conditions(kwargs)
+            )
+            return self.execute_read_query(query, tuple(kwargs.values()))[0][0]
+        except Exception as e:
+            print(f"Error while checking existence: {e}")
+            return False
+
+    def find_by_number(self, number):
+        """البحث عن طالب باستخدام رقم القيد"""
+        query = f"SELECT * FROM {self.table_name} WHERE Number = %s"
+        result = self.execute_read_query(query, (str(number),))
+        return result[0] if result else None
+
+    def find_by_name(self, name):
+        """البحث عن طالب باستخدام الاسم (LIKE في SQLite لا يفرّق بين الأحرف الكبيرة والصغيرة)"""
+        query = f"SELECT * FROM {self.table_name} WHERE StudentName ILIKE %s"
+        return self.execute_read_query(query, (f"%{name}%",))
+
+    def get_student_info_by_number(self, number):
+        """
+        Retrieve the enrollment number, college, and image path of a student based on their enrollment number.
+        """
+        query = f"SELECT Number, College, ImagePath FROM {self.table_name} WHERE Number = %s"
+        result = self.execute_read_query(query, (str(number),))
+        return result[0] if result else None
+
+    def fetch_students_info_by_ids(self, ids):
+        """
+        Retrieve student data based on a list of IDs.
+        """
+        try:
+            return list(self.iter_students_by_numbers(ids))
+        except Exception as e:
+            print(f"Error while fetching students by IDs: {e}")
+            return []
+
+    BULK_COLUMNS = ("StudentName", "Number", "College", "Level", "Specialization", "Gender", "ImagePath")
+
+    def bulk_create(self, rows):
+        """
+        Insert many students with COPY + one INSERT ... ON CONFLICT; rows are tuples in
+        BULK_COLUMNS order. Numbers that already exist are skipped. Returns the numbers inserted.
+        """
+        if not rows:
+            return []
+        columns = ", ".join(self.BULK_COLUMNS)
+        with get_db_connection() as conn:
+            with conn.cursor(row_factory=tuple_row) as cursor:
+                cursor.execute(
+                    f"CREATE TEMP TABLE students_bulk_staging (LIKE {self.table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                with cursor.copy(f"COPY students_bulk_staging ({columns}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                cursor.execute(f"""
+                    INSERT INTO {self.table_name} ({columns})
+                    SELECT {columns} FROM students_bulk_staging
+                    ON CONFLICT (Number) DO NOTHING
+                    RETURNING Number
+                """)
+                inserted = [row[0] for row in cursor.fetchall()]
+                conn.commit()
+                return inserted
+
+    ITER_BATCH_SIZE = 500
+
+    def iter_students_by_numbers(self, numbers):
+        """
+        Yield student rows for any number of enrollment numbers, in input order.
+        Each batch of numbers is sent as one text[] parameter and joined through unnest,
+        the Postgres counterpart of the json_each join in database/students.py.
+        A batch is fetched and its pooled connection returned before the rows are
+        yielded, so no connection sits idle in a transaction while the caller works.
+        """
+        query = f"""
+        SELECT s.StudentID, s.Number, s.StudentName, s.Gender, s.Level,
+               s.Specialization, s.College, s.ImagePath
+        FROM (
+            SELECT number, MIN(position) AS position
+            FROM unnest(%s::text[]) WITH ORDINALITY AS ids(number, position)
+            GROUP BY number
+        ) AS ids
+        JOIN {self.table_name} s ON s.Number = ids.number
+        ORDER BY ids.position
+        """
+        numbers = list(dict.fromkeys(str(n) for n in numbers))
+        for start in range(0, len(numbers), self.ITER_BATCH_SIZE):
+            rows = self.execute_read_query(query, (numbers[start:start + self.ITER_BATCH_SIZE],))
+            yield from rows
@@ -157,10 +157,10 @@ class UsersRepository:
 #             conn.close()
 
 #     def search_users_by_username(self, username):
-        conn = get_db_connection()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM users WHERE username ILIKE %s;", (f"%{username}%",))
-                return cur.fetchall()
-        finally:
-            conn.close()
\ No newline at end of file
+#         conn = get_db_connection()
+#         try:
+#             with conn.cursor() as cur:
+#                 cur.execute("SELECT * FROM users WHERE username ILIKE %s;", (f"%{username}%",))
+#                 return cur.fetchall()
+#         finally:
+#             conn.close()
\ No newline at end of file
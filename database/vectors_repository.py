@@ -1,53 +1,265 @@
 # Step 2: Repository for student_vectors table (vectors_repository.py)
 # Located in database/vectors_repository.py
 from database.connection import get_db_connection
+from database import prepared_statements
+
+
+class StaleEncoderVersionError(ValueError):
+    """The vector was encoded with a version that is no longer active (cutover in another worker)."""
+
+    def __init__(self, encoder_version, active_version):
+        super().__init__(
+            f"Encoder version '{encoder_version}' is no longer active (active: '{active_version}')."
+        )
+        self.encoder_version = encoder_version
+        self.active_version = active_version
+
 
 class VectorsRepository:
 
-    def insert_vector(self, student_id, college, vector):
+    # الاستعلامات المتكررة في مسار البحث والتحقق (تُجهّز على الخادم)
+    GET_BY_STUDENT_ID = prepared_statements.register("vectors.get_by_student_id", """
+    SELECT id, student_id, college, vector, encoder_version, created_at
+    FROM student_vectors WHERE student_id = %s;
+    """)
+
+    SEARCH_SIMILAR = prepared_statements.register("vectors.search_similar", """
+    SELECT id,student_id,college,created_at,   (1 - (vector <-> %s::vector)) * 100 AS similarity
+    FROM student_vectors
+    WHERE (vector <-> %s::vector) <= %s
+    ORDER BY similarity DESC
+    LIMIT %s;
+    """)
+
+    SEARCH_IN_EXAM = prepared_statements.register("vectors.search_in_exam", """
+    SELECT sv.id, sv.student_id, sv.college, sv.created_at,
+           ed.student_name, d.device_number, d.room_number,
+           (1 - (sv.vector <-> %s::vector)) * 100 AS similarity
+    FROM student_vectors sv
+    JOIN exam_distribution ed ON ed.student_id = sv.student_id
+    LEFT JOIN devices d ON ed.device_id = d.id
+    WHERE ed.exam_id = %s
+      AND (%s::text IS NULL OR sv.student_id <> %s::text)
+      AND (sv.vector <-> %s::vector) <= %s
+    ORDER BY similarity DESC
+    LIMIT %s;
+    """)
+
+    # نسخة المُرمّز النشطة تُستخدم عندما لا يحدد المستدعي نسخة
+    ACTIVE_VERSION_SQL = "COALESCE(%s, (SELECT active_version FROM encoder_settings WHERE id = 1))"
+
+    @staticmethod
+    def _check_encoder_version(cursor, encoder_version):
+        """
+        Reject a vector encoded with a retired version. FOR SHARE holds the settings row
+        until commit, so a cutover (FOR UPDATE) can't slip in between the check and the write.
+        """
+        cursor.execute("SELECT active_version FROM encoder_settings WHERE id = 1 FOR SHARE;")
+        row = cursor.fetchone()
+        if encoder_version and row and row["active_version"] != encoder_version:
+            raise StaleEncoderVersionError(encoder_version, row["active_version"])
+
+    def insert_vector(self, student_id, college, vector, encoder_version=None):
         try:
-            query = """
-            INSERT INTO student_vectors (student_id, college, vector)
-            VALUES (%s, %s, %s) RETURNING id;
+            query = f"""
+            INSERT INTO student_vectors (student_id, college, vector, encoder_version)
+            VALUES (%s, %s, %s, {self.ACTIVE_VERSION_SQL}) RETURNING id;
             """
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (student_id, college, vector))
+                    self._check_encoder_version(cursor, encoder_version)
+                    cursor.execute(query, (student_id, college, vector, encoder_version))
                     return cursor.fetchone()["id"]
         except Exception as e:
             print("Error inserting vector:", e)
             raise
 
-    def update_vector_by_id(self, vector_id, vector):
+    def bulk_upsert_vectors(self, rows, encoder_version=None):
+        """
+        Insert or replace many vectors at once: rows of (student_id, college, vector) are
+        COPYed into a staging table and merged with one INSERT ... ON CONFLICT (student_id).
+        A replaced vector drops its shadow vector like update_vector_by_student_id.
+        """
+        if not rows:
+            return 0
         try:
-            query = """
-            UPDATE student_vectors
-            SET  vector = %s
-            WHERE id = %s;
+            query = f"""
+            INSERT INTO student_vectors (student_id, college, vector, encoder_version)
+            SELECT student_id, college, vector, {self.ACTIVE_VERSION_SQL}
+            FROM student_vectors_staging
+            ON CONFLICT (student_id) DO UPDATE SET
+                college = EXCLUDED.college,
+                vector = EXCLUDED.vector,
+                encoder_version = EXCLUDED.encoder_version,
+                vector_next = NULL,
+                vector_next_version = NULL;
             """
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (vector, vector_id))
+                    self._check_encoder_version(cursor, encoder_version)
+                    cursor.execute("""
+                    CREATE TEMP TABLE student_vectors_staging (
+                        student_id VARCHAR(50) NOT NULL,
+                        college VARCHAR(100) NOT NULL,
+                        vector vector(128) NOT NULL
+                    ) ON COMMIT DROP;
+                    """)
+                    with cursor.copy("COPY student_vectors_staging (student_id, college, vector) FROM STDIN") as copy:
+                        for student_id, college, vector in rows:
+                            copy.write_row((student_id, college, "[" + ",".join(str(float(x)) for x in vector) + "]"))
+                    cursor.execute(query, (encoder_version,))
                     return cursor.rowcount
+        except Exception as e:
+            print("Error bulk upserting vectors:", e)
+            raise
+
+    def bulk_update_vectors(self, rows, encoder_version=None):
+        """
+        Replace the vectors of existing students at once: rows of (student_id, vector) are
+        COPYed into a staging table and applied with one UPDATE. Students without a stored
+        vector are left out. Returns the student IDs that were updated.
+        """
+        if not rows:
+            return []
+        try:
+            query = f"""
+            UPDATE student_vectors sv
+            SET vector = st.vector, encoder_version = {self.ACTIVE_VERSION_SQL},
+                vector_next = NULL, vector_next_version = NULL
+            FROM student_vectors_update_staging st
+            WHERE sv.student_id = st.student_id
+            RETURNING sv.student_id;
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    self._check_encoder_version(cursor, encoder_version)
+                    cursor.execute("""
+                    CREATE TEMP TABLE student_vectors_update_staging (
+                        student_id VARCHAR(50) PRIMARY KEY,
+                        vector vector(128) NOT NULL
+                    ) ON COMMIT DROP;
+                    """)
+                    with cursor.copy("COPY student_vectors_update_staging (student_id, vector) FROM STDIN") as copy:
+                        for student_id, vector in rows:
+                            copy.write_row((student_id, "[" + ",".join(str(float(x)) for x in vector) + "]"))
+                    cursor.execute(query, (encoder_version,))
+                    return [row["student_id"] for row in cursor.fetchall()]
+        except Exception as e:
+            print("Error bulk updating vectors:", e)
+            raise
+
+    def update_vector_by_id(self, vector_id, vector, encoder_version=None):
+        """Returns the student_id of the updated row, or None when the vector ID does not exist."""
+        try:
+            # أي تحديث للمتجه الحالي يُبطل متجه الظل حتى يعيد الترميز الخلفي حسابه
+            query = f"""
+            UPDATE student_vectors
+            SET  vector = %s, encoder_version = {self.ACTIVE_VERSION_SQL},
+                 vector_next = NULL, vector_next_version = NULL
+            WHERE id = %s
+            RETURNING student_id;
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    self._check_encoder_version(cursor, encoder_version)
+                    cursor.execute(query, (vector, encoder_version, vector_id))
+                    row = cursor.fetchone()
+                    return row["student_id"] if row else None
         except Exception as e:
             print("Error updating vector:", e)
             raise
 
-    def update_vector2(self, student_id, college, vector):
+    def update_vector_by_student_id(self, student_id, vector, encoder_version=None):
         try:
-            query = """
+            query = f"""
+            UPDATE student_vectors
+            SET vector = %s, encoder_version = {self.ACTIVE_VERSION_SQL},
+                vector_next = NULL, vector_next_version = NULL
+            WHERE student_id = %s;
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    self._check_encoder_version(cursor, encoder_version)
+                    cursor.execute(query, (vector, encoder_version, student_id))
+                    return cursor.rowcount
+        except Exception as e:
+            print("Error updating vector by student ID:", e)
+            raise
+
+    def update_vector2(self, student_id, college, vector, encoder_version=None):
+        try:
+            query = f"""
             UPDATE student_vectors
-            SET college = %s, vector = %s
+            SET college = %s, vector = %s, encoder_version = {self.ACTIVE_VERSION_SQL},
+                vector_next = NULL, vector_next_version = NULL
             WHERE student_id = %s;
             """
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (college, vector, student_id))
+                    self._check_encoder_version(cursor, encoder_version)
+                    cursor.execute(query, (college, vector, encoder_version, student_id))
                     return cursor.rowcount
         except Exception as e:
             print("Error updating vector:", e)
             raise
 
+    def get_shadow_pending(self, target_version, limit=100, exclude_student_ids=None):
+        """
+        جلب المتجهات التي لم يُحسب لها متجه الظل بالنسخة المستهدفة بعد
+        The live vector is returned so the shadow write can detect a concurrent update.
+        """
+        try:
+            query = """
+            SELECT student_id, vector::text AS vector
+            FROM student_vectors
+            WHERE vector_next_version IS DISTINCT FROM %s
+              AND NOT (student_id = ANY(%s::text[]))
+            ORDER BY id
+            LIMIT %s;
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (target_version, exclude_student_ids or [], limit))
+                    return cursor.fetchall()
+        except Exception as e:
+            print("Error fetching pending shadow vectors:", e)
+            raise
+
+    def set_shadow_vector(self, student_id, live_vector, vector_next, target_version):
+        """
+        Store the shadow vector only if the live vector did not change meanwhile.
+        Returns 0 when the row was updated concurrently (it stays pending).
+        """
+        try:
+            query = """
+            UPDATE student_vectors
+            SET vector_next = %s, vector_next_version = %s
+            WHERE student_id = %s AND vector = %s::vector;
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (vector_next, target_version, student_id, live_vector))
+                    return cursor.rowcount
+        except Exception as e:
+            print("Error storing shadow vector:", e)
+            raise
+
+    def get_version_coverage(self, target_version):
+        try:
+            query = """
+            SELECT COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE vector_next_version = %s) AS covered,
+                   COUNT(*) FILTER (WHERE encoder_version = %s) AS active_rows
+            FROM student_vectors;
+            """
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (target_version, target_version))
+                    return cursor.fetchone()
+        except Exception as e:
+            print("Error fetching encoder coverage:", e)
+            raise
+
     def delete_vector(self, student_id):
         try:
             query = """
@@ -75,10 +287,9 @@ class VectorsRepository:
 
     def get_vector_by_student_id(self, student_id):
         try:
-            query = "SELECT * FROM student_vectors WHERE student_id = %s;"
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (student_id,))
+                    prepared_statements.execute(cursor, self.GET_BY_STUDENT_ID, (student_id,))
                     return cursor.fetchone()
         except Exception as e:
             print("Error fetching vector by student ID:", e)
@@ -89,16 +300,9 @@ class VectorsRepository:
         البحث عن متجهات مشابهة بناءً على التشابه
         """
         try: 
-            query = """
-            SELECT id,student_id,college,created_at,   (1 - (vector <-> %s::vector)) * 100 AS similarity
-            FROM student_vectors
-            WHERE (vector <-> %s::vector) <= %s
-            ORDER BY similarity DESC
-            LIMIT %s;
-            """
             with get_db_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(query, (vector, vector, threshold, limit))
+                    prepared_statements.execute(cursor, self.SEARCH_SIMILAR, (vector, vector, threshold, limit))
                     return cursor.fetchall()
         except Exception as e:
             print("Error searching similar vectors:", e)
@@ -125,6 +329,59 @@ class VectorsRepository:
             raise
 
 
+    def search_similar_vectors_in_exam(self, vector, exam_id, exclude_student_id=None, threshold=0.6, limit=3):
+        """
+        البحث عن متجهات مشابهة ضمن الطلاب الموزعين على نفس الاختبار
+        """
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    prepared_statements.execute(cursor, self.SEARCH_IN_EXAM, (
+                        vector, exam_id, exclude_student_id, exclude_student_id, vector, threshold, limit
+                    ))
+                    return cursor.fetchall()
+        except Exception as e:
+            print("Error searching similar vectors in exam:", e)
+            raise
+
+    def identify_faces_in_room(self, vectors, exam_id, center_id, room_number, threshold=0.6):
+        """
+        مطابقة عدة وجوه دفعة واحدة مع طلاب قاعة معينة في اختبار معين
+        Returns one row per probe vector (face_index) with the closest room student, or NULLs.
+        """
+        try:
+            query = """
+            WITH probes AS (
+                SELECT p.ord - 1 AS face_index, p.probe::vector AS probe
+                FROM unnest(%s::text[]) WITH ORDINALITY AS p(probe, ord)
+            ),
+            room_students AS (
+                SELECT ed.student_id, ed.student_name, d.device_number, sv.vector
+                FROM exam_distribution ed
+                JOIN devices d ON ed.device_id = d.id
+                JOIN student_vectors sv ON sv.student_id = ed.student_id
+                WHERE ed.exam_id = %s AND d.center_id = %s AND d.room_number = %s
+            )
+            SELECT pr.face_index, m.student_id, m.student_name, m.device_number,
+                   (1 - m.distance) * 100 AS similarity, m.distance
+            FROM probes pr
+            LEFT JOIN LATERAL (
+                SELECT rs.student_id, rs.student_name, rs.device_number, rs.vector <-> pr.probe AS distance
+                FROM room_students rs
+                ORDER BY rs.vector <-> pr.probe
+                LIMIT 1
+            ) m ON m.distance <= %s
+            ORDER BY pr.face_index;
+            """
+            probes = ["[" + ",".join(str(float(x)) for x in vector) + "]" for vector in vectors]
+            with get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, (probes, exam_id, center_id, room_number, threshold))
+                    return cursor.fetchall()
+        except Exception as e:
+            print("Error identifying faces in room:", e)
+            raise
+
     def search_similar_vectors_by_studen_id(self, vector, studen_id, threshold=0.8):
         """
         البحث عن متجهات مشابهة عبر رقم الطالب  
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.academic.academic_years_service import AcademicYearsService
+from routes.http_validators import conditional_json
 
 years_bp = Blueprint('academic_years', __name__, url_prefix='/api/academic/years')
 service = AcademicYearsService()
@@ -76,7 +77,7 @@ def create_year():
 def get_all_years():
     try:
         years = service.get_all_years()
-        return jsonify(years), 200
+        return conditional_json(years, service.cache.last_modified)
     except RuntimeError:
         return jsonify({'error': 'Service unavailable'}), 503
     except Exception:
@@ -102,7 +103,7 @@ def get_all_years():
 def get_year(year_id):
     try:
         year = service.get_year_by_id(year_id)
-        return jsonify(year), 200
+        return conditional_json(year, service.cache.last_modified)
     except ValueError:
         return jsonify({'error': 'Academic year not found'}), 404
     except RuntimeError:
@@ -2,6 +2,7 @@
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.academic.colleges_service import CollegesService
+from routes.http_validators import conditional_json
 
 colleges_bp = Blueprint('colleges', __name__, url_prefix='/api/academic/colleges')
 service = CollegesService()
@@ -105,7 +106,7 @@ def create_college():
 def get_colleges():
     try:
         colleges = service.get_all_colleges()
-        return jsonify(colleges), 200
+        return conditional_json(colleges, service.cache.last_modified)
     except Exception:
         return jsonify({'error': 'Server error'}), 500
 
@@ -154,7 +155,7 @@ def get_colleges():
 def get_college(college_id):
     try:
         college = service.get_college(college_id)
-        return jsonify(college), 200
+        return conditional_json(college, service.cache.last_modified)
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
     except Exception:
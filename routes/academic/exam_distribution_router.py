@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flasgger import swag_from
 from services.academic.exam_distribution_service import ExamDistributionService
+from services.academic.seat_allocation_service import SeatAllocationService
+from services.academic.exam_distribution_import_service import ExamDistributionImportService
+from io import BytesIO
 
 exam_distribution_bp = Blueprint('exam_distributions', __name__, url_prefix='/api/exam-distributions')
 service = ExamDistributionService()
+allocation_service = SeatAllocationService()
+import_service = ExamDistributionImportService()
 
 SWAGGER_TEMPLATE = {
     'definitions': {
@@ -122,6 +127,218 @@ def assign_exam():
         return jsonify({'error': 'Internal server error'}), 500
 
    
+@exam_distribution_bp.route('/bulk', methods=['POST'])
+@swag_from({
+    'tags': ['Exam Distributions'],
+    'description': 'Assign exams to many students in one request (insert or update per student)',
+    'parameters': [{
+        'name': 'body',
+        'in': 'body',
+        'required': True,
+        'schema': {
+            'type': 'object',
+            'properties': {
+                'assignments': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'student_id': {'type': 'string', 'example': '2023001'},
+                            'student_name': {'type': 'string', 'example': 'أحمد محمد'},
+                            'exam_id': {'type': 'integer', 'example': 1},
+                            'device_id': {'type': 'integer', 'example': 5}
+                        },
+                        'required': ['student_id', 'student_name', 'exam_id']
+                    }
+                }
+            },
+            'required': ['assignments']
+        }
+    }],
+    'responses': {
+        200: {
+            'description': 'Insert/update counts and the rows that were rejected',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'total': {'type': 'integer', 'example': 5000},
+                    'inserted': {'type': 'integer', 'example': 4800},
+                    'updated': {'type': 'integer', 'example': 198},
+                    'errors': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'index': {'type': 'integer', 'example': 17},
+                                'student_id': {'type': 'string', 'example': '2023018'},
+                                'error': {'type': 'string', 'example': 'Exam not found.'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        400: {'description': 'Validation error'},
+        500: {'description': 'Server error'}
+    }
+})
+def bulk_assign_exams():
+    data = request.get_json(silent=True)
+    if not data or 'assignments' not in data:
+        return jsonify({'error': 'Missing assignments in request body'}), 400
+    try:
+        return jsonify(service.bulk_assign_exams(data['assignments'])), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        return jsonify({'error': 'Server error'}), 500
+
+
+@exam_distribution_bp.route('/allocate', methods=['POST'])
+@swag_from({
+    'tags': ['Exam Distributions'],
+    'description': 'Seat the students of an exam on the active devices of the given centers. '
+                   'Rooms are filled in order (center order, room number, device number); a device '
+                   'already seated for an overlapping exam is skipped.',
+    'parameters': [{
+        'name': 'body',
+        'in': 'body',
+        'required': True,
+        'schema': {
+            'type': 'object',
+            'properties': {
+                'exam_id': {'type': 'integer', 'example': 1},
+                'center_ids': {'type': 'array', 'items': {'type': 'integer'}, 'example': [2, 1]},
+                'students': {
+                    'type': 'array',
+                    'description': 'Defaults to the students already distributed to the exam',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'student_id': {'type': 'string', 'example': '2023001'},
+                            'student_name': {'type': 'string', 'example': 'أحمد محمد'}
+                        }
+                    }
+                },
+                'spacing': {'type': 'integer', 'example': 1, 'description': 'Free devices between two seated students'},
+                'reassign': {'type': 'boolean', 'example': False, 'description': 'Re-seat students that already have a usable device'},
+                'dry_run': {'type': 'boolean', 'example': True}
+            },
+            'required': ['exam_id', 'center_ids']
+        }
+    }],
+    'responses': {
+        200: {
+            'description': 'Seating plan (with the assignments on dry_run, with insert/update counts otherwise)',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'exam_id': {'type': 'integer'},
+                    'dry_run': {'type': 'boolean'},
+                    'students': {'type': 'integer'},
+                    'capacity': {'type': 'integer'},
+                    'kept': {'type': 'integer'},
+                    'seated': {'type': 'integer'},
+                    'unassigned': {'type': 'array', 'items': {'type': 'string'}},
+                    'rejected': {
+                        'type': 'array',
+                        'items': {'type': 'object'},
+                        'description': 'Students distributed to another exam whose time overlaps this one (not moved); students of other exams are moved'
+                    },
+                    'rooms': {'type': 'array', 'items': {'type': 'object'}},
+                    'assignments': {'type': 'array', 'items': {'type': 'object'}},
+                    'inserted': {'type': 'integer'},
+                    'updated': {'type': 'integer'},
+                    'errors': {'type': 'array', 'items': {'type': 'object'}}
+                }
+            }
+        },
+        400: {'description': 'Validation error or not enough free devices'},
+        404: {'description': 'Exam not found'},
+        500: {'description': 'Server error'}
+    }
+})
+def allocate_seats():
+    data = request.get_json(silent=True)
+    if not data or 'exam_id' not in data or 'center_ids' not in data:
+        return jsonify({'error': 'exam_id and center_ids are required'}), 400
+    try:
+        result = allocation_service.allocate(
+            exam_id=data['exam_id'],
+            center_ids=data['center_ids'],
+            students=data.get('students'),
+            spacing=data.get('spacing', 0),
+            dry_run=bool(data.get('dry_run', False)),
+            reassign=bool(data.get('reassign', False))
+        )
+        return jsonify(result), 200
+    except ValueError as e:
+        if "Exam not found" in str(e):
+            return jsonify({'error': "Exam not found."}), 404
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        return jsonify({'error': 'Server error'}), 500
+
+
+@exam_distribution_bp.route('/import', methods=['POST'])
+@swag_from({
+    'tags': ['Exam Distributions'],
+    'description': 'Import a seating plan with ALL-OR-NOTHING approach. Columns: student_number, exam_id and '
+                   'either device_number or center_name + room_number (the next free device of the room is used)',
+    'consumes': ['multipart/form-data'],
+    'parameters': [{
+        'name': 'file',
+        'in': 'formData',
+        'type': 'file',
+        'required': True,
+        'description': 'Excel (.xlsx) or CSV file (max 10MB)'
+    }],
+    'responses': {
+        200: {
+            'description': 'Import result (status success or validation_failed with the invalid rows)',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'status': {'type': 'string', 'example': 'success'},
+                    'total_records': {'type': 'integer'},
+                    'inserted': {'type': 'integer'},
+                    'updated': {'type': 'integer'},
+                    'message': {'type': 'string'},
+                    'invalid_records': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'row': {'type': 'integer', 'example': 7},
+                                'error': {'type': 'string', 'example': 'Device not found.'},
+                                'data': {'type': 'object'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        400: {'description': 'Validation error'},
+        500: {'description': 'Server error'}
+    }
+})
+def import_distributions():
+    if 'file' not in request.files:
+        return jsonify({'error': 'File required', 'details': 'No file provided'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'Invalid file', 'details': 'Empty file'}), 400
+
+    try:
+        result = import_service.import_distributions(BytesIO(file.read()), file.filename)
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': 'Validation error', 'details': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Import failed', 'details': str(e)}), 500
+
+
 @exam_distribution_bp.route('/batch-delete', methods=['DELETE'])
 @swag_from({
     'tags': ['Exam Distributions'],
@@ -351,6 +568,77 @@ def get_exam_report(exam_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@exam_distribution_bp.route('/report/<int:exam_id>/roster', methods=['GET'])
+@swag_from({
+    'tags': ['Exam Distributions'],
+    'description': 'Numbered roster of an exam (seat numbers restart in every room), '
+                   'as paginated JSON or a streamed CSV/XLSX download (one sheet per room)',
+    'parameters': [
+        {'name': 'exam_id', 'in': 'path', 'type': 'integer', 'required': True, 'example': 1},
+        {'name': 'format', 'in': 'query', 'type': 'string', 'enum': ['json', 'csv', 'xlsx'], 'default': 'json'},
+        {'name': 'page', 'in': 'query', 'type': 'integer', 'default': 1},
+        {'name': 'page_size', 'in': 'query', 'type': 'integer', 'default': 500, 'description': 'JSON only, max 1000'}
+    ],
+    'responses': {
+        200: {
+            'description': 'Roster page (JSON) or file download (CSV/XLSX)',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'exam_id': {'type': 'integer'},
+                    'header': {'type': 'object'},
+                    'page': {'type': 'integer'},
+                    'page_size': {'type': 'integer'},
+                    'total': {'type': 'integer'},
+                    'rooms': {'type': 'integer'},
+                    'built_at': {'type': 'string', 'format': 'date-time'},
+                    'rows': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'center_name': {'type': 'string'},
+                                'room_number': {'type': 'string'},
+                                'seat_number': {'type': 'integer'},
+                                'device_number': {'type': 'integer'},
+                                'student_id': {'type': 'string'},
+                                'student_name': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        400: {'description': 'Invalid parameters'},
+        404: {'description': 'Exam distribution not found'},
+        500: {'description': 'Server error'}
+    }
+})
+def get_exam_roster(exam_id):
+    file_format = request.args.get('format', 'json').lower()
+    try:
+        if file_format == 'json':
+            page = request.args.get('page', 1, type=int)
+            page_size = request.args.get('page_size', 500, type=int)
+            return jsonify(service.get_roster_page(exam_id, page, page_size)), 200
+
+        mimetype, chunks = service.export_roster(exam_id, file_format)
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=exam_{exam_id}_roster.{file_format}'}
+        )
+
+    except ValueError as e:
+        error_msg = str(e)
+        if "not found" in error_msg.lower():
+            return jsonify({'error': error_msg}), 404
+        return jsonify({'error': error_msg}), 400
+
+    except Exception:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @exam_distribution_bp.route('/student-info/<string:student_id>', methods=['GET'])
 @swag_from({
     'tags': ['Exam Distributions'],
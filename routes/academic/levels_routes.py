@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.academic.levels_service import LevelsService
+from routes.http_validators import conditional_json
 
 levels_bp = Blueprint('levels', __name__, url_prefix='/api/academic/levels')
 service = LevelsService()
@@ -80,7 +81,7 @@ def create_level():
 def get_levels():
     try:
         levels = service.get_all_levels()
-        return jsonify(levels), 200
+        return conditional_json(levels, service.cache.last_modified)
     except RuntimeError:
         return jsonify({'error': 'Service unavailable'}), 503
     except Exception:
@@ -106,7 +107,7 @@ def get_levels():
 def get_level(level_id):
     try:
         level = service.get_level(level_id)
-        return jsonify(level), 200
+        return conditional_json(level, service.cache.last_modified)
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
     except RuntimeError:
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.academic.majors_service import MajorsService
+from routes.http_validators import conditional_json
 
 majors_bp = Blueprint('majors', __name__, url_prefix='/api/academic/majors')
 service = MajorsService()
@@ -86,7 +87,7 @@ def create_major():
 def get_majors_by_college(college_id):
     try:
         majors = service.get_majors_by_college(college_id)
-        return jsonify(majors), 200
+        return conditional_json(majors, service.cache.last_modified)
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
     except Exception:
@@ -115,7 +116,7 @@ def get_majors_by_college(college_id):
 def get_major(major_id):
     try:
         major = service.get_major(major_id)
-        return jsonify(major), 200
+        return conditional_json(major, service.cache.last_modified)
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
     except Exception:
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.academic.semesters_service import SemestersService
+from routes.http_validators import conditional_json
 
 semesters_bp = Blueprint('semesters', __name__, url_prefix='/api/academic/semesters')
 service = SemestersService()
@@ -72,7 +73,7 @@ def create_semester():
 def get_all_semesters():
     try:
         semesters = service.get_all_semesters()
-        return jsonify(semesters), 200
+        return conditional_json(semesters, service.cache.last_modified)
     except Exception:
         return jsonify({'error': 'Server error'}), 500
 
@@ -95,7 +96,7 @@ def get_all_semesters():
 def get_semester(semester_id):
     try:
         semester = service.get_semester_by_id(semester_id)
-        return jsonify(semester), 200
+        return conditional_json(semester, service.cache.last_modified)
     except ValueError:
         return jsonify({'error': 'Semester not found'}), 404
     except Exception:
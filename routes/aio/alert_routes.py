@@ -0,0 +1,53 @@
+# routes/aio/alert_routes.py
+from quart import Blueprint, request, jsonify
+from database.aio.alert_repository import AsyncAlertRepository
+from services.reference_cache import get_reference_cache
+from services.monitoring.alert_service import prepare_alert_batch, merge_alert_batch_results
+
+alert_repo = AsyncAlertRepository()
+alert_type_cache = get_reference_cache("alert_types")
+
+async_alert_bp = Blueprint('async_alerts', __name__, url_prefix='/api/alerts')
+
+
+@async_alert_bp.route('/', methods=['POST'])
+async def create_alert():
+    """Same contract as the Flask POST /api/alerts/ route (device alert ingestion)."""
+    data = await request.get_json()
+    try:
+        if not data or not all(data.get(k) for k in ('exam_id', 'student_id', 'device_id', 'alert_type')):
+            raise ValueError("All required fields must be provided")
+
+        alert_type = data.get('alert_type')
+        if not await alert_type_cache.get_async(("id", alert_type), lambda: alert_repo.get_alert_type(alert_type)):
+            raise ValueError("Invalid alert type")
+
+        alert = await alert_repo.create(
+            exam_id=data.get('exam_id'),
+            student_id=data.get('student_id'),
+            device_id=data.get('device_id'),
+            alert_type=data.get('alert_type'),
+            message=data.get('message')
+        )
+        return jsonify(alert), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@async_alert_bp.route('/batch', methods=['POST'])
+async def create_alerts_batch():
+    """Same contract as the Flask POST /api/alerts/batch route."""
+    data = await request.get_json(silent=True)
+    if not isinstance(data, dict) or 'alerts' not in data:
+        return jsonify({'error': 'Missing alerts in request body'}), 400
+    try:
+        alert_types = await alert_type_cache.get_async("all", alert_repo.get_alert_types)
+        items, results = prepare_alert_batch(data['alerts'], frozenset(t['id'] for t in alert_types))
+        rows = await alert_repo.create_batch(items)
+        return jsonify(merge_alert_batch_results(items, results, rows)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
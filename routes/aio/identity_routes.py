@@ -0,0 +1,102 @@
+# routes/aio/identity_routes.py
+# نسخة ASGI (Quart) من /identity/verify: قاعدة البيانات غير متزامنة والترميز في ProcessPool
+import asyncio
+import json
+from quart import Blueprint, request, jsonify
+from database.aio.exam_distribution_repository import AsyncExamDistributionRepository
+from database.aio.vectors_repository import AsyncVectorsRepository
+from services.image_processor import ImageProcessor
+from services.encoding_executor import probe_vector_from_request_async
+from services.encoder_version_service import EncoderVersionService
+from routes.monitoring.check_image_seat_student import (
+    UPLOAD_FOLDER, IDENTIFY_DEFAULT_LIMIT, IDENTIFY_MAX_LIMIT, IDENTIFY_DEFAULT_THRESHOLD
+)
+
+distribution_repo = AsyncExamDistributionRepository()
+vectors_repo = AsyncVectorsRepository()
+encoder_service = EncoderVersionService()
+
+async_identity_routes = Blueprint("async_identity_routes", __name__)
+
+
+@async_identity_routes.route("/identity/verify", methods=["POST"])
+async def verify_student_and_device():
+    """Same contract as the Flask /identity/verify route."""
+    try:
+        form = await request.form
+        files = await request.files
+
+        if "image" not in files and not form.get("embedding"):
+            return jsonify({"error": "Image file or embedding is required"}), 400
+
+        student_id = form.get("student_id")
+        device_id = form.get("device_id", type=int)
+        identify_on_mismatch = form.get("identify_on_mismatch", "false").lower() in ("1", "true", "yes")
+        identify_limit = form.get("identify_limit", IDENTIFY_DEFAULT_LIMIT, type=int)
+        identify_threshold = form.get("identify_threshold", IDENTIFY_DEFAULT_THRESHOLD, type=float)
+        identify_limit = max(1, min(identify_limit, IDENTIFY_MAX_LIMIT))
+
+        if not student_id:
+            return jsonify({"error": "Student ID is required"}), 400
+        if not device_id:
+            return jsonify({"error": "Device ID is required"}), 400
+
+        student_data = await distribution_repo.get_checkin_profile(student_id)
+        if not student_data:
+            return jsonify({"error": "Student not found in the system"}), 404
+        stored_vector = student_data.pop("vector")
+        student_data.pop("encoder_version")
+
+        correct_device_id = student_data.get("device_number")
+        device_verified = correct_device_id == device_id
+
+        v = json.loads(stored_vector) if stored_vector else None
+        if not v:
+            return jsonify({"error": "No face vector found for student"}), 404
+
+        try:
+            active_version = await asyncio.to_thread(encoder_service.get_active_version)
+            current_vector = await probe_vector_from_request_async(form, files, UPLOAD_FOLDER, active_version)
+        except ValueError as e:
+            return jsonify({"error": f"Image processing failed: {str(e)}"}), 422
+
+        face_verified, confidence = ImageProcessor.compare_vectors(v, current_vector)
+
+        response = {
+            "student_data": student_data,
+            "device_check": {
+                "is_correct": device_verified,
+                "correct_device_id": correct_device_id
+            },
+            "face_check": {
+                "is_match": face_verified,
+                "confidence": round(confidence, 4)
+            }
+        }
+
+        if identify_on_mismatch and not face_verified:
+            candidates = await vectors_repo.search_similar_vectors_in_exam(
+                current_vector,
+                student_data.get("exam_id"),
+                exclude_student_id=student_id,
+                threshold=identify_threshold,
+                limit=identify_limit
+            )
+            response["identification"] = {
+                "exam_id": student_data.get("exam_id"),
+                "candidates": [
+                    {
+                        "student_id": c["student_id"],
+                        "student_name": c["student_name"],
+                        "device_number": c["device_number"],
+                        "room_number": c["room_number"],
+                        "similarity": round(float(c["similarity"]), 4)
+                    }
+                    for c in candidates
+                ]
+            }
+
+        return jsonify(response), 200
+
+    except Exception as e:
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
@@ -0,0 +1,35 @@
+# routes/aio/model_config_routes.py
+from quart import Blueprint, request, jsonify
+from services.monitoring.model_config_service import ModelConfigService
+from routes.monitoring.model_config_routes import WAIT_DEFAULT_TIMEOUT, WAIT_MAX_TIMEOUT
+
+service = ModelConfigService()
+
+async_model_config_bp = Blueprint('async_model_config', __name__, url_prefix='/api/model-config')
+
+
+@async_model_config_bp.route('/wait', methods=['GET'])
+async def wait_for_config():
+    """Same contract as the Flask GET /api/model-config/wait long-poll; waiting costs no worker thread."""
+    try:
+        known_version = request.args.get('version', type=int)
+        if known_version is None:
+            # If-None-Match: "12"
+            etags = list(request.if_none_match.as_set()) if request.if_none_match else []
+            known_version = int(etags[0]) if len(etags) == 1 and etags[0].isdigit() else None
+        timeout = request.args.get('timeout', WAIT_DEFAULT_TIMEOUT, type=float)
+        if timeout < 0:
+            return jsonify({"error": "timeout must be positive"}), 400
+        timeout = min(timeout, WAIT_MAX_TIMEOUT)
+
+        config = await service.wait_for_change_async(known_version, timeout)
+        version = config.get("version")
+        if version == known_version:
+            return "", 304, {"ETag": f'"{known_version}"'}
+        response = jsonify(config)
+        if version is not None:
+            response.headers["ETag"] = f'"{version}"'
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,71 @@
+# routes/aio/vectors_routes.py
+import asyncio
+from datetime import datetime
+from quart import Blueprint, request, jsonify
+from database.aio.connection import unit_of_work
+from database.aio.exam_distribution_repository import AsyncExamDistributionRepository
+from database.aio.vectors_repository import AsyncVectorsRepository
+from database.academic.exam_distribution_repository import ExamDistributionRepository
+from services.encoding_executor import probe_vector_from_request_async
+from services.encoder_version_service import EncoderVersionService
+from services.students_service import STUDENTS_BACKEND, iter_students_by_ids
+from routes.vectors_routes import UPLOAD_FOLDER
+
+distribution_repo = AsyncExamDistributionRepository()
+vectors_repo = AsyncVectorsRepository()
+encoder_service = EncoderVersionService()
+
+async_vectors_routes = Blueprint("async_vectors_routes", __name__)
+
+
+# نفس المسار الفعلي لتطبيق Flask (البادئة /vectors + /vectors/search)
+@async_vectors_routes.route("/vectors/vectors/search", methods=["POST"])
+async def search_vectors():
+    """Same contract as the Flask /vectors/search route."""
+    try:
+        form = await request.form
+        files = await request.files
+
+        if "image" not in files and not form.get("embedding"):
+            return jsonify({"error": "Image file or embedding is required."}), 400
+
+        threshold = form.get("threshold", type=float)
+        limit = form.get("limit", type=int)
+        if threshold is None or limit is None:
+            return jsonify({"error": "Threshold and limit are required."}), 400
+
+        try:
+            active_version = await asyncio.to_thread(encoder_service.get_active_version)
+            query_vector = await probe_vector_from_request_async(form, files, UPLOAD_FOLDER, active_version)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        current_datetime = datetime.now()
+        include_profile = STUDENTS_BACKEND == "postgres"
+        async with unit_of_work():
+            results = await vectors_repo.search_similar_vectors(query_vector, threshold, limit)
+            student_ids = [r["student_id"] for r in results]
+            rows = await distribution_repo.get_search_enrichment(student_ids, current_datetime, include_profile)
+
+        profiles = None
+        if not include_profile and rows:
+            # الطلاب في SQLite (استدعاء متزامن في thread)
+            students_data = await asyncio.to_thread(lambda: list(iter_students_by_ids(student_ids)))
+            profiles = {
+                str(student[1]): dict(zip(ExamDistributionRepository.PROFILE_KEYS, student[1:8]))
+                for student in students_data
+            }
+        enrichment = ExamDistributionRepository._format_search_enrichment(rows, current_datetime, profiles)
+
+        students_dicts = []
+        for result in results:
+            student_info = enrichment.get(result["student_id"])
+            if student_info:
+                student_info["created_at"] = result["created_at"]
+                student_info["similarity"] = result["similarity"]
+                students_dicts.append(student_info)
+
+        return jsonify({"results": students_dicts}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -284,7 +284,7 @@ def validate_token():
     """التحقق من صحة توكن الجهاز"""
     try:
         token = request.json.get('token')
-        device = service.repository.get_device_by_token(token)
+        device = service.get_device_by_token(token)
         if device and device['status'] == 1:
             return jsonify({
                 'valid': True,
@@ -294,6 +294,32 @@ def validate_token():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@devices_bp.route('/api/devices/token-cache/stats', methods=['GET'])
+@swag_from({
+    'tags': ['Devices'],
+    'description': 'Device token cache metrics (hit rate, evictions, listener state)',
+    'responses': {
+        200: {
+            'description': 'Token cache statistics',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'hits': {'type': 'integer'},
+                    'negative_hits': {'type': 'integer'},
+                    'misses': {'type': 'integer'},
+                    'hit_rate': {'type': 'number'},
+                    'evictions': {'type': 'integer'},
+                    'notifications': {'type': 'integer'},
+                    'size': {'type': 'integer'},
+                    'listening': {'type': 'boolean'}
+                }
+            }
+        }
+    }
+})
+def token_cache_stats():
+    return jsonify(service.get_token_cache_stats()), 200
+
 @devices_bp.route('/api/devices/show', methods=['GET'])
 @swag_from({
     'tags': ['Devices'],
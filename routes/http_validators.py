@@ -0,0 +1,22 @@
+# routes/http_validators.py
+# ردود JSON قابلة للتحقق الشرطي (ETag / Last-Modified) للبيانات المرجعية
+from flask import request, jsonify
+
+
+def conditional_json(data, last_modified=None, etag=None):
+    """
+    JSON response carrying an ETag and Last-Modified.
+    The ETag is `etag` when given (e.g. a version number), otherwise a hash of the body.
+    A request whose If-None-Match (or If-Modified-Since) still matches gets
+    304 Not Modified with an empty body.
+    """
+    response = jsonify(data)
+    if etag is not None:
+        response.set_etag(str(etag))
+    else:
+        response.add_etag()
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # المتصفح يحتفظ بالنسخة لكن يعيد التحقق في كل طلب
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -68,6 +68,70 @@ def create_alert():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@alert_bp.route('/batch', methods=['POST'])
+@swag_from({
+    'tags': ['Alerts'],
+    'description': 'Create the alerts a device accumulated during one send interval (one INSERT for the batch)',
+    'parameters': [{
+        'name': 'body',
+        'in': 'body',
+        'required': True,
+        'schema': {
+            'type': 'object',
+            'properties': {
+                'alerts': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'exam_id': {'type': 'integer', 'example': 1},
+                            'student_id': {'type': 'integer', 'example': 1001},
+                            'device_id': {'type': 'integer', 'example': 5},
+                            'alert_type': {'type': 'integer', 'example': 1},
+                            'message': {'type': 'string', 'example': 'Student using phone'},
+                            'timestamp': {
+                                'type': 'string',
+                                'example': '2023-05-15T10:30:00Z',
+                                'description': 'When the device raised the alert (ISO-8601 or epoch milliseconds)'
+                            }
+                        },
+                        'required': ['exam_id', 'student_id', 'device_id', 'alert_type']
+                    }
+                }
+            },
+            'required': ['alerts']
+        }
+    }],
+    'responses': {
+        200: {
+            'description': 'Per-alert status (created with alert_id, or rejected with error)',
+            'examples': {
+                'application/json': {
+                    'created': 2,
+                    'rejected': 1,
+                    'results': [
+                        {'index': 0, 'status': 'created', 'alert_id': 41},
+                        {'index': 1, 'status': 'rejected', 'error': 'Invalid alert type'},
+                        {'index': 2, 'status': 'created', 'alert_id': 42}
+                    ]
+                }
+            }
+        },
+        400: {'description': 'Invalid input'},
+        500: {'description': 'Server error'}
+    }
+})
+def create_alerts_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'alerts' not in data:
+        return jsonify({'error': 'Missing alerts in request body'}), 400
+    try:
+        return jsonify(service.create_alerts_batch(data['alerts'])), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @alert_bp.route('/devices', methods=['GET'])
 @swag_from({
     'tags': ['Alerts'],
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.monitoring.alert_type_service import AlertTypeService
+from routes.http_validators import conditional_json
 
 alert_type_bp = Blueprint('alert_types', __name__, url_prefix='/api/alert-types')
 service = AlertTypeService()
@@ -106,7 +107,7 @@ def list_alert_types():
     """
     try:
         alert_types = service.get_all_alert_types()
-        return jsonify(alert_types)
+        return conditional_json(alert_types, service.cache.last_modified)
     except Exception as e:
         return handle_error(e, 500)
 
@@ -149,7 +150,7 @@ def get_alert_type(type_id):
         alert_type = service.get_alert_type(type_id)
         if not alert_type:
             return jsonify({"error": "Alert type not found"}), 404
-        return jsonify(alert_type)
+        return conditional_json(alert_type, service.cache.last_modified)
     except Exception as e:
         return handle_error(e, 500)
 
@@ -3,15 +3,24 @@ from services.image_processor import ImageProcessor
 from services.academic.exam_distribution_service import ExamDistributionService
 from database.vectors_repository import VectorsRepository
 from services.vectors_service import VectorsService
-from werkzeug.utils import secure_filename
+from services.monitoring.roll_call_service import RollCallService
+from services.encoder_version_service import EncoderVersionService
 import os
 import json
+import uuid
 
 UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
 
+# حدود البحث 1:N عند فشل المطابقة 1:1
+IDENTIFY_DEFAULT_LIMIT = 3
+IDENTIFY_MAX_LIMIT = 10
+IDENTIFY_DEFAULT_THRESHOLD = 0.6
+
 exam_distribution = ExamDistributionService()
 repository = VectorsRepository()
 vectors = VectorsService(repository)
+roll_call_service = RollCallService()
+encoder_service = EncoderVersionService()
 
 identity_routes = Blueprint("identity_routes", __name__)
 
@@ -28,8 +37,28 @@ def verify_student_and_device():
       - name: image
         in: formData
         type: file
-        required: true
-        description: Image file (face).
+        required: false
+        description: Image file (face), required unless embedding is sent.
+      - name: face_box
+        in: formData
+        type: string
+        required: false
+        description: 'Client face box as JSON {"top", "right", "bottom", "left"}; skips server-side detection.'
+      - name: face_landmarks
+        in: formData
+        type: string
+        required: false
+        description: 'Client face landmarks as JSON [[x, y], ...] (pixels or normalized); skips server-side detection.'
+      - name: embedding
+        in: formData
+        type: string
+        required: false
+        description: Client-computed 128-d embedding as a JSON array; skips image processing.
+      - name: encoder_version
+        in: formData
+        type: string
+        required: false
+        description: Encoder version of the client data (required with embedding).
       - name: student_id
         in: formData
         type: string
@@ -40,6 +69,24 @@ def verify_student_and_device():
         type: integer
         required: true
         description: The device ID.
+      - name: identify_on_mismatch
+        in: formData
+        type: boolean
+        required: false
+        default: false
+        description: When the 1:1 face check fails, search the students of the same exam for the actual identity.
+      - name: identify_limit
+        in: formData
+        type: integer
+        required: false
+        default: 3
+        description: Maximum number of candidates returned by the 1:N search (max 10).
+      - name: identify_threshold
+        in: formData
+        type: number
+        required: false
+        default: 0.6
+        description: Maximum vector distance accepted by the 1:N search.
     responses:
       200:
         description: Verification results
@@ -63,6 +110,16 @@ def verify_student_and_device():
                   type: boolean
                 confidence:
                   type: number
+            identification:
+              type: object
+              description: Present only when identify_on_mismatch is set and the face check failed
+              properties:
+                exam_id:
+                  type: integer
+                candidates:
+                  type: array
+                  items:
+                    type: object
       400:
         description: Invalid input data
       404:
@@ -74,23 +131,28 @@ def verify_student_and_device():
     """
     try:
         # 1. Basic input validation
-        if "image" not in request.files:
-            return jsonify({"error": "Image file is required"}), 400
+        if "image" not in request.files and not request.form.get("embedding"):
+            return jsonify({"error": "Image file or embedding is required"}), 400
 
-        image_file = request.files["image"]
         student_id = request.form.get("student_id")
         device_id = request.form.get("device_id", type=int)
+        identify_on_mismatch = request.form.get("identify_on_mismatch", "false").lower() in ("1", "true", "yes")
+        identify_limit = request.form.get("identify_limit", IDENTIFY_DEFAULT_LIMIT, type=int)
+        identify_threshold = request.form.get("identify_threshold", IDENTIFY_DEFAULT_THRESHOLD, type=float)
+        identify_limit = max(1, min(identify_limit, IDENTIFY_MAX_LIMIT))
 
         if not student_id:
             return jsonify({"error": "Student ID is required"}), 400
         if not device_id:
             return jsonify({"error": "Device ID is required"}), 400
 
-        # 2. Get student data
+        # 2. Get student data and stored vector from the check-in read model (one key lookup)
         try:
-            student_data = exam_distribution.get_student_info(student_id)
+            student_data = exam_distribution.get_checkin_profile(student_id)
         except ValueError as e:
             return jsonify({"error": str(e)}), 404
+        stored_vector = student_data.pop("vector")
+        student_data.pop("encoder_version")
 
         # 3. Verify device
         correct_device_id = student_data.get("device_number")
@@ -99,38 +161,54 @@ def verify_student_and_device():
         # 4. Face verification
         face_verified = False
         confidence = 0.0
-        temp_file_path = None
+        current_vector = None
 
         try:
-            # Save temporary image
-            temp_file_path = os.path.join(UPLOAD_FOLDER, secure_filename(image_file.filename))
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-            image_file.save(temp_file_path)
-
-            # Get stored vector - returns error if not found
-       
-            stored_vector = vectors.get_vector_by_id(student_id)
-
-            v=json.loads(stored_vector['vector'])
+            v = json.loads(stored_vector) if stored_vector else None
 
             if not v:
                 return jsonify({"error": "No face vector found for student"}), 404
-               
-            # Convert current image to vector - returns error if fails
-            current_vector = ImageProcessor.convert_image_to_vector(temp_file_path)
+
+            # Resolve the probe vector (client embedding, client face box or full detection)
+            try:
+                current_vector = ImageProcessor.probe_vector_from_request(
+                    request.form, request.files, UPLOAD_FOLDER, encoder_service.get_active_version()
+                )
+            except ValueError as e:
+                return jsonify({"error": f"Image processing failed: {str(e)}"}), 422
 
             # Compare vectors - only returns False if vectors don't match
             face_verified, confidence = ImageProcessor.compare_vectors(v, current_vector)
 
         except Exception as e:
-            if "convert_image_to_vector" in str(e):
-                return jsonify({"error": f"Image processing failed: {str(e)}"}), 422
             return jsonify({"error": str(e)}), 500
-        finally:
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
 
-        # 5. Prepare final response
+        # 5. Two-stage check: on a failed 1:1 match, reuse the probe vector
+        #    for a bounded 1:N search among the students of the same exam
+        identification = None
+        if identify_on_mismatch and not face_verified and current_vector is not None:
+            candidates = vectors.search_vectors_in_exam(
+                current_vector,
+                student_data.get("exam_id"),
+                exclude_student_id=student_id,
+                threshold=identify_threshold,
+                limit=identify_limit
+            )
+            identification = {
+                "exam_id": student_data.get("exam_id"),
+                "candidates": [
+                    {
+                        "student_id": c["student_id"],
+                        "student_name": c["student_name"],
+                        "device_number": c["device_number"],
+                        "room_number": c["room_number"],
+                        "similarity": round(float(c["similarity"]), 4)
+                    }
+                    for c in candidates
+                ]
+            }
+
+        # 6. Prepare final response
         response = {
             "student_data": student_data,
             "device_check": {
@@ -142,9 +220,111 @@ def verify_student_and_device():
                 "confidence":round(confidence, 4)
             }
         }
+        if identification is not None:
+            response["identification"] = identification
 
         return jsonify(response), 200
 
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+
+@identity_routes.route("/identity/roll-call", methods=["POST"])
+def roll_call():
+    """
+    Identify every student in a room photo in one call
+    ---
+    tags:
+      - Identity Verification
+    consumes:
+      - multipart/form-data
+    parameters:
+      - name: image
+        in: formData
+        type: file
+        required: true
+        description: Room photo (JPG, JPEG, PNG).
+      - name: exam_id
+        in: formData
+        type: integer
+        required: true
+        description: The exam being held in the room.
+      - name: center_id
+        in: formData
+        type: integer
+        required: true
+        description: The exam center of the room.
+      - name: room_number
+        in: formData
+        type: string
+        required: true
+        description: The room number.
+      - name: threshold
+        in: formData
+        type: number
+        required: false
+        default: 0.6
+        description: Maximum vector distance accepted as a match.
+    responses:
+      200:
+        description: Roll-call results
+        schema:
+          type: object
+          properties:
+            faces_detected:
+              type: integer
+            expected_students:
+              type: integer
+            present:
+              type: array
+              items:
+                type: object
+            absent:
+              type: array
+              items:
+                type: object
+            unknown:
+              type: array
+              items:
+                type: object
+      400:
+        description: Invalid input data
+      422:
+        description: Face processing error
+      500:
+        description: Server error
+    """
+    temp_file_path = None
+    try:
+        if "image" not in request.files:
+            return jsonify({"error": "Image file is required"}), 400
+
+        image_file = request.files["image"]
+        exam_id = request.form.get("exam_id", type=int)
+        center_id = request.form.get("center_id", type=int)
+        room_number = request.form.get("room_number")
+        threshold = request.form.get("threshold", IDENTIFY_DEFAULT_THRESHOLD, type=float)
+
+        if not exam_id or not center_id or not room_number:
+            return jsonify({"error": "exam_id, center_id and room_number are required"}), 400
+
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        temp_file_path = os.path.join(
+            UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{ImageProcessor.secure_filename(image_file.filename)}"
+        )
+        image_file.save(temp_file_path)
+
+        try:
+            result = roll_call_service.roll_call(
+                temp_file_path, exam_id, center_id, room_number, threshold, encoder_service.get_active_version()
+            )
+        except ValueError as e:
+            return jsonify({"error": f"Image processing failed: {str(e)}"}), 422
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+    finally:
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
@@ -1,12 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from flasgger import swag_from
 from services.monitoring.model_config_service import ModelConfigService
+from routes.http_validators import conditional_json
 
 model_config_bp = Blueprint('model_config', __name__, url_prefix='/api/model-config')
 
 # إنشاء نسخة من الخدمة
 service = ModelConfigService()
 
+# حدود الانتظار في long-poll (ثوانٍ)
+WAIT_DEFAULT_TIMEOUT = 25
+WAIT_MAX_TIMEOUT = 60
+
 @model_config_bp.route('/', methods=['GET'])
 @swag_from({
     'tags': ['Model Config'],
@@ -80,7 +85,59 @@ service = ModelConfigService()
 def get_config():
     try:
         config = service.get_current_config()
-        return jsonify(config), 200
+        # ETag = رقم النسخة؛ If-None-Match بنفس الرقم يرجع 304 بدون جسم
+        return conditional_json(config, etag=config.get("version"))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@model_config_bp.route('/wait', methods=['GET'])
+@swag_from({
+    'tags': ['Model Config'],
+    'description': 'Long-poll: ينتظر حتى تتغير نسخة الإعدادات عن النسخة المرسلة ثم يرجعها',
+    'parameters': [
+        {
+            'name': 'version',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'آخر نسخة لدى الجهاز (أو ترسل في If-None-Match)'
+        },
+        {
+            'name': 'timeout',
+            'in': 'query',
+            'type': 'number',
+            'required': False,
+            'default': WAIT_DEFAULT_TIMEOUT,
+            'description': f'أقصى مدة انتظار بالثواني (حتى {WAIT_MAX_TIMEOUT})'
+        }
+    ],
+    'responses': {
+        200: {'description': 'نسخة أحدث من الإعدادات (ETag = رقم النسخة)'},
+        304: {'description': 'انتهت مدة الانتظار دون تغيير'},
+        400: {'description': 'قيمة غير صالحة'},
+        500: {'description': 'خطأ في الخادم'}
+    }
+})
+def wait_for_config():
+    # تحت ASGI يخدم هذا المسار routes/aio/model_config_routes.py دون حجز thread
+    try:
+        known_version = request.args.get('version', type=int)
+        if known_version is None:
+            # If-None-Match: "12"
+            etags = list(request.if_none_match.as_set()) if request.if_none_match else []
+            known_version = int(etags[0]) if len(etags) == 1 and etags[0].isdigit() else None
+        timeout = request.args.get('timeout', WAIT_DEFAULT_TIMEOUT, type=float)
+        if timeout < 0:
+            return jsonify({"error": "timeout must be positive"}), 400
+        timeout = min(timeout, WAIT_MAX_TIMEOUT)
+
+        config = service.wait_for_change(known_version, timeout)
+        if config.get("version") == known_version:
+            response = make_response("", 304)
+            response.set_etag(str(known_version))
+            return response
+        return conditional_json(config, etag=config.get("version"))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
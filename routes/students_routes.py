@@ -6,12 +6,14 @@ from services.students_service import(
   fetch_student_info_by_number,
   fetch_students_by_ids
 )
+from services.bulk_enrollment_service import BulkEnrollmentService
 from flasgger import Swagger, swag_from
 
 
 # إنشاء Blueprint للمسارات
 
 students_bp = Blueprint('students_bp', __name__, url_prefix='/students')
+bulk_enrollment = BulkEnrollmentService()
 
 @students_bp.route('/add', methods=['POST'])
 @swag_from({
@@ -95,6 +97,73 @@ def add_student_route():
 
 
 
+@students_bp.route('/bulk-enroll', methods=['POST'])
+@swag_from({
+    'tags': ['Students'],
+    'description': 'Enroll a whole intake: a records sheet plus a ZIP of photos, processed as a background job '
+                   '(students inserted in bulk, faces encoded in parallel, vectors inserted in bulk)',
+    'consumes': ['multipart/form-data'],
+    'parameters': [
+        {
+            "name": "records",
+            "in": "formData",
+            "type": "file",
+            "required": True,
+            "description": "XLSX or CSV with Number, StudentName, College, Level, Specialization, Gender "
+                           "and an optional Photo column (file name inside the ZIP, defaults to <Number>.jpg/.png)"
+        },
+        {
+            "name": "photos",
+            "in": "formData",
+            "type": "file",
+            "required": True,
+            "description": "ZIP archive of the student photos (PNG, JPG, JPEG, max 2MB each)"
+        }
+    ],
+    'responses': {
+        202: {"description": "Job started; poll /students/bulk-enroll/<job_id>"},
+        400: {"description": "Missing files or invalid records file"},
+        500: {"description": "Internal Server Error"}
+    }
+})
+def bulk_enroll_route():
+    records_file = request.files.get('records')
+    photos_file = request.files.get('photos')
+    if not records_file or not photos_file:
+        return jsonify({"error": "records and photos files are required"}), 400
+    try:
+        job_id = bulk_enrollment.start(records_file, records_file.filename, photos_file)
+        return jsonify({"message": "Bulk enrollment started.", "job_id": job_id}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to start bulk enrollment. Details: {e}"}), 500
+
+
+@students_bp.route('/bulk-enroll/<job_id>', methods=['GET'])
+def bulk_enroll_job(job_id):
+    """
+    Status, progress and per-row report of a bulk enrollment job
+    ---
+    tags:
+      - Students
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Job status; `result.results` lists every row (enrolled / failed, vector created or not)
+      404:
+        description: Job not found
+    """
+    job = bulk_enrollment.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job), 200
+
+
 @students_bp.route('/', methods=['GET'])
 def get_students():
     """
@@ -84,4 +84,70 @@ def students_to_vectors():
         return jsonify({"error": str(e)}), 400
     except Exception as e:
         # معالجة الأخطاء غير المتوقعة
-        return jsonify({"error": "An unexpected error occurred."}), 500
\ No newline at end of file
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+
+@students_to_vectors_route.route('/api/students-to-vectors/re-embed', methods=['POST'])
+def reembed_students_from_chips():
+    """
+    Re-embed stored vectors from the archived aligned face chips (encoder only), as a background job
+    ---
+    tags:
+      - Convert S to V
+    parameters:
+        - name: body
+          in: body
+          required: false
+          schema:
+            type: object
+            properties:
+              student_ids:
+                type: array
+                items:
+                  type: string
+                example: ["202001", "202002"]
+                description: Omit to re-embed every archived chip
+    responses:
+      202:
+        description: Job started; poll /api/students-to-vectors/re-embed/<job_id> for the summary
+      400:
+        description: Invalid input
+      500:
+        description: Internal server error
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        student_ids = data.get("student_ids")
+        if student_ids is not None and (not isinstance(student_ids, list) or not student_ids):
+            return jsonify({"error": "student_ids must be a non-empty list"}), 400
+
+        job_id = StudentsToVectorsService.start_reembed(student_ids)
+        return jsonify({"message": "Re-embedding started.", "job_id": job_id}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        return jsonify({"error": "An unexpected error occurred."}), 500
+
+
+@students_to_vectors_route.route('/api/students-to-vectors/re-embed/<job_id>', methods=['GET'])
+def reembed_job(job_id):
+    """
+    Status, progress and summary of a re-embedding job
+    ---
+    tags:
+      - Convert S to V
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Job status; `result` holds the re-embedding summary once completed
+      404:
+        description: Job not found
+    """
+    job = StudentsToVectorsService.get_reembed_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job), 200
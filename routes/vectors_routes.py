@@ -3,10 +3,11 @@ from services.vectors_service import VectorsService
 from services.image_processor import ImageProcessor
 from services.students_service import fetch_student_info_by_number,fetch_students_by_ids
 from database.vectors_repository import VectorsRepository
-from datetime import datetime, timedelta
+from database.face_chip_archive import FaceChipArchive
+from database.connection import unit_of_work
+from services.encoder_version_service import EncoderVersionService
 import os
 from services.academic.exam_distribution_service import ExamDistributionService
-from services.academic.exams_service import ExamsService
 
 vectors_routes = Blueprint("vectors_routes", __name__)
 
@@ -15,11 +16,25 @@ UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")  # مجلد مؤقت داخ
 repository = VectorsRepository()
 service = VectorsService(repository)
 exam_distribution_service = ExamDistributionService()
-exams_service = ExamsService()
+face_chip_archive = FaceChipArchive()
+encoder_service = EncoderVersionService(archive=face_chip_archive)
 
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+
+def archive_face_chip(student_id, chip_record, vector):
+    """
+    Archive the chip of a freshly written vector and refresh its shadow vector.
+    The vector row is already committed, so a failure here is only reported as a warning.
+    """
+    try:
+        face_chip_archive.save(student_id, chip_record)
+        encoder_service.refresh_shadow_vector(student_id, chip_record, vector)
+        return None
+    except Exception as e:
+        return f"Vector saved, but the face chip archive was not updated: {e}"
+
 @vectors_routes.route("/vectors/add-vector", methods=["POST"])
 def add_vector():
     """
@@ -69,17 +84,23 @@ def add_vector():
         filepath = os.path.join(UPLOAD_FOLDER, filename)
         file.save(filepath)
 
-        # تحويل الصورة إلى متجه
-        vector = ImageProcessor.convert_image_to_vector(filepath)
-
-        # إزالة الملف المؤقت
-        os.remove(filepath)
-
         repository = VectorsRepository()
         service = VectorsService(repository)
-        # إضافة المتجه إلى قاعدة البيانات
-        vector_id = service.add_vector(student_id, college, vector)
-        return jsonify({"message": "Vector added successfully.", "id": vector_id}), 201
+        # تحويل الصورة إلى متجه (مع الوجه المحاذى لإعادة الترميز لاحقًا) ثم إضافته إلى قاعدة البيانات
+        try:
+            (vector, chip_record), vector_id = encoder_service.encode_and_write(
+                lambda version: ImageProcessor.convert_image_to_vector_with_chip(filepath, version),
+                lambda encoded, version: service.add_vector(student_id, college, encoded[0], version)
+            )
+        finally:
+            # إزالة الملف المؤقت
+            os.remove(filepath)
+
+        response = {"message": "Vector added successfully.", "id": vector_id}
+        warning = archive_face_chip(student_id, chip_record, vector)
+        if warning:
+            response["warning"] = warning
+        return jsonify(response), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -123,18 +144,25 @@ def update_vector(vector_id):
         filepath = os.path.join(UPLOAD_FOLDER, filename)
         file.save(filepath)
 
-        # تحويل الصورة إلى متجه
-        vector = ImageProcessor.convert_image_to_vector(filepath)
-
-        # إزالة الملف المؤقت
-        os.remove(filepath)
+        # تحويل الصورة إلى متجه بإعدادات النسخة النشطة ثم تحديثه في قاعدة البيانات
+        try:
+            (vector, chip_record), student_id = encoder_service.encode_and_write(
+                lambda version: ImageProcessor.convert_image_to_vector_with_chip(filepath, version),
+                lambda encoded, version: service.update_vector_by_id(vector_id, encoded[0], version)
+            )
+        finally:
+            # إزالة الملف المؤقت
+            os.remove(filepath)
 
         #repository = VectorsRepository()
         #service = VectorsService(repository)
-        # تحديث المتجه في قاعدة البيانات
-        success = service.update_vector_by_id(vector_id, vector)
-        if success:
-            return jsonify({"message": "Vector updated successfully."}), 200
+        if student_id:
+            # الأرشيف هو مصدر إعادة الترميز، فيجب أن يحمل الصورة الجديدة
+            response = {"message": "Vector updated successfully."}
+            warning = archive_face_chip(student_id, chip_record, vector)
+            if warning:
+                response["warning"] = warning
+            return jsonify(response), 200
         else:
             return jsonify({"error": "Failed to update vector. Check vector ID."}), 400
 
@@ -233,6 +261,7 @@ def delete_vector(student_id):
     try:
         result = service.delete_vector(student_id)
         if result:
+            face_chip_archive.delete(student_id)
             return jsonify({"message": "Vector deleted successfully."}), 200
         return jsonify({"message": "Vector not found."}), 404
     except Exception as e:
@@ -242,7 +271,7 @@ def delete_vector(student_id):
 @vectors_routes.route("/vectors/search", methods=["POST"])
 def search_vectors():
     """
-    Search for similar vectors using an image.
+    Search for similar vectors using an image, a client face box/landmarks or a client embedding.
     ---
     tags:
       - Vectors
@@ -250,8 +279,28 @@ def search_vectors():
       - name: image
         in: formData
         type: file
-        required: true
-        description: The face image to search for.
+        required: false
+        description: The face image to search for (required unless embedding is sent).
+      - name: face_box
+        in: formData
+        type: string
+        required: false
+        description: 'Client face box as JSON {"top", "right", "bottom", "left"}; skips server-side detection.'
+      - name: face_landmarks
+        in: formData
+        type: string
+        required: false
+        description: 'Client face landmarks as JSON [[x, y], ...] (pixels or normalized); skips server-side detection.'
+      - name: embedding
+        in: formData
+        type: string
+        required: false
+        description: Client-computed 128-d embedding as a JSON array; skips image processing.
+      - name: encoder_version
+        in: formData
+        type: string
+        required: false
+        description: Encoder version of the client data (required with embedding).
       - name: threshold
         in: formData
         type: number
@@ -271,98 +320,42 @@ def search_vectors():
         description: Server error.
     """
     try:
-        # Check if the image file is in the request
-        if "image" not in request.files:
-            return jsonify({"error": "Image file is required."}), 400
+        # Check that the request carries an image or a client embedding
+        if "image" not in request.files and not request.form.get("embedding"):
+            return jsonify({"error": "Image file or embedding is required."}), 400
 
-        image_file = request.files["image"]
         threshold = request.form.get("threshold", type=float)
         limit = request.form.get("limit", type=int)
 
         if threshold is None or limit is None:
             return jsonify({"error": "Threshold and limit are required."}), 400
 
-        # Save the image temporarily
-        filename = ImageProcessor.secure_filename(image_file.filename)
-        temp_path = os.path.join(UPLOAD_FOLDER, filename)
-        image_file.save(temp_path)
+        # Resolve the probe vector (client embedding, client face box or full detection)
+        try:
+            query_vector = ImageProcessor.probe_vector_from_request(
+                request.form, request.files, UPLOAD_FOLDER, encoder_service.get_active_version()
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        # Convert the image to a vector
-        query_vector = ImageProcessor.convert_image_to_vector(temp_path)
+        # All DB steps share one pooled connection and one transaction
+        with unit_of_work():
+            # Search for similar vectors
+            results = service.find_similar_vectors(query_vector, threshold, limit)
 
-        # Search for similar vectors
-        results = service.find_similar_vectors(query_vector, threshold, limit)
+            # Student, distribution, exam and time window of every hit in one joined query
+            enrichment = exam_distribution_service.get_search_enrichment(
+                [result["student_id"] for result in results]
+            )
 
-        # Delete the temporary image
-        os.remove(temp_path)
-
-        # Extract student_id from the results
-        student_ids = [result["student_id"] for result in results]
-
-        # Fetch student data using the fetch_students_info_by_ids function
-        students_data = fetch_students_by_ids(student_ids)
-
-        # Convert students_data to a list of dictionaries
         students_dicts = []
-        for student in students_data:
-            students_dicts.append({
-                #"StudentID": student[0],  # ID
-                "Number": student[1],  # Registration number
-                "StudentName": student[2],  # Student name
-                "Gender": student[3],  # Gender
-                "Level": student[4],  # Level
-                "Specialization": student[5],  # Specialization
-                "College": student[6],  # College
-                "ImagePath": student[7]  # Image path
-            })
-
-        # الحصول على الوقت الحالي من السيرفر
-        current_datetime = datetime.now()
-
-        # Update student data by adding new fields
         for result in results:
-            student_id = result["student_id"]
-            # Find the student data in students_dicts
-            student_info = next((student for student in students_dicts if str(student["Number"]) == student_id), None)
+            student_info = enrichment.get(result["student_id"])
             if student_info:
-                exam_distribution_data = exam_distribution_service.get_exam_distribution_by_student(student_id)
-                if exam_distribution_data:
-                    exam_id = exam_distribution_data.get("exam_id")
-                    exam_data = exams_service.get_exam_data(exam_id)
-                    if exam_data:
-                        # استخراج تاريخ الاختبار ووقت بداية الاختبار
-                        exam_date_str = exam_data.get("exam_date")
-                        exam_start_time_str = exam_data.get("exam_start_time")
-                        
-                        # دمج التاريخ والوقت لتكوين كائن datetime
-                        exam_datetime_str = f"{exam_date_str} {exam_start_time_str}"
-                        exam_datetime = datetime.strptime(exam_datetime_str, "%Y-%m-%d %H:%M:%S")
-                        
-                        # تحديد النافذة الزمنية:
-                        # صالح إذا كان الوقت الحالي بين (exam_start_time - 30 دقيقة) وبين (exam_start_time + 60 دقيقة)
-                        valid_start = exam_datetime - timedelta(minutes=30)
-                        valid_end = exam_datetime + timedelta(minutes=60)
-
-                        # فحص صلاحية الوقت: كما يجب التأكد من أن تاريخ الاختبار يطابق تاريخ اليوم
-                        is_date_match = (exam_datetime.date() == current_datetime.date())
-                        is_time_valid = valid_start <= current_datetime <= valid_end
-                        # إضافة بيانات الاختبار إلى الطالب
-                        student_info["exam_distribution"] = exam_distribution_data
-                        student_info["exam_data"] = exam_data
-                        student_info["isExamTimeValid"] = is_date_match and is_time_valid
-                        student_info["time_window"] = {
-                            "valid_start": valid_start.strftime("%Y-%m-%d %H:%M:%S"),
-                            "valid_end": valid_end.strftime("%Y-%m-%d %H:%M:%S"),
-                            "current_time": current_datetime.strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                    else:
-                        student_info["exam_error"] = "No exam data found."
-                else:
-                    student_info["exam_distribution_error"] = "No exam distribution data found."
-
                 # Add new fields to the student data
                 student_info["created_at"] = result["created_at"]
                 student_info["similarity"] = result["similarity"]
+                students_dicts.append(student_info)
 
         return jsonify({"results": students_dicts}), 200
 
@@ -425,7 +418,9 @@ def search_vectors_by_college():
         image_file.save(temp_path)
 
         # Convert the image to a vector
-        query_vector = ImageProcessor.convert_image_to_vector(temp_path)
+        query_vector = ImageProcessor.convert_image_to_vector(
+            temp_path, encoder_version=encoder_service.get_active_version()
+        )
 
         # Search for similar vectors within the specified college
         results = service.search_vectors_by_college(query_vector, college, threshold, limit)
@@ -468,3 +463,106 @@ def search_vectors_by_college():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+
+@vectors_routes.route("/vectors/encoder/status", methods=["GET"])
+def encoder_status():
+    """حالة نسخ المُرمّز ونسبة تغطية متجهات الظل
+    ---
+    tags:
+      - Vectors
+    responses:
+      200:
+        description: Active version, shadow version, shadow coverage and running build job
+      500:
+        description: خطأ في السيرفر
+    """
+    try:
+        return jsonify(encoder_service.get_status()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@vectors_routes.route("/vectors/encoder/shadow-build", methods=["POST"])
+def encoder_shadow_build():
+    """بدء إعادة الترميز في الخلفية لنسخة جديدة دون إيقاف البحث
+    ---
+    tags:
+      - Vectors
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required: [version]
+          properties:
+            version:
+              type: string
+              example: "dlib_resnet_v1_jitter10"
+    responses:
+      202:
+        description: Shadow build started
+      400:
+        description: Unknown version, already active, or a build is running
+      500:
+        description: خطأ في السيرفر
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        version = data.get("version")
+        if not version:
+            return jsonify({"error": "version is required."}), 400
+
+        job_id = encoder_service.start_shadow_build(version)
+        return jsonify({"message": "Shadow build started.", "job_id": job_id, "version": version}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@vectors_routes.route("/vectors/encoder/jobs/<job_id>", methods=["GET"])
+def encoder_job(job_id):
+    """متابعة مهمة بناء متجهات الظل
+    ---
+    tags:
+      - Vectors
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Job status and progress
+      404:
+        description: Job not found
+    """
+    job = encoder_service.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job), 200
+
+
+@vectors_routes.route("/vectors/encoder/cutover", methods=["POST"])
+def encoder_cutover():
+    """تبديل النسخة النشطة إلى نسخة الظل بشكل ذري بعد اكتمال التغطية
+    ---
+    tags:
+      - Vectors
+    responses:
+      200:
+        description: Cutover completed
+      409:
+        description: No shadow version, build still running, or coverage below 100%
+      500:
+        description: خطأ في السيرفر
+    """
+    try:
+        result = encoder_service.cutover()
+        return jsonify({"message": "Encoder cutover completed.", **result}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
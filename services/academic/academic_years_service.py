@@ -1,7 +1,10 @@
 from typing import List, Dict, Optional
 from database.academic.academic_years_repository import AcademicYearsRepository
+from services.reference_cache import get_reference_cache
 
 class AcademicYearsService:
+    cache = get_reference_cache("academic_years")
+
     def __init__(self):
         self.repo = AcademicYearsRepository()
 
@@ -13,7 +16,9 @@ class AcademicYearsService:
             raise ValueError("Year name exceeds maximum length (50 characters)")
         
         try:
-            return self.repo.create_year(year_name)
+            year = self.repo.create_year(year_name)
+            self.cache.invalidate()
+            return year
         except ValueError as e:
             raise ValueError(str(e))
         except RuntimeError as e:
@@ -24,7 +29,7 @@ class AcademicYearsService:
     def get_all_years(self) -> List[Dict]:
         """Retrieve all academic years"""
         try:
-            return self.repo.get_all_years()
+            return self.cache.get("all", self.repo.get_all_years)
         except RuntimeError as e:
             raise RuntimeError("Service unavailable: " + str(e))
         except Exception as e:
@@ -36,7 +41,7 @@ class AcademicYearsService:
             raise ValueError("Invalid year ID format")
         
         try:
-            result = self.repo.get_year_by_id(year_id)
+            result = self.cache.get(("id", year_id), lambda: self.repo.get_year_by_id(year_id))
             if not result:
                 raise ValueError("Academic year not found")
             return result
@@ -57,7 +62,9 @@ class AcademicYearsService:
             raise ValueError("Year name exceeds maximum length (50 characters)")
         
         try:
-            return self.repo.update_year(year_id, year_name)
+            year = self.repo.update_year(year_id, year_name)
+            self.cache.invalidate()
+            return year
         except ValueError as e:
             raise ValueError(str(e))
         except RuntimeError as e:
@@ -74,6 +81,7 @@ class AcademicYearsService:
             success = self.repo.delete_year(year_id)
             if not success:
                 raise RuntimeError("Deletion operation failed")
+            self.cache.invalidate()
             return {"message": "Academic year deleted successfully"}
         except ValueError as e:
             raise ValueError(str(e))
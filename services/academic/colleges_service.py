@@ -1,8 +1,10 @@
 # services/academic/colleges_service.py
 from database.academic.colleges_repository import CollegesRepository
+from services.reference_cache import get_reference_cache, invalidate
 
 class CollegesService:
-    
+    cache = get_reference_cache("colleges")
+
     def __init__(self, repo=None):
         self.repo = repo or CollegesRepository()
 
@@ -12,21 +14,25 @@ class CollegesService:
         existing = [c for c in self.get_all_colleges() if c['name'].lower() == name.lower()]
         if existing:
             raise ValueError("College already exists")
-        return self.repo.create_college(name.strip())
+        college = self.repo.create_college(name.strip())
+        self.cache.invalidate()
+        return college
 
     def get_college(self, college_id):
-        college = self.repo.get_college(college_id)
+        college = self.cache.get(("id", college_id), lambda: self.repo.get_college(college_id))
         if not college:
             raise ValueError("College not found")
         return college
 
     def get_all_colleges(self):
-        return self.repo.get_all_colleges()
+        return self.cache.get("all", self.repo.get_all_colleges)
 
     def update_college(self, college_id, name):
         if not name or len(name.strip()) < 2:
             raise ValueError("Name must be at least 2 characters")
         college = self.repo.update_college(college_id, name.strip())
+        # أسماء الكليات تظهر أيضًا في ردود التخصصات
+        invalidate("colleges", "majors")
         if not college:
             raise ValueError("College not found")
         return college
@@ -34,4 +40,5 @@ class CollegesService:
     def delete_college(self, college_id):
         if not self.repo.delete_college(college_id):
             raise ValueError("College not found")
+        invalidate("colleges", "majors")
         return {"message": "College deleted"}
\ No newline at end of file
@@ -0,0 +1,249 @@
+# services/academic/exam_distribution_import_service.py
+"""
+استيراد توزيع الطلاب على الأجهزة من ملف Excel/CSV (ALL-OR-NOTHING)
+Each row names a student number and an exam, plus either a device number or a
+room (center_name + room_number) in which the next free device is taken.
+Students, exams, devices and centers are resolved with set-based lookups, every
+row is validated in one pass, and the whole file is written with one bulk upsert.
+"""
+import csv
+import io
+import os
+from collections import defaultdict
+from openpyxl import load_workbook
+from database.connection import unit_of_work
+from database.academic.exam_distribution_repository import ExamDistributionRepository
+from services.academic.seat_allocation_service import build_seating_plan
+from services.students_service import iter_students_by_ids
+
+
+class ExamDistributionImportService:
+    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    ALLOWED_EXTENSIONS = {'.xlsx', '.csv'}
+
+    REQUIRED_COLUMNS = ['student_number', 'exam_id']
+    COLUMNS = ['student_number', 'exam_id', 'device_number', 'center_name', 'room_number']
+
+    def __init__(self):
+        self.repository = ExamDistributionRepository()
+
+    def import_distributions(self, file_stream, filename: str) -> dict:
+        rows = self._read_rows(file_stream, filename)
+        if not rows:
+            raise ValueError("Uploaded file is empty")
+
+        with unit_of_work():
+            # لا توزيع آلي آخر أثناء حساب مقاعد الغرف
+            self.repository.lock_allocation()
+            errors = {}
+            parsed = self._parse_rows(rows, errors)
+            self._resolve(parsed, errors)
+            self._seat_rooms(parsed, errors)
+
+            if errors:
+                return {
+                    'status': 'validation_failed',
+                    'total_records': len(rows),
+                    'invalid_records': [
+                        {'row': row['row'], 'error': errors[row['row']], 'data': row['data']}
+                        for row in rows if row['row'] in errors
+                    ],
+                    'message': 'Data validation failed'
+                }
+
+            result = self.repository.bulk_assign_exams([
+                {
+                    'index': row['row'],
+                    'student_id': row['student_number'],
+                    'student_name': row['student_name'],
+                    'exam_id': row['exam_id'],
+                    'device_id': row['device_id']
+                }
+                for row in parsed
+            ])
+            return {
+                'status': 'success',
+                'total_records': len(rows),
+                'inserted': result['inserted'],
+                'updated': result['updated'],
+                'message': 'All distributions imported successfully'
+            }
+
+    def _read_rows(self, file_stream, filename: str) -> list:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in self.ALLOWED_EXTENSIONS:
+            raise ValueError(f"File must be one of: {', '.join(sorted(self.ALLOWED_EXTENSIONS))}")
+        file_stream.seek(0, os.SEEK_END)
+        if file_stream.tell() > self.MAX_FILE_SIZE:
+            raise ValueError(f"File size too large (max {self.MAX_FILE_SIZE//1024//1024}MB)")
+        file_stream.seek(0)
+
+        if extension == '.csv':
+            sheet = csv.reader(io.TextIOWrapper(file_stream, encoding='utf-8-sig', newline=''))
+            workbook = None
+        else:
+            workbook = load_workbook(file_stream, read_only=True, data_only=True)
+            sheet = workbook.active.iter_rows(values_only=True)
+
+        try:
+            header = next(sheet, None)
+            if header is None:
+                return []
+            header = [str(col).strip() if col is not None else '' for col in header]
+            missing = [col for col in self.REQUIRED_COLUMNS if col not in header]
+            if missing:
+                raise ValueError(f"Required columns missing: {', '.join(missing)}")
+            positions = {col: header.index(col) for col in self.COLUMNS if col in header}
+
+            rows = []
+            for row_number, values in enumerate(sheet, start=2):
+                data = {
+                    col: self._clean(values[p]) if p < len(values) else ''
+                    for col, p in positions.items()
+                }
+                if any(data.values()):
+                    rows.append({'row': row_number, 'data': data})
+            return rows
+        finally:
+            if workbook is not None:
+                workbook.close()
+
+    @staticmethod
+    def _clean(value) -> str:
+        if value is None:
+            return ''
+        # الأرقام في Excel تصل float (2023001.0)
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+
+    def _parse_rows(self, rows: list, errors: dict) -> list:
+        parsed = []
+        for row in rows:
+            data = row['data']
+            try:
+                if not data.get('student_number') or not data.get('exam_id'):
+                    raise ValueError("Required value is missing")
+                try:
+                    exam_id = int(data['exam_id'])
+                    device_number = int(data['device_number']) if data.get('device_number') else None
+                except ValueError:
+                    raise ValueError("exam_id and device_number must be integers")
+                room = (data.get('center_name', ''), data.get('room_number', ''))
+                if device_number is None and not all(room):
+                    raise ValueError("device_number or center_name + room_number is required")
+                parsed.append({
+                    'row': row['row'],
+                    'student_number': data['student_number'],
+                    'exam_id': exam_id,
+                    'device_number': device_number,
+                    'room': room if device_number is None else None,
+                    'device_id': None
+                })
+            except ValueError as e:
+                errors[row['row']] = str(e)
+        return parsed
+
+    def _resolve(self, parsed: list, errors: dict) -> None:
+        names = {
+            str(student[1]): student[2]
+            for student in iter_students_by_ids([row['student_number'] for row in parsed])
+        }
+        refs = self.repository.resolve_import_references(
+            {row['exam_id'] for row in parsed},
+            {row['device_number'] for row in parsed if row['device_number'] is not None},
+            {row['room'][0] for row in parsed if row['room']}
+        )
+
+        seen_students = set()
+        seen_devices = defaultdict(list)  # device_id -> مواعيد الاختبارات التي تستخدمه في الملف
+        explicit = []
+        for row in parsed:
+            error = None
+            device = refs['devices'].get(row['device_number'])
+            if row['student_number'] not in names:
+                error = "Student not found"
+            elif row['student_number'] in seen_students:
+                error = "Duplicate student_number in the file"
+            elif row['exam_id'] not in refs['exams']:
+                error = "Exam not found."
+            elif row['room'] and row['room'][0] not in refs['centers']:
+                error = "Center not found."
+            elif row['device_number'] is not None and device is None:
+                error = "Device not found."
+            elif device is not None and device['status'] != 1:
+                error = "Device is not active."
+            elif device is not None and any(slot['exam_id'] == row['exam_id'] for slot in seen_devices[device['id']]):
+                error = "Device is used twice for the same exam in the file"
+            elif device is not None and any(
+                self._slots_overlap(slot, refs['exams'][row['exam_id']]) for slot in seen_devices[device['id']]
+            ):
+                error = "Device is used twice in overlapping exams in the file"
+
+            seen_students.add(row['student_number'])
+            if error:
+                errors[row['row']] = error
+                continue
+
+            row['student_name'] = names[row['student_number']]
+            row['slot'] = refs['exams'][row['exam_id']]
+            if device is not None:
+                row['device_id'] = device['id']
+                seen_devices[device['id']].append(row['slot'])
+                explicit.append({
+                    'index': row['row'], 'student_id': row['student_number'],
+                    'exam_id': row['exam_id'], 'device_id': device['id']
+                })
+            else:
+                row['center_id'] = refs['centers'][row['room'][0]]
+
+        conflicts = self.repository.find_device_conflicts(explicit)
+        for row_number, holder in conflicts.items():
+            errors[row_number] = f"Device is already assigned to student {holder} in an overlapping exam"
+
+    @staticmethod
+    def _slots_overlap(a: dict, b: dict) -> bool:
+        """Same test as the SQL: same exam, or same date and overlapping times (a missing date/time overlaps)."""
+        if a['exam_id'] == b['exam_id']:
+            return True
+        if a['exam_date'] is not None and b['exam_date'] is not None and a['exam_date'] != b['exam_date']:
+            return False
+        if None in (a['exam_start_time'], a['exam_end_time'], b['exam_start_time'], b['exam_end_time']):
+            return True
+        return a['exam_start_time'] < b['exam_end_time'] and b['exam_start_time'] < a['exam_end_time']
+
+    def _seat_rooms(self, parsed: list, errors: dict) -> None:
+        """
+        Give every room row the next free device of its room (per exam, rooms in file order).
+        Devices taken in the file by the same exam or by an exam with an overlapping slot
+        (explicit rows, or room rows seated for an earlier exam) are never handed out again.
+        """
+        by_exam = defaultdict(lambda: defaultdict(list))
+        for row in parsed:
+            if row['room'] and row['row'] not in errors:
+                by_exam[row['exam_id']][(row['center_id'], row['room'][1])].append(row)
+
+        for exam_id, rooms in by_exam.items():
+            devices = self.repository.get_allocation_devices(exam_id, list({key[0] for key in rooms}))
+            current = {a['student_id']: a['device_id'] for a in self.repository.get_exam_assignments(exam_id)}
+            file_students = {row['student_number'] for row in parsed}
+            slot = next(iter(rooms.values()))[0]['slot']
+            # أجهزة محجوزة: أجهزة الملف لهذا الاختبار أو لاختبار متداخل معه + طلاب الاختبار غير الموجودين في الملف
+            reserved = {
+                row['device_id'] for row in parsed
+                if row['device_id'] and self._slots_overlap(row['slot'], slot)
+            }
+            reserved |= {device_id for student_id, device_id in current.items() if student_id not in file_students}
+
+            for (center_id, room_number), room_rows in rooms.items():
+                room_devices = [d for d in devices if d['center_id'] == center_id and d['room_number'] == room_number]
+                plan = build_seating_plan(
+                    [{'student_id': row['student_number'], 'student_name': row['student_name']} for row in room_rows],
+                    room_devices, current, reserved=reserved
+                )
+                seats = {a['student_id']: a['device_id'] for a in plan['assignments']}
+                for row in room_rows:
+                    if row['student_number'] in seats:
+                        row['device_id'] = seats[row['student_number']]
+                    else:
+                        errors[row['row']] = f"No free device left in room {room_number}"
@@ -1,5 +1,12 @@
 from typing import List, Dict, Optional
+from datetime import datetime
 from database.academic.exam_distribution_repository import ExamDistributionRepository
+from services.students_service import STUDENTS_BACKEND, iter_students_by_ids
+from services.academic.roster_export import iter_roster_csv, iter_roster_xlsx
+
+# حد أعلى لعدد الصفوف في طلب التوزيع الجماعي الواحد
+BULK_ASSIGN_MAX_ROWS = 20000
+ROSTER_MAX_PAGE_SIZE = 1000
 
 
 class ExamDistributionService:
@@ -15,6 +22,56 @@ class ExamDistributionService:
             device_id=device_id
         )
 
+    def bulk_assign_exams(self, assignments: List[Dict]) -> Dict:
+        """
+        Assign exams to many students at once.
+        Rows failing validation are reported with their position in `assignments`
+        next to the rows the database rejected (unknown exam/device, duplicates).
+        """
+        if not isinstance(assignments, list) or not assignments:
+            raise ValueError("assignments must be a non-empty list")
+        if len(assignments) > BULK_ASSIGN_MAX_ROWS:
+            raise ValueError(f"At most {BULK_ASSIGN_MAX_ROWS} assignments are allowed per request")
+
+        valid_rows, invalid_rows = [], []
+        for index, row in enumerate(assignments):
+            try:
+                valid_rows.append(self._validate_assignment(index, row))
+            except ValueError as e:
+                student_id = row.get('student_id') if isinstance(row, dict) else None
+                invalid_rows.append({'index': index, 'student_id': student_id, 'error': str(e)})
+
+        result = self.repository.bulk_assign_exams(valid_rows)
+        result['errors'] = sorted(invalid_rows + result['errors'], key=lambda e: e['index'])
+        result['total'] = len(assignments)
+        return result
+
+    @staticmethod
+    def _validate_assignment(index: int, row) -> Dict:
+        if not isinstance(row, dict):
+            raise ValueError("Assignment must be an object")
+        if not all(row.get(k) not in (None, '') for k in ('student_id', 'student_name', 'exam_id')):
+            raise ValueError("Missing required fields")
+
+        student_id, student_name = str(row['student_id']).strip(), str(row['student_name']).strip()
+        if not student_id or not student_name:
+            raise ValueError("Missing required fields")
+        if len(student_id) > 50 or len(student_name) > 100:
+            raise ValueError("student_id or student_name is too long")
+        try:
+            exam_id = int(row['exam_id'])
+            device_id = int(row['device_id']) if row.get('device_id') is not None else None
+        except (TypeError, ValueError):
+            raise ValueError("exam_id and device_id must be integers")
+
+        return {
+            'index': index,
+            'student_id': student_id,
+            'student_name': student_name,
+            'exam_id': exam_id,
+            'device_id': device_id
+        }
+
     def update_exam_distribution(self, distribution_id: int, student_name: str = None, 
                                exam_id: int = None, device_id: int = None):
         return self.repository.update_exam_distribution(
@@ -55,6 +112,44 @@ class ExamDistributionService:
 
 
 
+    ROSTER_FORMATS = {
+        'csv': ('text/csv; charset=utf-8', iter_roster_csv),
+        'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', iter_roster_xlsx)
+    }
+
+    def get_roster_page(self, exam_id: int, page: int = 1, page_size: int = 500) -> Dict:
+        """One page of the numbered roster of an exam (center, room, seat order)."""
+        if page < 1 or not 1 <= page_size <= ROSTER_MAX_PAGE_SIZE:
+            raise ValueError(f"page must be >= 1 and page_size between 1 and {ROSTER_MAX_PAGE_SIZE}")
+        header = self.repository.get_report_header(exam_id)
+        snapshot = self.repository.ensure_roster_snapshot(exam_id)
+        rows = list(self.repository.iter_roster_rows(exam_id, offset=(page - 1) * page_size, limit=page_size))
+        return {
+            'exam_id': exam_id,
+            'header': header,
+            'page': page,
+            'page_size': page_size,
+            'total': snapshot['student_count'],
+            'rooms': snapshot['room_count'],
+            'built_at': snapshot['built_at'].isoformat(),
+            'rows': rows
+        }
+
+    def export_roster(self, exam_id: int, file_format: str):
+        """
+        (mimetype, chunks) for the whole roster of an exam as CSV or XLSX.
+        The header and snapshot are checked before returning, so a missing exam
+        fails with ValueError instead of in the middle of the stream.
+        """
+        if file_format not in self.ROSTER_FORMATS:
+            raise ValueError(f"Unsupported format: {file_format}")
+        header = self.repository.get_report_header(exam_id)
+        self.repository.ensure_roster_snapshot(exam_id)
+        mimetype, writer = self.ROSTER_FORMATS[file_format]
+        rows = self.repository.iter_roster_rows(exam_id)
+        chunks = writer(rows) if file_format == 'csv' else writer(header, rows)
+        return mimetype, chunks
+
     def get_student_info(self, student_id: str) -> Dict:
         """
         Get student information by ID
@@ -79,6 +174,24 @@ class ExamDistributionService:
         return student_data
 
 
+    def get_checkin_profile(self, student_id: str) -> Dict:
+        """
+        Student information and stored face vector for /identity/verify in one lookup.
+
+        Raises:
+            ValueError: For invalid input or student not found
+        """
+        if not student_id or not isinstance(student_id, str):
+            raise ValueError("Valid student ID must be provided")
+
+        profile = self.repository.get_checkin_profile(student_id)
+
+        if not profile:
+            raise ValueError("Student not found in the system")
+
+        return profile
+
+
     def get_distribution_by_id(self, distribution_id: int):
         return self.repository.get_distribution_by_id(distribution_id)
 
@@ -98,4 +211,22 @@ class ExamDistributionService:
 
     def get_exam_distribution_by_student(self,student_id: str) -> dict:
         #لحلب بيانات اختبار الطالب من جدول توزيع الاختبارات
-        return self.repository.get_exam_distribution_by_student(student_id)
\ No newline at end of file
+        return self.repository.get_exam_distribution_by_student(student_id)
+
+    def get_search_enrichment(self, student_ids: List[str], current_datetime: datetime = None) -> Dict[str, Dict]:
+        """
+        بيانات الطلاب + التوزيع + الاختبار + صلاحية الوقت لنتائج البحث باستعلام واحد
+        Returns {student_id: student_info} in search order; students not in the store are left out.
+        """
+        current_datetime = current_datetime or datetime.now()
+        include_profile = STUDENTS_BACKEND == "postgres"
+        rows = self.repository.get_search_enrichment(student_ids, current_datetime, include_profile)
+
+        profiles = None
+        if not include_profile and rows:
+            # الطلاب ما زالوا في SQLite: استعلام واحد ثم ربط بالقاموس
+            profiles = {
+                str(student[1]): dict(zip(ExamDistributionRepository.PROFILE_KEYS, student[1:8]))
+                for student in iter_students_by_ids(student_ids)
+            }
+        return ExamDistributionRepository._format_search_enrichment(rows, current_datetime, profiles)
@@ -1,64 +1,64 @@
 # service.py
 import pandas as pd
 from io import BytesIO
-from datetime import date, time
 import os
-import datetime
+from datetime import date, datetime, time
+from openpyxl import load_workbook
 from database.academic.exam_excel_repository import ExamsExcelRepository
 
 class ExamsExcelService:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS = {'.xlsx', '.xls'}
-    
+
     REQUIRED_COLUMNS = [
         'course_id', 'major_id', 'college_id', 'level_id',
         'year_id', 'semester_id', 'exam_date', 'exam_start_time', 'exam_end_time'
     ]
+    INT_COLUMNS = REQUIRED_COLUMNS[:6]
+
+    # HH:MM أو HH:MM:SS فقط؛ لا "1:00 PM" ولا "10:00-11:00"
+    TIME_PATTERN = r'^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*$'
 
     def __init__(self):
         self.repo = ExamsExcelRepository()
 
     def import_exams_from_excel(self, file_stream: BytesIO, filename: str) -> dict:
+        """
+        Parse (streamed, column by column), validate and insert an exams timetable.
+        Nothing is inserted unless every row is valid; otherwise every invalid row
+        is reported with its sheet row number, the error and its raw values.
+        """
         self._validate_file(file_stream, filename)
-       
-        try:
 
+        try:
             # التأكد من أن مؤشر القراءة في بداية الملف
             file_stream.seek(0)
 
-            df = pd.read_excel(file_stream)
+            df = self._read_columns(file_stream, filename)
             if df.empty:
                 raise ValueError("Uploaded file is empty")
-            df.columns = [col.strip() for col in df.columns]
-        
-            self._validate_columns(df.columns)
-           
-            # إعادة تعيين المؤشر مرة أخرى بعد التحقق
-            file_stream.seek(0)
 
-            exams_data, validation_errors = self._prepare_exams_data(df)
-           
+            records, validation_errors = self._prepare_exams_data(df)
+
             if validation_errors:
-                return {
-                    'status': 'validation_failed',
-                    'total_records': len(df),
-                    'invalid_records': validation_errors,
-                    'message': 'Data validation failed'
-                }
-            
-            db_validation_errors = self.repo.validate_exams_data(exams_data)
-           
-            if db_validation_errors:
-                return self._format_db_validation_errors(db_validation_errors, df)
-            
-            self.repo.bulk_create_exams(exams_data)
-          
+                return self._validation_failed(df, validation_errors, 'Data validation failed')
+
+            inserted, reference_errors = self.repo.import_exams(records)
+
+            if reference_errors:
+                return self._validation_failed(df, [
+                    (error['row'], f"Reference value does not exist: {error['column']}")
+                    for error in reference_errors
+                ], 'Database validation failed')
+
             return {
                 'status': 'success',
-                'total_records': len(exams_data),
+                'total_records': inserted,
                 'message': 'All exams imported successfully'
             }
-            
+
+        except ValueError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Import process failed: {str(e)}")
 
@@ -66,11 +66,11 @@ class ExamsExcelService:
         file_ext = os.path.splitext(filename)[1].lower()
         if file_ext not in self.ALLOWED_EXTENSIONS:
             raise ValueError(f"File must be Excel format ({', '.join(self.ALLOWED_EXTENSIONS)})")
-        
+
         file_stream.seek(0, os.SEEK_END)
         file_size = file_stream.tell()
         file_stream.seek(0)
-        
+
         if file_size > self.MAX_FILE_SIZE:
             raise ValueError(f"File size too large (max {self.MAX_FILE_SIZE//1024//1024}MB)")
 
@@ -80,111 +80,135 @@ class ExamsExcelService:
         if missing:
             raise ValueError(f"Required columns missing: {', '.join(missing)}")
 
+    def _iter_sheet_rows(self, file_stream: BytesIO, filename: str):
+        if os.path.splitext(filename)[1].lower() == '.xls':
+            # openpyxl لا يقرأ صيغة xls القديمة
+            df = pd.read_excel(file_stream, dtype=object)
+            yield tuple(df.columns)
+            yield from df.itertuples(index=False, name=None)
+            return
+
+        workbook = load_workbook(file_stream, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def _read_columns(self, file_stream: BytesIO, filename: str) -> pd.DataFrame:
+        """
+        Stream the sheet row by row and keep only the required columns, one list per
+        column. The frame is indexed by sheet row number (header = row 1); empty rows are skipped.
+        """
+        rows = self._iter_sheet_rows(file_stream, filename)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("Uploaded file is empty")
+        header = [str(col).strip() if col is not None else '' for col in header]
+        self._validate_columns(header)
+        positions = [header.index(col) for col in self.REQUIRED_COLUMNS]
+
+        columns = {col: [] for col in self.REQUIRED_COLUMNS}
+        row_numbers = []
+        for row_number, row in enumerate(rows, start=2):
+            # النصوص الفارغة تُعامل كقيم ناقصة
+            values = [self._blank_to_none(row[p]) if p < len(row) else None for p in positions]
+            if all(v is None for v in values):
+                continue
+            row_numbers.append(row_number)
+            for col, value in zip(self.REQUIRED_COLUMNS, values):
+                columns[col].append(value)
+
+        return pd.DataFrame(columns, index=row_numbers, dtype=object)
+
+    @staticmethod
+    def _blank_to_none(value):
+        if isinstance(value, str):
+            return value if value.strip() else None
+        return None if pd.isna(value) else value
+
+    @staticmethod
+    def _date_text(value) -> str:
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y-%m-%d')
+        return str(value).strip()
+
+    @staticmethod
+    def _time_text(value) -> str:
+        if isinstance(value, (datetime, time)):
+            return value.strftime('%H:%M:%S')
+        return str(value).strip()
+
     def _prepare_exams_data(self, df: pd.DataFrame) -> tuple:
-        exams_data = []
-        validation_errors = []
-        print('Preparing and validating exams data')
-       
-        for index, row in df.iterrows():
-            try:
-                record = (
-                    self._convert_int(row['course_id']),
-                    self._convert_int(row['major_id']),
-                    self._convert_int(row['college_id']),
-                    self._convert_int(row['level_id']),
-                    self._convert_int(row['year_id']),
-                    self._convert_int(row['semester_id']),
-                    self._convert_date(row['exam_date']),
-                    self._convert_time(row['exam_start_time']),
-                    self._convert_time(row['exam_end_time'])
-                )
-                
-                if record[-2] >= record[-1]:
-                    raise ValueError("Start time must be before end time")
-                    
-                exams_data.append(record)
-            except ValueError as e:
-                validation_errors.append({
-                    'row': index + 2,
-                    'error': str(e),
-                    'data': self._get_row_data(row)
-                })
-        return exams_data, validation_errors
-
-    def _format_db_validation_errors(self, db_errors, df):
-        errors = []
-        for idx, error_msg in db_errors:
-            row_data = df.iloc[idx]
-            errors.append({
-                'row': idx + 2,
-                'error': self._translate_db_error(error_msg),
-                'data': self._get_row_data(row_data)
-            })
-        
+        """
+        Column-wise conversion. Returns (records, errors): records is a list of
+        (row_number, course_id, ..., exam_end_time) tuples for COPY; errors is [(row, message)]
+        with the first failing column of each invalid row.
+        """
+        errors = pd.Series(None, index=df.index, dtype=object)
+
+        def flag(mask, message):
+            # أول خطأ في الصف هو الذي يُعرض
+            target = mask & errors.isna()
+            if target.any():
+                errors[target] = message[target] if isinstance(message, pd.Series) else message
+
+        converted = {}
+        for col in self.INT_COLUMNS:
+            missing = df[col].isna()
+            numbers = pd.to_numeric(df[col], errors='coerce')
+            flag(missing, "Required value is missing")
+            flag(numbers.isna() & ~missing, "Must be an integer value")
+            converted[col] = numbers.fillna(0).astype('int64')
+
+        text = df['exam_date'].astype(str).str.strip()
+        # خلايا التاريخ الحقيقية تُنسَّق، والنصوص يجب أن تطابق YYYY-MM-DD بالكامل
+        dates = pd.to_datetime(df['exam_date'].map(self._date_text), format='%Y-%m-%d', errors='coerce')
+        missing = df['exam_date'].isna()
+        flag(missing, "Exam date is required")
+        flag(dates.isna() & ~missing, "Invalid date format: " + text)
+        converted['exam_date'] = dates.dt.date
+
+        for col in ('exam_start_time', 'exam_end_time'):
+            text = df[col].astype(str).str.strip()
+            parts = df[col].map(self._time_text).str.extract(self.TIME_PATTERN)
+            hours = pd.to_numeric(parts[0], errors='coerce')
+            minutes = pd.to_numeric(parts[1], errors='coerce')
+            # الثواني اختيارية وتُحفظ كما هي (خلايا الوقت الحقيقية تحملها)
+            seconds = pd.to_numeric(parts[2], errors='coerce').fillna(0)
+            missing = df[col].isna()
+            flag(missing, "Exam time is required")
+            flag((hours.isna() | minutes.isna()) & ~missing, "Invalid time format: " + text)
+            flag(~hours.between(0, 23) & hours.notna(), "Hours must be between 0-23 (got: " + parts[0].astype(str) + ")")
+            flag(~minutes.between(0, 59) & minutes.notna(), "Minutes must be between 0-59 (got: " + parts[1].astype(str) + ")")
+            flag(~seconds.between(0, 59), "Seconds must be between 0-59 (got: " + parts[2].astype(str) + ")")
+            converted[col] = pd.to_timedelta(hours.fillna(0) * 3600 + minutes.fillna(0) * 60 + seconds, unit='s')
+
+        flag(converted['exam_start_time'] >= converted['exam_end_time'], "Start time must be before end time")
+        for col in ('exam_start_time', 'exam_end_time'):
+            converted[col] = (pd.Timestamp(0) + converted[col]).dt.time
+
+        invalid = errors.notna()
+        valid = ~invalid
+        # tolist() يعيد أنواع Python (int/date/time) كما يحتاجها COPY
+        records = list(zip(
+            df.index[valid].tolist(),
+            *(converted[col][valid].tolist() for col in self.REQUIRED_COLUMNS)
+        ))
+        return records, list(errors[invalid].items())
+
+    def _validation_failed(self, df: pd.DataFrame, row_errors, message: str) -> dict:
         return {
             'status': 'validation_failed',
             'total_records': len(df),
-            'invalid_records': errors,
-            'message': 'Database validation failed'
+            'invalid_records': [
+                {'row': row, 'error': error, 'data': self._get_row_data(df.loc[row])}
+                for row, error in row_errors
+            ],
+            'message': message
         }
 
-    def _translate_db_error(self, error_msg: str) -> str:
-        if "null value in column" in error_msg:
-            return "Required value is missing"
-        elif "invalid input syntax for type integer" in error_msg:
-            return "Must be an integer value"
-        elif "invalid input syntax for type date" in error_msg:
-            return "Invalid date format (expected YYYY-MM-DD)"
-        elif "invalid input syntax for type time" in error_msg:
-            return "Invalid time format (expected HH:MM)"
-        elif "violates foreign key constraint" in error_msg:
-            return "Reference value does not exist"
-        return error_msg
-
-    def _convert_int(self, value) -> int:
-        if pd.isna(value):
-            raise ValueError("Required value is missing")
-        try:
-            return int(float(value))
-        except (ValueError, TypeError):
-            raise ValueError("Must be an integer value")
-
-    def _convert_date(self, value) -> date:
-        if pd.isna(value):
-            raise ValueError("Exam date is required")
-        try:
-            if isinstance(value, str):
-                return datetime.strptime(value, '%Y-%m-%d').date()
-            elif isinstance(value, date):
-                return value
-            return pd.to_datetime(value).date()
-        except (ValueError, TypeError) as e:
-            raise ValueError(f"Invalid date format: {value}")
-
-    def _convert_time(self, value) -> time:
-        if pd.isna(value):
-            raise ValueError("Exam time is required")
-        try:
-            if isinstance(value, str):
-                if ':' in value:
-                    parts = value.split(':')
-                    hours = int(parts[0])
-                    minutes = int(parts[1])
-                    
-                    if not (0 <= hours < 24):
-                        raise ValueError(f"Hours must be between 0-23 (got: {hours})")
-                    if not (0 <= minutes < 60):
-                        raise ValueError(f"Minutes must be between 0-59 (got: {minutes})")
-                    
-                    return time(hours, minutes)
-            elif isinstance(value, time):
-                return value
-            return pd.to_datetime(value).time()
-        except (ValueError, TypeError) as e:
-            raise ValueError(f"Invalid time format: {value}")
-        
     def _get_row_data(self, row: pd.Series) -> dict:
         return {
             col: str(row[col]) if not pd.isna(row[col]) else 'NULL'
             for col in self.REQUIRED_COLUMNS
-        }
\ No newline at end of file
+        }
@@ -1,7 +1,9 @@
 from database.academic.levels_repository import LevelsRepository
+from services.reference_cache import get_reference_cache
 
 class LevelsService:
-    
+    cache = get_reference_cache("levels")
+
     def __init__(self, repo=None):
         self.repo = repo or LevelsRepository()
 
@@ -10,7 +12,9 @@ class LevelsService:
             raise ValueError("Level name must be at least 2 characters")
         
         try:
-            return self.repo.create_level(level_name.strip())
+            level = self.repo.create_level(level_name.strip())
+            self.cache.invalidate()
+            return level
         except ValueError as e:
             raise ValueError(str(e))
         except RuntimeError as e:
@@ -18,7 +22,7 @@ class LevelsService:
 
     def get_level(self, level_id):
         try:
-            level = self.repo.get_level(level_id)
+            level = self.cache.get(("id", level_id), lambda: self.repo.get_level(level_id))
             if not level:
                 raise ValueError("Level not found")
             return level
@@ -27,7 +31,7 @@ class LevelsService:
 
     def get_all_levels(self):
         try:
-            return self.repo.get_all_levels()
+            return self.cache.get("all", self.repo.get_all_levels)
         except RuntimeError as e:
             raise RuntimeError("Service temporarily unavailable")
 
@@ -36,7 +40,9 @@ class LevelsService:
             raise ValueError("Level name must be at least 2 characters")
             
         try:
-            return self.repo.update_level(level_id, new_name.strip())
+            level = self.repo.update_level(level_id, new_name.strip())
+            self.cache.invalidate()
+            return level
         except ValueError as e:
             raise ValueError(str(e))
         except RuntimeError as e:
@@ -44,7 +50,9 @@ class LevelsService:
 
     def delete_level(self, level_id):
         try:
-            return self.repo.delete_level(level_id)
+            deleted_id = self.repo.delete_level(level_id)
+            self.cache.invalidate()
+            return deleted_id
         except ValueError as e:
             raise ValueError(str(e))
         except RuntimeError as e:
@@ -1,8 +1,11 @@
 from database.academic.majors_repository import MajorsRepository
 from database.academic.colleges_repository import CollegesRepository
+from services.reference_cache import get_reference_cache
 
 class MajorsService:
-    
+    cache = get_reference_cache("majors")
+    college_cache = get_reference_cache("colleges")
+
     def __init__(self):
         self.majors_repo = MajorsRepository()
         self.colleges_repo = CollegesRepository()
@@ -11,7 +14,7 @@ class MajorsService:
         if not name or len(name.strip()) < 2:
             raise ValueError("Major name must be at least 2 characters")
         
-        if not self.colleges_repo.get_college(college_id):
+        if not self.college_cache.get(("id", college_id), lambda: self.colleges_repo.get_college(college_id)):
             raise ValueError("College does not exist")
             
         existing = [m for m in self.get_majors_by_college(college_id) 
@@ -19,31 +22,35 @@ class MajorsService:
         if existing:
             raise ValueError("Major already exists in this college")
             
-        return self.majors_repo.create_major(name.strip(), college_id)
+        major = self.majors_repo.create_major(name.strip(), college_id)
+        self.cache.invalidate()
+        return major
 
     def get_major(self, major_id):
-        major = self.majors_repo.get_major(major_id)
+        major = self.cache.get(("id", major_id), lambda: self.majors_repo.get_major(major_id))
         if not major:
             raise ValueError("Major not found")
         return major
 
     def get_majors_by_college(self, college_id):
-        return self.majors_repo.get_majors_by_college(college_id)
+        return self.cache.get(("college", college_id), lambda: self.majors_repo.get_majors_by_college(college_id))
 
     def update_major(self, major_id, name, college_id):
         if not name or len(name.strip()) < 2:
             raise ValueError("Major name must be at least 2 characters")
             
-        if not self.colleges_repo.get_college(college_id):
+        if not self.college_cache.get(("id", college_id), lambda: self.colleges_repo.get_college(college_id)):
             raise ValueError("College does not exist")
             
         updated = self.majors_repo.update_major(major_id, name.strip(), college_id)
         if not updated:
             raise ValueError("Major not found")
+        self.cache.invalidate()
         return updated
 
     def delete_major(self, major_id):
         deleted = self.majors_repo.delete_major(major_id)
         if not deleted:
             raise ValueError("Major not found")
+        self.cache.invalidate()
         return {"message": "Major deleted"}
\ No newline at end of file
@@ -0,0 +1,69 @@
+# services/academic/roster_export.py
+"""
+تصدير كشوف التوزيع (CSV / XLSX) على شكل stream
+Both writers consume the rows of ExamDistributionRepository.iter_roster_rows()
+one by one; the XLSX goes through an openpyxl write-only workbook spooled to a
+temporary file, so memory stays flat whatever the size of the exam.
+"""
+import csv
+import io
+import re
+import tempfile
+from itertools import groupby
+from openpyxl import Workbook
+
+ROSTER_COLUMNS = ("center_name", "room_number", "seat_number", "device_number", "student_id", "student_name")
+
+_CHUNK_SIZE = 64 * 1024
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def iter_roster_csv(rows):
+    """CSV text chunks (UTF-8 BOM first so Excel shows the Arabic names correctly)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(ROSTER_COLUMNS)
+    for row in rows:
+        writer.writerow([row[column] for column in ROSTER_COLUMNS])
+        if buffer.tell() >= _CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _sheet_title(center_name, room_number, used):
+    base = _INVALID_SHEET_CHARS.sub("-", f"{center_name} - {room_number}")[:31]
+    title, suffix = base, 1
+    while title in used:
+        suffix += 1
+        title = f"{base[:27]} ({suffix})"
+    used.add(title)
+    return title
+
+
+def iter_roster_xlsx(header, rows):
+    """XLSX bytes chunks: one sheet per room with the exam header above the seat list."""
+    workbook = Workbook(write_only=True)
+    used_titles = set()
+    for (center_name, room_number), room_rows in groupby(rows, key=lambda r: (r["center_name"], r["room_number"])):
+        sheet = workbook.create_sheet(_sheet_title(center_name, room_number, used_titles))
+        sheet.append(["Course", header["course_name"]])
+        sheet.append(["Date", header["exam_date"], header["exam_start_time"], header["exam_end_time"]])
+        sheet.append(["Center", center_name, "Room", room_number])
+        sheet.append([])
+        sheet.append(["#", "Device", "Student ID", "Student name"])
+        for row in room_rows:
+            sheet.append([row["seat_number"], row["device_number"], row["student_id"], row["student_name"]])
+    if not used_titles:
+        workbook.create_sheet("Roster")
+
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,179 @@
+# services/academic/seat_allocation_service.py
+"""
+توزيع الطلاب على أجهزة المراقبة تلقائيًا لاختبار معيّن
+The plan is computed in memory from one read of the candidate devices and the
+current distribution of the exam, then written through the bulk upsert of
+ExamDistributionRepository. Rooms are filled in order: centers in the order
+given, then room number, then device number.
+"""
+from itertools import groupby
+from typing import List, Dict, Optional
+from database.connection import unit_of_work
+from database.academic.exam_distribution_repository import ExamDistributionRepository
+from database.academic.exams_repository import ExamsRepository
+
+
+def build_seating_plan(students: List[Dict], devices: List[Dict], current: Dict[str, Optional[int]],
+                       spacing: int = 0, reassign: bool = False, reserved=()) -> Dict:
+    """
+    Seat `students` ({student_id, student_name}) on `devices` (rows of get_allocation_devices).
+    `current` maps student_id -> device_id of the exam's existing distribution; unless
+    `reassign` is set, a student keeps a device that is still usable. Devices in `reserved`
+    are never handed out. `spacing` leaves that many devices free between two seated
+    devices of a room (by device number).
+    """
+    # الأجهزة الصالحة: كل (spacing + 1) جهاز في الغرفة، وغير محجوزة لاختبار متداخل
+    usable = []
+    rooms = []
+    for (center_id, room_number), room_devices in groupby(devices, key=lambda d: (d['center_id'], d['room_number'])):
+        room = {'center_id': center_id, 'room_number': room_number, 'seats': 0, 'used': 0}
+        for position, device in enumerate(room_devices):
+            if position % (spacing + 1) == 0 and not device['busy'] and device['id'] not in reserved:
+                usable.append((device, room))
+                room['seats'] += 1
+        rooms.append(room)
+    usable_ids = {device['id'] for device, _ in usable}
+
+    kept = {}
+    taken = set()
+    if not reassign:
+        for student in students:
+            device_id = current.get(student['student_id'])
+            if device_id in usable_ids and device_id not in taken:
+                kept[student['student_id']] = device_id
+                taken.add(device_id)
+
+    free_seats = ((device, room) for device, room in usable if device['id'] not in taken)
+    for device, room in usable:
+        if device['id'] in taken:
+            room['used'] += 1
+
+    assignments, unassigned = [], []
+    for student in students:
+        device_id = kept.get(student['student_id'])
+        if device_id is None:
+            seat = next(free_seats, None)
+            if seat is None:
+                unassigned.append(student['student_id'])
+                continue
+            device, room = seat
+            device_id = device['id']
+            room['used'] += 1
+        assignments.append({
+            'student_id': student['student_id'],
+            'student_name': student['student_name'],
+            'device_id': device_id
+        })
+
+    return {
+        'capacity': len(usable),
+        'kept': len(kept),
+        'seated': len(assignments) - len(kept),
+        'unassigned': unassigned,
+        'rooms': [
+            {
+                'center_id': room['center_id'],
+                'room_number': room['room_number'],
+                'seats': room['seats'],
+                'used': room['used']
+            }
+            for room in rooms
+        ],
+        'assignments': assignments
+    }
+
+
+class SeatAllocationService:
+    def __init__(self):
+        self.repository = ExamDistributionRepository()
+        self.exams_repository = ExamsRepository()
+
+    def allocate(self, exam_id: int, center_ids: List[int], students: Optional[List[Dict]] = None,
+                 spacing: int = 0, dry_run: bool = False, reassign: bool = False) -> Dict:
+        """
+        Seat the students of an exam on the active devices of `center_ids`.
+        `students` ({student_id, student_name}) defaults to the students already
+        distributed to the exam. A student has one distribution row (UNIQUE(student_id)),
+        so a student distributed to another exam is moved to this one, like every other
+        assignment path does; only when that exam's slot overlaps this one the student
+        is not moved and is listed in "rejected".
+        With dry_run the plan is returned without writing it.
+        Raises ValueError when the exam is unknown or the free seats are not enough.
+        """
+        exam_id, center_ids, spacing = self._validate(exam_id, center_ids, spacing)
+        if students is not None:
+            students = self._validate_students(students)
+
+        if not self.exams_repository.get_exam_by_id(exam_id):
+            raise ValueError("Exam not found.")
+
+        with unit_of_work():
+            if not dry_run:
+                self.repository.lock_allocation()
+            devices = self.repository.get_allocation_devices(exam_id, center_ids)
+            existing = self.repository.get_exam_assignments(exam_id)
+            rejected = []
+            if students is None:
+                students = existing
+            else:
+                overlapping = self.repository.get_overlapping_exam_assignments(
+                    exam_id, [student['student_id'] for student in students]
+                )
+                rejected = [
+                    {
+                        'student_id': student_id,
+                        'error': f"Student is already distributed to exam {other_exam_id}, whose time overlaps this exam"
+                    }
+                    for student_id, other_exam_id in overlapping.items()
+                ]
+                students = [student for student in students if student['student_id'] not in overlapping]
+            current = {row['student_id']: row['device_id'] for row in existing}
+            # طلاب الاختبار غير المشمولين بهذه الخطة يحتفظون بأجهزتهم
+            seated_ids = {student['student_id'] for student in students}
+            reserved = {device_id for student_id, device_id in current.items() if student_id not in seated_ids}
+
+            plan = build_seating_plan(students, devices, current, spacing, reassign, reserved)
+            plan.update({'exam_id': exam_id, 'dry_run': dry_run, 'students': len(students), 'rejected': rejected})
+
+            if plan['unassigned'] and not dry_run:
+                raise ValueError(
+                    f"Not enough free devices: {len(students)} students, {plan['capacity']} usable seats"
+                )
+            if dry_run:
+                return plan
+
+            result = self.repository.bulk_assign_exams([
+                {**row, 'index': index, 'exam_id': exam_id}
+                for index, row in enumerate(plan.pop('assignments'))
+            ])
+            plan.update(result)
+            return plan
+
+    @staticmethod
+    def _validate(exam_id, center_ids, spacing):
+        try:
+            exam_id = int(exam_id)
+            spacing = int(spacing or 0)
+            center_ids = [int(c) for c in center_ids]
+        except (TypeError, ValueError):
+            raise ValueError("exam_id, center_ids and spacing must be integers")
+        if exam_id <= 0:
+            raise ValueError("Exam ID must be a positive number")
+        if not center_ids:
+            raise ValueError("center_ids must be a non-empty list")
+        if spacing < 0:
+            raise ValueError("spacing must not be negative")
+        # نفس المركز مرتين لا يضيف مقاعد
+        return exam_id, list(dict.fromkeys(center_ids)), spacing
+
+    @staticmethod
+    def _validate_students(students) -> List[Dict]:
+        if not isinstance(students, list):
+            raise ValueError("students must be a list")
+        unique = {}
+        for row in students:
+            if not isinstance(row, dict) or not row.get('student_id') or not row.get('student_name'):
+                raise ValueError("Each student needs student_id and student_name")
+            student_id = str(row['student_id']).strip()
+            unique[student_id] = {'student_id': student_id, 'student_name': str(row['student_name']).strip()}
+        return list(unique.values())
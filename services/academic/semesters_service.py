@@ -1,7 +1,10 @@
 from typing import List, Dict, Optional
 from database.academic.semesters_repository import SemestersRepository
+from services.reference_cache import get_reference_cache
 
 class SemestersService:
+    cache = get_reference_cache("semesters")
+
     def __init__(self):
         self.repo = SemestersRepository()
 
@@ -12,18 +15,20 @@ class SemestersService:
         if len(semester_name) > 50:
             raise ValueError("Semester name exceeds maximum length (50 chars)")
         
-        return self.repo.create_semester(semester_name)
+        semester = self.repo.create_semester(semester_name)
+        self.cache.invalidate()
+        return semester
 
     def get_all_semesters(self) -> List[Dict]:
         """Get all semesters"""
-        return self.repo.get_all_semesters()
+        return self.cache.get("all", self.repo.get_all_semesters)
 
     def get_semester_by_id(self, semester_id: int) -> Optional[Dict]:
         """Get semester by ID with validation"""
         if not isinstance(semester_id, int) or semester_id <= 0:
             raise ValueError("Invalid semester ID")
         
-        result = self.repo.get_semester_by_id(semester_id)
+        result = self.cache.get(("id", semester_id), lambda: self.repo.get_semester_by_id(semester_id))
         if not result:
             raise ValueError("Semester not found")
         return result
@@ -37,7 +42,9 @@ class SemestersService:
         if len(semester_name) > 50:
             raise ValueError("Semester name exceeds maximum length (50 chars)")
         
-        return self.repo.update_semester(semester_id, semester_name)
+        semester = self.repo.update_semester(semester_id, semester_name)
+        self.cache.invalidate()
+        return semester
 
     def delete_semester(self, semester_id: int) -> Dict:
         """Delete semester with validation"""
@@ -45,5 +52,6 @@ class SemestersService:
             raise ValueError("Invalid semester ID")
         
         if self.repo.delete_semester(semester_id):
+            self.cache.invalidate()
             return {"message": "Semester deleted successfully"}
         raise RuntimeError("Failed to delete semester")
\ No newline at end of file
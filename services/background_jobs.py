@@ -0,0 +1,189 @@
+# services/background_jobs.py
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from database.background_jobs_repository import BackgroundJobsRepository
+
+
+class BackgroundJobs:
+    """
+    سجل بسيط للمهام الخلفية داخل العملية (threads)
+    Jobs report progress through the `job` dict passed to them; finished jobs stay
+    queryable until the registry trims the oldest ones. Jobs started with
+    submit_shared() are also written to the background_jobs table (progress and a
+    heartbeat every SHARED_FLUSH_INTERVAL seconds), so any worker process can answer
+    get(). A shared job without a heartbeat for SHARED_STALE_AFTER seconds belongs to
+    a dead worker and is marked failed; finished rows are kept SHARED_RETENTION_DAYS.
+    """
+    MAX_FINISHED_JOBS = 100
+    SHARED_FLUSH_INTERVAL = 2.0
+    SHARED_STALE_AFTER = 60
+    SHARED_RETENTION_DAYS = 7
+    FINAL_FLUSH_ATTEMPTS = 3
+
+    _jobs = {}
+    _reserved = {}
+    _lock = threading.Lock()
+    _repository = None
+
+    @classmethod
+    def submit(cls, name, target, *args, **kwargs):
+        """Run `target(job, *args, **kwargs)` in a daemon thread and return the job id."""
+        job = cls._new_job(name)
+        cls._launch(job, target, args, kwargs, shared=False)
+        return job["id"]
+
+    @classmethod
+    def submit_shared(cls, name, target, *args, **kwargs):
+        """Same as submit(), with the job state visible to every worker process."""
+        return cls.start_reserved(cls.reserve_shared(name), target, *args, **kwargs)
+
+    @classmethod
+    def reserve_shared(cls, name):
+        """
+        Write the 'running' row of a shared job without starting it. Inside unit_of_work()
+        the row commits with the caller's checks (e.g. find_running_shared under a lock);
+        call start_reserved() after the commit.
+        """
+        job = cls._new_job(name)
+        cls._trim_shared()
+        # يفشل الطلب مباشرة إذا تعذّر تسجيل المهمة
+        cls._get_repository().save(job)
+        with cls._lock:
+            cls._reserved[job["id"]] = job
+        return job["id"]
+
+    @classmethod
+    def start_reserved(cls, job_id, target, *args, **kwargs):
+        with cls._lock:
+            job = cls._reserved.pop(job_id)
+        cls._launch(job, target, args, kwargs, shared=True)
+        return job_id
+
+    @classmethod
+    def _get_repository(cls):
+        if cls._repository is None:
+            cls._repository = BackgroundJobsRepository()
+        return cls._repository
+
+    @classmethod
+    def _flush(cls, job):
+        """Write a snapshot of the job; the caller holds the job's flush lock."""
+        try:
+            cls._get_repository().save(dict(job, progress=dict(job["progress"])))
+            return True
+        except Exception:
+            # التقدم يُعاد حفظه في الدورة التالية
+            traceback.print_exc()
+            return False
+
+    @classmethod
+    def _flush_final(cls, job):
+        # بدون الحالة النهائية يبقى الصف 'running' حتى تنتهي مهلة النبض
+        for _ in range(cls.FINAL_FLUSH_ATTEMPTS):
+            if cls._flush(job):
+                return
+            time.sleep(cls.SHARED_FLUSH_INTERVAL)
+
+    @classmethod
+    def _trim_shared(cls):
+        try:
+            repository = cls._get_repository()
+            repository.expire_stale(cls.SHARED_STALE_AFTER)
+            repository.delete_finished_before(cls.SHARED_RETENTION_DAYS)
+        except Exception:
+            traceback.print_exc()
+
+    @staticmethod
+    def _new_job(name):
+        return {
+            "id": uuid.uuid4().hex,
+            "name": name,
+            "status": "running",
+            "progress": {},
+            "result": None,
+            "error": None,
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None
+        }
+
+    @classmethod
+    def _launch(cls, job, target, args, kwargs, shared):
+        job_id = job["id"]
+        name = job["name"]
+        with cls._lock:
+            cls._trim()
+            cls._jobs[job_id] = job
+
+        finished = threading.Event()
+        # لقطة التقدم والحالة النهائية لا تُكتبان في الوقت نفسه
+        flush_lock = threading.Lock()
+
+        def run():
+            final = {}
+            try:
+                final["result"] = target(job, *args, **kwargs)
+                final["status"] = "completed"
+            except Exception as e:
+                final["status"] = "failed"
+                final["error"] = str(e)
+                traceback.print_exc()
+            finally:
+                with flush_lock:
+                    job.update(final, finished_at=datetime.now().isoformat())
+                    finished.set()
+                    if shared:
+                        cls._flush_final(job)
+
+        def flush_progress():
+            while not finished.wait(cls.SHARED_FLUSH_INTERVAL):
+                with flush_lock:
+                    if not finished.is_set():
+                        cls._flush(job)
+
+        threading.Thread(target=run, name=f"job-{name}-{job_id[:8]}", daemon=True).start()
+        if shared:
+            threading.Thread(target=flush_progress, name=f"job-flush-{job_id[:8]}", daemon=True).start()
+
+    @classmethod
+    def get(cls, job_id):
+        """The job of this process, otherwise a shared job written by another worker."""
+        with cls._lock:
+            job = cls._jobs.get(job_id)
+            if job:
+                return dict(job)
+        try:
+            repository = cls._get_repository()
+            repository.expire_stale(cls.SHARED_STALE_AFTER)
+            return repository.get(job_id)
+        except Exception:
+            return None
+
+    @classmethod
+    def find_running(cls, name):
+        """Return the running job with this name, used to prevent duplicate jobs."""
+        with cls._lock:
+            for job in cls._jobs.values():
+                if job["name"] == name and job["status"] == "running":
+                    return dict(job)
+        return None
+
+    @classmethod
+    def find_running_shared(cls, name):
+        """Like find_running(), across every worker process (jobs of dead workers are expired first)."""
+        running = cls.find_running(name)
+        if running:
+            return running
+        repository = cls._get_repository()
+        repository.expire_stale(cls.SHARED_STALE_AFTER)
+        return repository.find_running(name)
+
+    @classmethod
+    def _trim(cls):
+        finished = [j for j in cls._jobs.values() if j["status"] != "running"]
+        if len(finished) >= cls.MAX_FINISHED_JOBS:
+            finished.sort(key=lambda j: j["finished_at"] or "")
+            for job in finished[:len(finished) - cls.MAX_FINISHED_JOBS + 1]:
+                cls._jobs.pop(job["id"], None)
@@ -0,0 +1,294 @@
+# services/bulk_enrollment_service.py
+"""
+تسجيل دفعة كاملة من الطلاب: ملف بيانات (XLSX/CSV) + أرشيف صور ZIP في مهمة خلفية واحدة
+Photos are read member by member from the ZIP (never extracted as a whole) and
+stored under their SHA-256, so the same photo uploaded twice is kept once.
+Students are written with one bulk insert, faces are encoded in the process pool
+in batches, and every batch of vectors is written with one bulk upsert. The job
+state is shared through the database so any worker can report its progress.
+"""
+import csv
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import as_completed
+from openpyxl import load_workbook
+from database.face_chip_archive import FaceChipArchive
+from database.vectors_repository import VectorsRepository, StaleEncoderVersionError
+from services.background_jobs import BackgroundJobs
+from services.encoder_version_service import EncoderVersionService
+from services.encoding_executor import get_encoding_executor
+from services.image_processor import ImageProcessor
+from services.students_service import student_db, ALLOWED_EXTENSIONS, MAX_IMAGE_SIZE, IMAGE_FOLDER
+
+
+class BulkEnrollmentService:
+    JOB_NAME = "bulk_enrollment"
+    RECORD_EXTENSIONS = {'.xlsx', '.csv'}
+    REQUIRED_COLUMNS = ["Number", "StudentName", "College", "Level", "Specialization", "Gender"]
+    PHOTO_COLUMN = "Photo"  # اختياري: اسم الصورة داخل الـ ZIP، وإلا يُبحث عن <Number>.jpg/.jpeg/.png
+    ENCODING_BATCH_SIZE = 200
+    _COPY_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self):
+        self.vectors_repo = VectorsRepository()
+        self.archive = FaceChipArchive()
+        self.encoder_service = EncoderVersionService(vectors_repo=self.vectors_repo, archive=self.archive)
+
+    def start(self, records_file, records_filename, photos_file):
+        """
+        Save both uploads to a private temp directory and start the enrollment job.
+        The record columns are checked before returning so a wrong file fails at once.
+        Returns the job id (see get_job).
+        """
+        extension = os.path.splitext(records_filename or '')[1].lower()
+        if extension not in self.RECORD_EXTENSIONS:
+            raise ValueError(f"Records file must be one of: {', '.join(sorted(self.RECORD_EXTENSIONS))}")
+
+        work_dir = tempfile.mkdtemp(prefix="bulk_enroll_")
+        try:
+            records_path = os.path.join(work_dir, f"records{extension}")
+            photos_path = os.path.join(work_dir, "photos.zip")
+            records_file.save(records_path)
+            photos_file.save(photos_path)
+            if not zipfile.is_zipfile(photos_path):
+                raise ValueError("Photos must be a ZIP archive")
+
+            rows = self._iter_records(records_path)
+            self._validate_columns(next(rows, None))
+            rows.close()
+        except Exception:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+
+        return BackgroundJobs.submit_shared(self.JOB_NAME, self._run, records_path, photos_path, work_dir)
+
+    def get_job(self, job_id):
+        return BackgroundJobs.get(job_id)
+
+    def _iter_records(self, path):
+        """Yield the header row, then every data row, as lists of values."""
+        if path.endswith('.csv'):
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                yield from csv.reader(f)
+            return
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+
+    def _validate_columns(self, header):
+        if not header:
+            raise ValueError("Records file is empty")
+        columns = [str(col).strip() if col is not None else '' for col in header]
+        missing = [col for col in self.REQUIRED_COLUMNS if col not in columns]
+        if missing:
+            raise ValueError(f"Required columns missing: {', '.join(missing)}")
+        return columns
+
+    @staticmethod
+    def _clean(value):
+        if value is None:
+            return ''
+        # الأرقام في Excel تصل float (2023001.0)
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+
+    def _validate_record(self, record, seen_numbers):
+        missing = [col for col in self.REQUIRED_COLUMNS if not record.get(col)]
+        if missing:
+            raise ValueError(f"Required value is missing: {', '.join(missing)}")
+        if record["Number"] in seen_numbers:
+            raise ValueError("Duplicate enrollment number in the file")
+        if len(record["Level"]) != 1:
+            raise ValueError("Level must be one character")
+        if record["Gender"] not in ('0', '1'):
+            raise ValueError("Gender must be 0 (female) or 1 (male)")
+
+    @staticmethod
+    def _index_photos(zip_file):
+        """Map lower-case member name and name-without-extension to the ZIP entry."""
+        index = {}
+        for info in zip_file.infolist():
+            if info.is_dir():
+                continue
+            name = os.path.basename(info.filename).lower()
+            index.setdefault(name, info)
+            index.setdefault(os.path.splitext(name)[0], info)
+        return index
+
+    def _store_photo(self, zip_file, info):
+        """Copy one ZIP member into IMAGE_FOLDER as <sha256>.<ext> and return that name."""
+        extension = os.path.splitext(info.filename)[1][1:].lower()
+        if extension not in ALLOWED_EXTENSIONS:
+            raise ValueError("Invalid image format. Only PNG, JPG, and JPEG are allowed.")
+        if info.file_size > MAX_IMAGE_SIZE:
+            raise ValueError("Image size exceeds 2MB")
+
+        os.makedirs(IMAGE_FOLDER, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=IMAGE_FOLDER, suffix=".tmp", delete=False) as tmp:
+            try:
+                with zip_file.open(info) as member:
+                    for chunk in iter(lambda: member.read(self._COPY_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        tmp.write(chunk)
+            except Exception:
+                os.remove(tmp.name)
+                raise
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        path = os.path.join(IMAGE_FOLDER, filename)
+        if os.path.exists(path):
+            os.remove(tmp.name)  # نفس المحتوى محفوظ مسبقًا
+        else:
+            os.replace(tmp.name, path)
+        return filename
+
+    def _run(self, job, records_path, photos_path, work_dir):
+        try:
+            return self._enroll(job, records_path, photos_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _enroll(self, job, records_path, photos_path):
+        report = {}  # Number -> سطر التقرير
+        failed = []
+        pending = []  # (row, record) جاهزة للإدخال
+        job["progress"] = {"stage": "reading", "rows": 0, "students_created": 0, "vectors_created": 0}
+
+        with zipfile.ZipFile(photos_path) as zip_file:
+            photos = self._index_photos(zip_file)
+            rows = self._iter_records(records_path)
+            columns = self._validate_columns(next(rows, None))
+            seen_numbers = set()
+
+            for row_number, values in enumerate(rows, start=2):
+                record = {col: self._clean(values[i]) if i < len(values) else '' for i, col in enumerate(columns)}
+                if not any(record.values()):
+                    continue
+                job["progress"]["rows"] += 1
+                try:
+                    self._validate_record(record, seen_numbers)
+                    seen_numbers.add(record["Number"])
+                    photo_key = os.path.basename(record.get(self.PHOTO_COLUMN) or record["Number"]).lower()
+                    info = photos.get(photo_key) or photos.get(os.path.splitext(photo_key)[0])
+                    if info is None:
+                        raise ValueError("Photo not found in the ZIP archive")
+                    record["ImagePath"] = self._store_photo(zip_file, info)
+                    pending.append((row_number, record))
+                except ValueError as e:
+                    failed.append({"row": row_number, "Number": record.get("Number"), "status": "failed", "error": str(e)})
+
+        job["progress"]["stage"] = "saving students"
+        inserted = set(student_db.bulk_create([
+            tuple(int(record[col]) if col == "Gender" else record[col] for col in student_db.BULK_COLUMNS)
+            for _, record in pending
+        ]))
+        enrolled = []
+        for row_number, record in pending:
+            if record["Number"] in inserted:
+                report[record["Number"]] = {"row": row_number, "Number": record["Number"], "status": "enrolled", "vector": False}
+                enrolled.append(record)
+            else:
+                failed.append({"row": row_number, "Number": record["Number"], "status": "failed",
+                               "error": "Enrollment number already exists"})
+        job["progress"]["students_created"] = len(enrolled)
+
+        job["progress"]["stage"] = "encoding faces"
+        for start in range(0, len(enrolled), self.ENCODING_BATCH_SIZE):
+            batch = enrolled[start:start + self.ENCODING_BATCH_SIZE]
+            job["progress"]["vectors_created"] += self._encode_batch(batch, report)
+
+        results = sorted(list(report.values()) + failed, key=lambda r: r["row"])
+        return {
+            "total_rows": job["progress"]["rows"],
+            "students_created": len(enrolled),
+            "vectors_created": job["progress"]["vectors_created"],
+            "failure_count": sum(1 for r in results if r["status"] == "failed" or not r.get("vector")),
+            "results": results
+        }
+
+    def _encode_batch(self, batch, report, retry_stale=True):
+        """
+        Encode one batch in the process pool, then write its vectors with one bulk upsert.
+        The active version is read per batch; a batch encoded with a version retired by a
+        cutover meanwhile is encoded again once with the new version.
+        """
+        if retry_stale:
+            encoder_version = self.encoder_service.get_active_version()
+        else:
+            encoder_version = self.encoder_service.get_settings(force_refresh=True)["active_version"]
+        executor = get_encoding_executor()
+        futures = {
+            executor.submit(
+                ImageProcessor.convert_image_to_vector_with_chip,
+                os.path.join(IMAGE_FOLDER, record["ImagePath"]),
+                encoder_version
+            ): record
+            for record in batch
+        }
+
+        encoded = []
+        for future in as_completed(futures):
+            record = futures[future]
+            try:
+                vector, chip_record = future.result()
+                encoded.append((record, vector, chip_record))
+            except Exception as e:
+                report[record["Number"]]["error"] = str(e)
+
+        try:
+            self.vectors_repo.bulk_upsert_vectors(
+                [(record["Number"], record["College"], vector) for record, vector, _ in encoded],
+                encoder_version
+            )
+        except Exception as e:
+            if retry_stale and isinstance(e, StaleEncoderVersionError):
+                for record in batch:
+                    report[record["Number"]].pop("error", None)
+                return self._encode_batch(batch, report, retry_stale=False)
+            # الطلاب محفوظون؛ تفشل متجهات هذه الدفعة فقط ويستمر التسجيل
+            for record, _, _ in encoded:
+                report[record["Number"]].update({"status": "failed", "error": f"Vector not saved: {e}"})
+            return 0
+
+        for record, _, chip_record in encoded:
+            report[record["Number"]]["vector"] = True
+            try:
+                self.archive.save(record["Number"], chip_record)
+            except Exception as e:
+                report[record["Number"]]["warning"] = str(e)
+        self._refresh_shadow_vectors(encoded, report)
+        return len(encoded)
+
+    def _refresh_shadow_vectors(self, encoded, report):
+        """During a shadow build, encode the new chips for the shadow version in the process pool."""
+        try:
+            shadow = self.encoder_service.get_shadow_encoding()
+        except Exception as e:
+            for record, _, _ in encoded:
+                report[record["Number"]]["warning"] = str(e)
+            return
+        if not shadow:
+            return
+
+        shadow_version, num_jitters = shadow
+        executor = get_encoding_executor()
+        futures = {
+            executor.submit(ImageProcessor.encode_face_chip, chip_record["chip"], num_jitters): (record, vector)
+            for record, vector, chip_record in encoded
+        }
+        for future in as_completed(futures):
+            record, vector = futures[future]
+            try:
+                self.encoder_service.store_shadow_vector(record["Number"], vector, future.result(), shadow_version)
+            except Exception as e:
+                # المتجه محفوظ؛ فقط متجه الظل لم يُحدَّث
+                report[record["Number"]]["warning"] = str(e)
@@ -0,0 +1,143 @@
+# services/device_token_cache.py
+"""
+كاش التوكن -> الجهاز للتحقق من أجهزة المراقبة دون الرجوع لقاعدة البيانات
+Entries expire after DEVICE_TOKEN_CACHE_TTL seconds. Writes in this process evict
+the device at once; writes in other worker processes reach us through the
+`device_tokens_changed` NOTIFY sent by the devices trigger (see
+setup_db_vectors.create_device_token_notifications), which a listener thread
+turns into evictions. While that listener is disconnected the TTL is the bound.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import psycopg
+from database.connection import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+DEVICE_TOKEN_CACHE_TTL = float(os.getenv("DEVICE_TOKEN_CACHE_TTL", "300"))
+# توكن غير موجود: مدة أقصر حتى لا يطول رفض جهاز سُجّل للتو
+DEVICE_TOKEN_NEGATIVE_TTL = float(os.getenv("DEVICE_TOKEN_NEGATIVE_TTL", "10"))
+DEVICE_TOKEN_CACHE_SIZE = int(os.getenv("DEVICE_TOKEN_CACHE_SIZE", "10000"))
+DEVICE_TOKEN_CACHE_LISTEN = os.getenv("DEVICE_TOKEN_CACHE_LISTEN", "1") == "1"
+
+NOTIFY_CHANNEL = "device_tokens_changed"
+_LISTEN_RETRY_SECONDS = 5
+
+
+class DeviceTokenCache:
+
+    def __init__(self, ttl=DEVICE_TOKEN_CACHE_TTL, negative_ttl=DEVICE_TOKEN_NEGATIVE_TTL,
+                 max_size=DEVICE_TOKEN_CACHE_SIZE, listen=DEVICE_TOKEN_CACHE_LISTEN):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.listen = listen
+        self._entries = OrderedDict()  # token -> (expires_at, device or None)
+        self._tokens_by_device = {}  # device id -> token
+        self._lock = threading.Lock()
+        self._generation = 0  # يزيد مع كل إخلاء؛ قراءة بدأت قبله لا تُحفظ
+        self._listener_pid = None
+        self._listening = False
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0, "notifications": 0}
+
+    def get(self, token, loader):
+        """Return the device of `token` (None when unknown), calling `loader(token)` on a miss."""
+        self._ensure_listener()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(token)
+                self._stats["hits" if entry[1] is not None else "negative_hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            generation = self._generation
+
+        device = loader(token)
+
+        with self._lock:
+            if generation != self._generation:
+                return device
+            ttl = self.ttl if device is not None else self.negative_ttl
+            self._entries[token] = (time.monotonic() + ttl, device)
+            self._entries.move_to_end(token)
+            if device is not None:
+                self._tokens_by_device[device["id"]] = token
+            while len(self._entries) > self.max_size:
+                old_token, (_, old_device) = self._entries.popitem(last=False)
+                if old_device is not None:
+                    self._tokens_by_device.pop(old_device["id"], None)
+        return device
+
+    def invalidate_device(self, device_id):
+        """Evict the cached token of a device (status, token, update or delete)."""
+        with self._lock:
+            self._generation += 1
+            token = self._tokens_by_device.pop(device_id, None)
+            if token is not None and self._entries.pop(token, None) is not None:
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._stats["evictions"] += len(self._entries)
+            self._entries.clear()
+            self._tokens_by_device.clear()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats.update({
+            "size": size,
+            "hit_rate": round((stats["hits"] + stats["negative_hits"]) / lookups, 4) if lookups else 0.0,
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+            "listening": self._listening
+        })
+        return stats
+
+    def _ensure_listener(self):
+        # thread واحد لكل عملية (العملية الناتجة عن fork تبدأ thread خاصًا بها)
+        if not self.listen or self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            self._entries.clear()
+            self._tokens_by_device.clear()
+        threading.Thread(target=self._listen_forever, name="device-token-listener", daemon=True).start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    self._listening = True
+                    # ما تغيّر أثناء الانقطاع لم يصلنا: نبدأ بكاش فارغ
+                    self.clear()
+                    for notify in conn.notifies():
+                        with self._lock:
+                            self._stats["notifications"] += 1
+                        self.invalidate_device(int(notify.payload))
+            except Exception as e:
+                logger.warning("Device token listener disconnected: %s", e)
+            self._listening = False
+            time.sleep(_LISTEN_RETRY_SECONDS)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_device_token_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DeviceTokenCache()
+        return _cache
@@ -1,12 +1,14 @@
 # services/devices_service.py
 from typing import Optional, List, Dict
 from database.devices_repository import DevicesRepository
+from services.device_token_cache import get_device_token_cache
 import secrets
 
 class DevicesService:
     
     def __init__(self, repository: DevicesRepository):
         self.repository = repository
+        self.token_cache = get_device_token_cache()
 
     def generate_device_token(self) -> str:
         """توليد توكن فريد للجهاز"""
@@ -24,11 +26,15 @@ class DevicesService:
 
     def update_device(self, device_id: int, **kwargs) -> bool:
         """تحديث بيانات الجهاز"""
-        return self.repository.update_device(device_id, **kwargs)
+        updated = self.repository.update_device(device_id, **kwargs)
+        self.token_cache.invalidate_device(device_id)
+        return updated
 
     def delete_device(self, device_id: int) -> bool:
         """حذف جهاز"""
-        return self.repository.delete_device(device_id)
+        deleted = self.repository.delete_device(device_id)
+        self.token_cache.invalidate_device(device_id)
+        return deleted
 
     def get_device_by_number(self, device_number: int) -> Optional[Dict]:
         """الحصول على جهاز بواسطة رقم الجهاز"""
@@ -46,16 +52,25 @@ class DevicesService:
 
     def toggle_device_status(self, device_id: int) -> Optional[Dict]:
         """تبديل حالة الجهاز"""
-        return self.repository.toggle_device_status(device_id)
+        device = self.repository.toggle_device_status(device_id)
+        self.token_cache.invalidate_device(device_id)
+        return device
+
+    def get_device_by_token(self, device_token: str) -> Optional[Dict]:
+        """الحصول على جهاز بواسطة التوكن (من الكاش)"""
+        return self.token_cache.get(device_token, self.repository.get_device_by_token)
 
     def validate_device_token(self, device_token: str) -> bool:
         """التحقق من صحة توكن الجهاز"""
-        device = self.repository.get_device_by_token(device_token)
+        device = self.get_device_by_token(device_token)
         return device is not None and device['status'] == 1
 
+    def get_token_cache_stats(self) -> Dict:
+        return self.token_cache.get_stats()
+
     def refresh_device_token(self, device_id: int) -> Optional[str]:
         """تحديث توكن الجهاز"""
         new_token = self.generate_device_token()
-        if self.repository.update_device(device_id, device_token=new_token):
+        if self.update_device(device_id, device_token=new_token):
             return new_token
         return None
\ No newline at end of file
@@ -0,0 +1,201 @@
+# services/encoder_version_service.py
+import threading
+import time
+from database.connection import unit_of_work
+from database.encoder_settings_repository import EncoderSettingsRepository
+from database.vectors_repository import VectorsRepository, StaleEncoderVersionError
+from database.face_chip_archive import FaceChipArchive
+from services.background_jobs import BackgroundJobs
+from services.image_processor import ImageProcessor
+from services.students_service import fetch_student_info_by_number, get_image_path
+
+
+class EncoderVersionService:
+    """
+    إدارة نسخ المُرمّز: بناء متجهات الظل في الخلفية ثم التبديل الذري
+    Search always uses `student_vectors.vector` (the active version) while the shadow
+    column is filled, so an encoder upgrade never interrupts identification.
+    The settings are cached per process; a write encoded with a version retired by a
+    cutover in another worker is rejected by the repository and redone (encode_and_write).
+    """
+    SETTINGS_TTL_SECONDS = 30
+    SHADOW_BATCH_SIZE = 100
+    SHADOW_JOB_NAME = "encoder_shadow_build"
+
+    _settings_cache = None
+    _settings_loaded_at = 0.0
+    _cache_lock = threading.Lock()
+
+    def __init__(self, settings_repo=None, vectors_repo=None, archive=None):
+        self.settings_repo = settings_repo or EncoderSettingsRepository()
+        self.vectors_repo = vectors_repo or VectorsRepository()
+        self.archive = archive or FaceChipArchive()
+
+    def get_settings(self, force_refresh=False):
+        cls = EncoderVersionService
+        with cls._cache_lock:
+            expired = time.monotonic() - cls._settings_loaded_at > cls.SETTINGS_TTL_SECONDS
+            if force_refresh or expired or cls._settings_cache is None:
+                settings = self.settings_repo.get_settings()
+                cls._settings_cache = {
+                    "active_version": settings["active_version"] if settings else ImageProcessor.ENCODER_VERSION,
+                    "shadow_version": settings["shadow_version"] if settings else None
+                }
+                cls._settings_loaded_at = time.monotonic()
+            return dict(cls._settings_cache)
+
+    def get_active_version(self):
+        return self.get_settings()["active_version"]
+
+    def encode_and_write(self, encode, write):
+        """
+        Run `encode(version)` with the active version and store the result with
+        `write(value, version)`. If a cutover retired that version meanwhile, reload the
+        settings and encode/write once more. Returns (value, write result).
+        """
+        encoder_version = self.get_active_version()
+        value = encode(encoder_version)
+        try:
+            return value, write(value, encoder_version)
+        except StaleEncoderVersionError:
+            encoder_version = self.get_settings(force_refresh=True)["active_version"]
+            value = encode(encoder_version)
+            return value, write(value, encoder_version)
+
+    def start_shadow_build(self, target_version):
+        """
+        Start (or resume) filling the shadow column for `target_version`.
+
+        Raises:
+            ValueError: Unknown version, same as active, or another build is running
+        """
+        ImageProcessor.get_encoder_settings(target_version)
+        settings = self.get_settings(force_refresh=True)
+        if target_version == settings["active_version"]:
+            raise ValueError(f"'{target_version}' is already the active encoder version.")
+
+        # التحقق وتسجيل المهمة في معاملة واحدة تحت قفل مشترك بين كل العمليات
+        with unit_of_work():
+            self.settings_repo.lock_shadow_build()
+            running = BackgroundJobs.find_running_shared(self.SHADOW_JOB_NAME)
+            if running:
+                raise ValueError(f"A shadow build is already running (job {running['id']}).")
+            self.settings_repo.set_shadow_version(target_version)
+            job_id = BackgroundJobs.reserve_shared(self.SHADOW_JOB_NAME)
+
+        self.get_settings(force_refresh=True)
+        return BackgroundJobs.start_reserved(job_id, self._fill_shadow, target_version)
+
+    def _fill_shadow(self, job, target_version):
+        num_jitters = ImageProcessor.get_encoder_settings(target_version)["num_jitters"]
+        failed = {}
+        job["progress"] = {"target_version": target_version, "encoded": 0, "from_chips": 0, "from_images": 0}
+
+        while True:
+            if self.get_settings(force_refresh=True)["shadow_version"] != target_version:
+                job["progress"]["cancelled"] = True
+                break
+
+            rows = self.vectors_repo.get_shadow_pending(
+                target_version, self.SHADOW_BATCH_SIZE, exclude_student_ids=list(failed)
+            )
+            if not rows:
+                break
+
+            for row in rows:
+                student_id = row["student_id"]
+                try:
+                    record = self.archive.load(student_id)
+                    if record is not None:
+                        job["progress"]["from_chips"] += 1
+                    else:
+                        record = self._chip_from_original_image(student_id)
+                        job["progress"]["from_images"] += 1
+
+                    vector_next = ImageProcessor.encode_face_chip(record["chip"], num_jitters)
+                    # 0 يعني أن المتجه الحالي تغيّر أثناء الحساب فيبقى معلقًا ويعاد في الدفعة التالية
+                    if self.vectors_repo.set_shadow_vector(student_id, row["vector"], vector_next, target_version):
+                        job["progress"]["encoded"] += 1
+                except Exception as e:
+                    failed[student_id] = str(e)
+
+        job["progress"]["failed"] = len(failed)
+        return {
+            "target_version": target_version,
+            "coverage": self.get_coverage(target_version),
+            "failures": [{"student_id": k, "error": v} for k, v in failed.items()] or None
+        }
+
+    def _chip_from_original_image(self, student_id):
+        """Fallback for vectors enrolled before the chip archive existed."""
+        student = fetch_student_info_by_number(student_id)
+        if not student or not student[2]:
+            raise ValueError("No archived chip and no original image for this student.")
+        _, record = ImageProcessor.convert_image_to_vector_with_chip(get_image_path(student[2]))
+        self.archive.save(student_id, record)
+        return record
+
+    def refresh_shadow_vector(self, student_id, chip_record, live_vector):
+        """
+        Keep the shadow column in step with a freshly written live vector,
+        so writes during a build do not push coverage back below 100%.
+        """
+        shadow = self.get_shadow_encoding()
+        if not shadow:
+            return False
+        shadow_version, num_jitters = shadow
+        vector_next = ImageProcessor.encode_face_chip(chip_record["chip"], num_jitters)
+        return self.store_shadow_vector(student_id, live_vector, vector_next, shadow_version)
+
+    def get_shadow_encoding(self):
+        """(shadow_version, num_jitters) while a shadow version is set, otherwise None."""
+        shadow_version = self.get_settings()["shadow_version"]
+        if not shadow_version:
+            return None
+        return shadow_version, ImageProcessor.get_encoder_settings(shadow_version)["num_jitters"]
+
+    def store_shadow_vector(self, student_id, live_vector, vector_next, shadow_version):
+        """Write a shadow vector encoded elsewhere (e.g. in the process pool)."""
+        live = "[" + ",".join(str(float(x)) for x in live_vector) + "]"
+        return bool(self.vectors_repo.set_shadow_vector(student_id, live, vector_next, shadow_version))
+
+    def get_coverage(self, target_version):
+        coverage = self.vectors_repo.get_version_coverage(target_version)
+        total = coverage["total"]
+        covered = coverage["covered"]
+        return {
+            "total": total,
+            "covered": covered,
+            "percent": round(covered * 100.0 / total, 2) if total else 100.0
+        }
+
+    def get_status(self):
+        settings = self.get_settings(force_refresh=True)
+        status = {
+            "active_version": settings["active_version"],
+            "shadow_version": settings["shadow_version"],
+            "available_versions": list(ImageProcessor.ENCODER_VERSIONS),
+            "shadow_coverage": None,
+            "job": BackgroundJobs.find_running_shared(self.SHADOW_JOB_NAME)
+        }
+        if settings["shadow_version"]:
+            status["shadow_coverage"] = self.get_coverage(settings["shadow_version"])
+        return status
+
+    def get_job(self, job_id):
+        return BackgroundJobs.get(job_id)
+
+    def cutover(self):
+        """
+        Atomically promote the shadow version once coverage is 100%.
+
+        Raises:
+            ValueError: No shadow version, a build still running, or incomplete coverage
+        """
+        with unit_of_work():
+            self.settings_repo.lock_shadow_build()
+            if BackgroundJobs.find_running_shared(self.SHADOW_JOB_NAME):
+                raise ValueError("Shadow build is still running.")
+            result = self.settings_repo.cutover()
+        self.get_settings(force_refresh=True)
+        return result
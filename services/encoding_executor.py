@@ -0,0 +1,72 @@
+# services/encoding_executor.py
+import asyncio
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from services.image_processor import ImageProcessor
+
+# عدد العمليات المخصصة لترميز الوجوه (عمل CPU) في وضع ASGI
+ENCODING_WORKERS = int(os.getenv("ENCODING_WORKERS", str(os.cpu_count() or 1)))
+
+_executor = None
+
+
+def get_encoding_executor():
+    """Process pool for face encoding so the event loop never runs dlib itself."""
+    global _executor
+    if _executor is None:
+        # spawn: لا نورث حلقة الأحداث أو اتصالات قاعدة البيانات في العمليات الفرعية
+        _executor = ProcessPoolExecutor(
+            max_workers=ENCODING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_encoding_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_encoding(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_encoding_executor(), partial(func, *args, **kwargs))
+
+
+async def probe_vector_from_request_async(form, files, upload_folder, expected_version=None):
+    """
+    Async counterpart of ImageProcessor.probe_vector_from_request for Quart requests:
+    same input order (embedding, client box/landmarks, full detection), but the upload
+    is written asynchronously and the encoding runs in the process pool.
+    """
+    if form.get("embedding"):
+        return ImageProcessor.validate_client_embedding(
+            form.get("embedding"), form.get("encoder_version"), expected_version
+        )
+
+    if "image" not in files:
+        raise ValueError("Image file or embedding is required.")
+
+    if form.get("encoder_version"):
+        ImageProcessor.validate_encoder_version(form.get("encoder_version"), expected_version)
+    face_box = ImageProcessor.parse_face_box(form.get("face_box")) if form.get("face_box") else None
+    landmarks = ImageProcessor.parse_landmarks(form.get("face_landmarks")) if form.get("face_landmarks") else None
+
+    image_file = files["image"]
+    os.makedirs(upload_folder, exist_ok=True)
+    temp_path = os.path.join(
+        upload_folder, f"{uuid.uuid4().hex}_{ImageProcessor.secure_filename(image_file.filename)}"
+    )
+    await image_file.save(temp_path)
+    try:
+        return await run_encoding(
+            ImageProcessor.convert_image_to_vector, temp_path,
+            face_box=face_box, landmarks=landmarks, encoder_version=expected_version
+        )
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -1,5 +1,10 @@
 import os
+import json
+import math
+import uuid
+import dlib
 import face_recognition
+from face_recognition import api as face_api
 from werkzeug.utils import secure_filename
 import numpy as np
 
@@ -8,6 +13,16 @@ class ImageProcessor:
     MAX_FILE_SIZE_MB = 5
     MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
     LAMBDA = 0.5  # Factor to balance size vs. position in face selection
+    EMBEDDING_DIMENSIONS = 128
+    ENCODER_VERSION = "dlib_resnet_v1"  # face_recognition default encoder, must match the stored vectors
+    LANDMARK_BOX_MARGIN = 0.1  # Extra margin around a landmark hull when building a face box
+    CHIP_SIZE = 150  # Aligned face chip size expected by the dlib ResNet encoder
+    CHIP_PADDING = 0.25  # Same padding face_recognition uses when it aligns faces internally
+    # Known encoder versions and the settings that produce them (vectors are only comparable within a version)
+    ENCODER_VERSIONS = {
+        "dlib_resnet_v1": {"num_jitters": 1},
+        "dlib_resnet_v1_jitter10": {"num_jitters": 10}
+    }
 
     @staticmethod
     def allowed_file(filename):
@@ -28,43 +43,233 @@ class ImageProcessor:
         return True
 
     @staticmethod
-    def extract_best_face_vector(image):
-        """Extract the best face vector from an image using a mix of size and position."""
+    def select_best_face_location(image, face_locations):
+        """Select the best face location based on a mix of size and position."""
+        if len(face_locations) == 1:
+            return face_locations[0]
+
+        image_height, image_width = image.shape[:2]
+        image_center_x, image_center_y = image_width // 2, image_height // 2
+
+        def calculate_score(face):
+            top, right, bottom, left = face
+            width, height = right - left, bottom - top
+            size = width * height
+            face_center_x, face_center_y = left + width // 2, top + height // 2
+            distance = ((face_center_x - image_center_x) ** 2 + (face_center_y - image_center_y) ** 2) ** 0.5
+            return size - (ImageProcessor.LAMBDA * distance)
+
+        return max(face_locations, key=calculate_score)
+
+    @staticmethod
+    def extract_best_face_vector(image, encoder_version=None):
+        """
+        Extract the best face vector from an image using a mix of size and position.
+        The encoder settings of `encoder_version` are used so probes match the gallery.
+        """
+        num_jitters = ImageProcessor.get_encoder_settings(encoder_version or ImageProcessor.ENCODER_VERSION)["num_jitters"]
         face_locations = face_recognition.face_locations(image)  # Using default model for better accuracy
         if not face_locations:
             raise ValueError("No face detected in the image.")
         
         if len(face_locations) == 1:
             # Directly process a single detected face without passing `known_face_locations`
-            face_encodings = face_recognition.face_encodings(image)
+            face_encodings = face_recognition.face_encodings(image, num_jitters=num_jitters)
             if not face_encodings:
                 raise ValueError("Unable to extract face vector.")
             return face_encodings[0].tolist()
         
         # Multiple faces detected → Select the best face based on size and position
-        image_height, image_width, _ = image.shape
-        image_center_x, image_center_y = image_width // 2, image_height // 2
-        
-        def calculate_score(face):
-            top, right, bottom, left = face
-            width, height = right - left, bottom - top
-            size = width * height
-            face_center_x, face_center_y = left + width // 2, top + height // 2
-            distance = ((face_center_x - image_center_x) ** 2 + (face_center_y - image_center_y) ** 2) ** 0.5
-            return size - (ImageProcessor.LAMBDA * distance)
-        
-        best_face = max(face_locations, key=calculate_score)
+        best_face = ImageProcessor.select_best_face_location(image, face_locations)
         
         # Compute encoding only for the selected face
-        face_encodings = face_recognition.face_encodings(image, known_face_locations=[best_face])
+        face_encodings = face_recognition.face_encodings(image, known_face_locations=[best_face], num_jitters=num_jitters)
         if not face_encodings:
             raise ValueError("Unable to extract face vector.")
         
         return face_encodings[0].tolist()
 
     @staticmethod
-    def convert_image_to_vector(image_path):
-        """Convert an image to a face vector."""
+    def extract_best_face_chip(image, encoder_version=None):
+        """
+        Detect the best face and return its aligned face chip with the vector computed from it.
+        The chip is what the encoder actually sees, so it can be re-encoded later without detection.
+        """
+        encoder_version = encoder_version or ImageProcessor.ENCODER_VERSION
+        settings = ImageProcessor.get_encoder_settings(encoder_version)
+        face_locations = face_recognition.face_locations(image)
+        if not face_locations:
+            raise ValueError("No face detected in the image.")
+
+        best_face = ImageProcessor.select_best_face_location(image, face_locations)
+        shape = face_api.pose_predictor_5_point(image, face_api._css_to_rect(best_face))
+        chip = np.asarray(
+            dlib.get_face_chip(image, shape, size=ImageProcessor.CHIP_SIZE, padding=ImageProcessor.CHIP_PADDING),
+            dtype=np.uint8
+        )
+        image_height, image_width = image.shape[:2]
+
+        return {
+            "chip": chip,
+            "landmarks": [[point.x, point.y] for point in shape.parts()],
+            "metadata": {
+                "detector": "hog",
+                "landmark_model": "5_point",
+                "face_location": list(best_face),
+                "faces_detected": len(face_locations),
+                "image_size": [image_width, image_height],
+                "chip_size": ImageProcessor.CHIP_SIZE,
+                "chip_padding": ImageProcessor.CHIP_PADDING,
+                "encoder_version": encoder_version
+            },
+            "vector": ImageProcessor.encode_face_chip(chip, settings["num_jitters"])
+        }
+
+    @staticmethod
+    def get_encoder_settings(encoder_version):
+        """Return the encoding settings of a known encoder version."""
+        settings = ImageProcessor.ENCODER_VERSIONS.get(encoder_version)
+        if settings is None:
+            raise ValueError(f"Unknown encoder version '{encoder_version}'.")
+        return settings
+
+    @staticmethod
+    def encode_face_chip(chip, num_jitters=1):
+        """Run only the encoder on an aligned 150x150 face chip."""
+        return list(face_api.face_encoder.compute_face_descriptor(np.ascontiguousarray(chip), num_jitters))
+
+    @staticmethod
+    def convert_image_to_vector_with_chip(image_path, encoder_version=None):
+        """Convert an image to a face vector and also return the aligned face chip record."""
+        try:
+            if not ImageProcessor.allowed_file(image_path):
+                raise ValueError(f"File type not allowed. Allowed types: {ImageProcessor.ALLOWED_EXTENSIONS}")
+
+            ImageProcessor.check_image_size(image_path)
+            image = face_recognition.load_image_file(image_path)
+            face = ImageProcessor.extract_best_face_chip(image, encoder_version)
+            return face.pop("vector"), face
+        except Exception as e:
+            raise ValueError(f"Error processing image: {str(e)}")
+
+    @staticmethod
+    def extract_all_face_vectors(image, encoder_version=None):
+        """
+        Detect every face in the image and encode them all with one face_encodings call
+        (dlib holds the GIL, so encoding faces in threads gave no parallelism).
+        Returns a list of (face_location, vector) in detection order.
+        """
+        num_jitters = ImageProcessor.get_encoder_settings(encoder_version or ImageProcessor.ENCODER_VERSION)["num_jitters"]
+        face_locations = face_recognition.face_locations(image)
+        if not face_locations:
+            raise ValueError("No face detected in the image.")
+
+        encodings = face_recognition.face_encodings(image, known_face_locations=face_locations, num_jitters=num_jitters)
+        return [(location, encoding.tolist()) for location, encoding in zip(face_locations, encodings)]
+
+    @staticmethod
+    def convert_image_to_vectors(image_path, encoder_version=None):
+        """Convert every face of an image (e.g. a room photo) to face vectors."""
+        try:
+            if not ImageProcessor.allowed_file(image_path):
+                raise ValueError(f"File type not allowed. Allowed types: {ImageProcessor.ALLOWED_EXTENSIONS}")
+
+            ImageProcessor.check_image_size(image_path)
+            image = face_recognition.load_image_file(image_path)
+            return ImageProcessor.extract_all_face_vectors(image, encoder_version)
+        except Exception as e:
+            raise ValueError(f"Error processing image: {str(e)}")
+
+    @staticmethod
+    def extract_face_vector_in_box(image, face_box, encoder_version=None):
+        """Encode the face inside a known box (top, right, bottom, left), skipping face detection."""
+        num_jitters = ImageProcessor.get_encoder_settings(encoder_version or ImageProcessor.ENCODER_VERSION)["num_jitters"]
+        image_height, image_width = image.shape[:2]
+        top, right, bottom, left = face_box
+        top, left = max(0, int(top)), max(0, int(left))
+        bottom, right = min(image_height, int(bottom)), min(image_width, int(right))
+        if bottom <= top or right <= left:
+            raise ValueError("Face box is outside the image.")
+
+        face_encodings = face_recognition.face_encodings(
+            image, known_face_locations=[(top, right, bottom, left)], num_jitters=num_jitters
+        )
+        if not face_encodings:
+            raise ValueError("Unable to extract face vector.")
+        return face_encodings[0].tolist()
+
+    @staticmethod
+    def face_box_from_landmarks(landmarks, image_width, image_height):
+        """
+        Build a face box from client landmarks ([[x, y], ...]).
+        Normalized coordinates (MediaPipe face mesh) are scaled to the image size.
+        """
+        points = np.array(landmarks, dtype=np.float32)[:, :2]
+        if points.max() <= 1.0:
+            points = points * np.array([image_width, image_height], dtype=np.float32)
+
+        left, top = points.min(axis=0)
+        right, bottom = points.max(axis=0)
+        margin_x = (right - left) * ImageProcessor.LANDMARK_BOX_MARGIN
+        margin_y = (bottom - top) * ImageProcessor.LANDMARK_BOX_MARGIN
+        return (int(top - margin_y), int(right + margin_x), int(bottom + margin_y), int(left - margin_x))
+
+    @staticmethod
+    def parse_face_box(raw):
+        """Parse a client face box sent as JSON {top, right, bottom, left} or [top, right, bottom, left]."""
+        try:
+            box = json.loads(raw) if isinstance(raw, str) else raw
+            if isinstance(box, dict):
+                box = [box["top"], box["right"], box["bottom"], box["left"]]
+            if len(box) != 4:
+                raise ValueError
+            return tuple(int(round(float(v))) for v in box)
+        except (ValueError, TypeError, KeyError):
+            raise ValueError("Invalid face box. Expected {top, right, bottom, left}.")
+
+    @staticmethod
+    def parse_landmarks(raw):
+        """Parse client landmarks sent as JSON [[x, y], ...] or [{x, y}, ...]."""
+        try:
+            points = json.loads(raw) if isinstance(raw, str) else raw
+            points = [[p["x"], p["y"]] if isinstance(p, dict) else [p[0], p[1]] for p in points]
+            if len(points) < 2:
+                raise ValueError
+            return points
+        except (ValueError, TypeError, KeyError, IndexError):
+            raise ValueError("Invalid face landmarks. Expected a list of [x, y] points.")
+
+    @staticmethod
+    def validate_encoder_version(encoder_version, expected_version=None):
+        """Reject client data produced for another encoder version."""
+        expected_version = expected_version or ImageProcessor.ENCODER_VERSION
+        if encoder_version != expected_version:
+            raise ValueError(
+                f"Encoder version mismatch: expected '{expected_version}', got '{encoder_version}'."
+            )
+
+    @staticmethod
+    def validate_client_embedding(raw, encoder_version, expected_version=None):
+        """Validate a client-computed embedding and return it as a list of floats."""
+        ImageProcessor.validate_encoder_version(encoder_version, expected_version)
+        try:
+            vector = json.loads(raw) if isinstance(raw, str) else raw
+            vector = [float(x) for x in vector]
+        except (ValueError, TypeError):
+            raise ValueError("Embedding must be a JSON array of numbers.")
+
+        if len(vector) != ImageProcessor.EMBEDDING_DIMENSIONS:
+            raise ValueError(f"Embedding must have {ImageProcessor.EMBEDDING_DIMENSIONS} dimensions.")
+        if not all(math.isfinite(x) for x in vector):
+            raise ValueError("Embedding contains non-finite values.")
+        return vector
+
+    @staticmethod
+    def convert_image_to_vector(image_path, face_box=None, landmarks=None, encoder_version=None):
+        """
+        Convert an image to a face vector with the settings of `encoder_version`.
+        When the client already located the face (box or landmarks), detection is skipped.
+        """
         try:
             # Check file extension
             if not ImageProcessor.allowed_file(image_path):
@@ -76,10 +281,51 @@ class ImageProcessor:
             # Load the image
             image = face_recognition.load_image_file(image_path)
 
+            if landmarks is not None:
+                image_height, image_width = image.shape[:2]
+                face_box = ImageProcessor.face_box_from_landmarks(landmarks, image_width, image_height)
+            if face_box is not None:
+                return ImageProcessor.extract_face_vector_in_box(image, face_box, encoder_version)
+
             # Extract the best face vector
-            return ImageProcessor.extract_best_face_vector(image)
+            return ImageProcessor.extract_best_face_vector(image, encoder_version)
         except Exception as e:
             raise ValueError(f"Error processing image: {str(e)}")
+
+    @staticmethod
+    def probe_vector_from_request(form, files, upload_folder, expected_version=None):
+        """
+        Resolve the probe vector of a search/verify request, cheapest input first:
+        a client embedding, then an image with a client face box or landmarks,
+        then an image with server-side detection.
+        `expected_version` is the encoder version the stored gallery currently uses.
+        """
+        if form.get("embedding"):
+            return ImageProcessor.validate_client_embedding(
+                form.get("embedding"), form.get("encoder_version"), expected_version
+            )
+
+        if "image" not in files:
+            raise ValueError("Image file or embedding is required.")
+
+        if form.get("encoder_version"):
+            ImageProcessor.validate_encoder_version(form.get("encoder_version"), expected_version)
+        face_box = ImageProcessor.parse_face_box(form.get("face_box")) if form.get("face_box") else None
+        landmarks = ImageProcessor.parse_landmarks(form.get("face_landmarks")) if form.get("face_landmarks") else None
+
+        image_file = files["image"]
+        os.makedirs(upload_folder, exist_ok=True)
+        temp_path = os.path.join(
+            upload_folder, f"{uuid.uuid4().hex}_{ImageProcessor.secure_filename(image_file.filename)}"
+        )
+        image_file.save(temp_path)
+        try:
+            return ImageProcessor.convert_image_to_vector(
+                temp_path, face_box=face_box, landmarks=landmarks, encoder_version=expected_version
+            )
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
     
     @staticmethod
     def compare_vectors(vector1, vector2, tolerance=0.6):
@@ -1,10 +1,89 @@
 from typing import Dict, List, Optional
 from database.monitoring.alert_repository import AlertRepository
 from database.monitoring.alert_type_repository import AlertTypeRepository
-from datetime import time
+from services.reference_cache import get_reference_cache
+from datetime import time, datetime, timezone
+
+# أقصى عدد تنبيهات في دفعة واحدة من الجهاز
+ALERT_BATCH_MAX_SIZE = 500
+# المعرفات تُرسل إلى الدفعة كـ int[]؛ قيمة خارج المدى تُفشل الجملة لكل التنبيهات
+ALERT_ID_FIELDS = ('exam_id', 'student_id', 'device_id', 'alert_type')
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+
+
+def _parse_client_timestamp(value) -> Optional[datetime]:
+    """ISO-8601 string or epoch milliseconds (JS Date.now()) -> naive local time, like CURRENT_TIMESTAMP."""
+    if value in (None, ''):
+        return None
+    if isinstance(value, bool):
+        raise ValueError("Invalid timestamp")
+    if isinstance(value, (int, float)):
+        try:
+            parsed = datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError("Invalid timestamp")
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError("Invalid timestamp")
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def prepare_alert_batch(alerts, known_type_ids) -> tuple:
+    """
+    Validate a batch of alerts without touching the database.
+    Returns (items, results): items are the valid alerts (with their request index),
+    results has one entry per alert, already filled for the rejected ones.
+    """
+    if not isinstance(alerts, list) or not alerts:
+        raise ValueError("alerts must be a non-empty list")
+    if len(alerts) > ALERT_BATCH_MAX_SIZE:
+        raise ValueError(f"At most {ALERT_BATCH_MAX_SIZE} alerts are allowed per batch")
+
+    items, results = [], [None] * len(alerts)
+    for index, alert in enumerate(alerts):
+        try:
+            if not isinstance(alert, dict) or not all(alert.get(k) for k in ALERT_ID_FIELDS):
+                raise ValueError("All required fields must be provided")
+            try:
+                item = {
+                    'index': index,
+                    'exam_id': int(alert['exam_id']),
+                    'student_id': int(alert['student_id']),
+                    'device_id': int(alert['device_id']),
+                    'alert_type': int(alert['alert_type']),
+                    'message': alert.get('message'),
+                    'timestamp': _parse_client_timestamp(alert.get('timestamp'))
+                }
+            except (TypeError, ValueError) as e:
+                raise ValueError(str(e) if str(e) == "Invalid timestamp" else "IDs must be integers")
+            out_of_range = [key for key in ALERT_ID_FIELDS if not INT32_MIN <= item[key] <= INT32_MAX]
+            if out_of_range:
+                raise ValueError(f"IDs out of range: {', '.join(out_of_range)}")
+            if item['alert_type'] not in known_type_ids:
+                raise ValueError("Invalid alert type")
+            items.append(item)
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 'rejected', 'error': str(e)}
+    return items, results
+
+
+def merge_alert_batch_results(items, results, rows) -> Dict:
+    """Fill `results` from the create_batch rows (one per item, same order) and summarize."""
+    for item, row in zip(items, rows):
+        if row['alert_id'] is not None:
+            results[item['index']] = {'index': item['index'], 'status': 'created', 'alert_id': row['alert_id']}
+        else:
+            error = "Exam not found." if row['missing_exam'] else "Device not found."
+            results[item['index']] = {'index': item['index'], 'status': 'rejected', 'error': error}
+    created = sum(1 for result in results if result['status'] == 'created')
+    return {'created': created, 'rejected': len(results) - created, 'results': results}
+
 
 class AlertService:
-    
+    alert_type_cache = get_reference_cache("alert_types")
+
     def __init__(self, 
                  alert_repo: Optional[AlertRepository] = None,
                  alert_type_repo: Optional[AlertTypeRepository] = None):
@@ -18,7 +97,7 @@ class AlertService:
             raise ValueError("All required fields must be provided")
         
         # Verify alert type exists
-        if not self.alert_type_repo.get_by_id(alert_type):
+        if not self.alert_type_cache.get(("id", alert_type), lambda: self.alert_type_repo.get_by_id(alert_type)):
             raise ValueError("Invalid alert type")
         
         try:
@@ -34,6 +113,22 @@ class AlertService:
         except Exception as e:
             raise Exception(f"Service error: {str(e)}")
 
+    def get_alert_type_ids(self) -> frozenset:
+        """IDs of every alert type, from the shared alert_types reference cache."""
+        return frozenset(t['id'] for t in self.alert_type_cache.get("all", self.alert_type_repo.get_all))
+
+    def create_alerts_batch(self, alerts: List[Dict]) -> Dict:
+        """
+        Store a batch of device alerts (client timestamps kept) in one INSERT.
+        Every alert gets its own status; a bad alert never rejects the others.
+        """
+        items, results = prepare_alert_batch(alerts, self.get_alert_type_ids())
+        try:
+            rows = self.alert_repo.create_batch(items)
+        except Exception as e:
+            raise Exception(f"Service error: {str(e)}")
+        return merge_alert_batch_results(items, results, rows)
+
     def get_alert_devices(
         self,
         center_id: Optional[int] = None,
@@ -1,8 +1,10 @@
 from typing import Dict, List, Optional
 from database.monitoring.alert_type_repository import AlertTypeRepository
+from services.reference_cache import get_reference_cache
 
 class AlertTypeService:
-    
+    cache = get_reference_cache("alert_types")
+
     def __init__(self, repo: Optional[AlertTypeRepository] = None):
         self.repo = repo or AlertTypeRepository()
 
@@ -12,7 +14,9 @@ class AlertTypeService:
             raise ValueError("Type name must be at least 2 characters")
         
         try:
-            return self.repo.create(type_name.strip())
+            alert_type = self.repo.create(type_name.strip())
+            self.cache.invalidate()
+            return alert_type
         except ValueError as e:
             raise ValueError(str(e))
         except Exception as e:
@@ -21,14 +25,14 @@ class AlertTypeService:
     def get_alert_type(self, type_id: int) -> Optional[Dict]:
         """Get single alert type"""
         try:
-            return self.repo.get_by_id(type_id)
+            return self.cache.get(("id", type_id), lambda: self.repo.get_by_id(type_id))
         except Exception as e:
             raise Exception(f"Service error: {str(e)}")
 
     def get_all_alert_types(self) -> List[Dict]:
         """List all alert types"""
         try:
-            return self.repo.get_all()
+            return self.cache.get("all", self.repo.get_all)
         except Exception as e:
             raise Exception(f"Service error: {str(e)}")
 
@@ -38,7 +42,9 @@ class AlertTypeService:
             raise ValueError("Type name must be at least 2 characters")
         
         try:
-            return self.repo.update(type_id, new_name.strip())
+            alert_type = self.repo.update(type_id, new_name.strip())
+            self.cache.invalidate()
+            return alert_type
         except ValueError as e:
             raise ValueError(str(e))
         except Exception as e:
@@ -47,7 +53,9 @@ class AlertTypeService:
     def delete_alert_type(self, type_id: int) -> bool:
         """Delete alert type if not in use"""
         try:
-            return self.repo.delete(type_id)
+            deleted = self.repo.delete(type_id)
+            self.cache.invalidate()
+            return deleted
         except ValueError as e:
             raise ValueError(str(e))
         except Exception as e:
@@ -1,9 +1,24 @@
+import os
+import asyncio
+import threading
+import time
 from typing import Dict, Optional
 from database.monitoring.model_config_repository import ModelConfigRepository
 from psycopg.errors import UndefinedTable
 from datetime import datetime
 
+# أقصى مدة قبل أن تلاحظ العملية نسخة جديدة كتبتها عملية أخرى (ثوانٍ)
+CONFIG_VERSION_CHECK_INTERVAL = float(os.getenv("MODEL_CONFIG_VERSION_CHECK_INTERVAL", "1"))
+
+
 class ModelConfigService:
+    # نسخة واحدة في الذاكرة لكل عملية، مشتركة بين كل الطلبات والـ threads
+    _config = None
+    _version = None
+    _checked_at = 0.0
+    _refreshing = False
+    _changed = threading.Condition()
+
     def __init__(self):
         """Initialize the service with a repository instance"""
         self.repository = ModelConfigRepository()
@@ -19,16 +34,78 @@ class ModelConfigService:
             Exception: If there's a database error
         """
         try:
-            config = self.repository.get_active_config()
-            if not config:
-                return self._create_default_config()
-            return config
+            return self._refresh()
         except UndefinedTable:
             # If table doesn't exist, return default config
             return self.get_default_config()
         except Exception as e:
             raise Exception(f"Failed to get current config: {str(e)}")
 
+    def wait_for_change(self, known_version: Optional[int], timeout: float) -> Dict:
+        """
+        Long-poll: return the active configuration as soon as its version differs
+        from `known_version`, or the unchanged configuration once `timeout` expires.
+        """
+        deadline = time.monotonic() + timeout
+        config = self.get_current_config()
+        while config.get("version") == known_version:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._changed:
+                # يوقظنا _refresh() عند ظهور نسخة جديدة أو بعد فترة الفحص
+                self._changed.wait(min(remaining, CONFIG_VERSION_CHECK_INTERVAL))
+            config = self.get_current_config()
+        return config
+
+    async def wait_for_change_async(self, known_version: Optional[int], timeout: float) -> Dict:
+        """
+        Same as wait_for_change() for ASGI routes: the wait is an asyncio sleep, so a
+        waiting device holds no worker thread. The in-memory config is read in a thread
+        because the version check behind it may query the database.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        config = await asyncio.to_thread(self.get_current_config)
+        while config.get("version") == known_version:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, CONFIG_VERSION_CHECK_INTERVAL))
+            config = await asyncio.to_thread(self.get_current_config)
+        return config
+
+    def _refresh(self, force: bool = False) -> Dict:
+        """
+        Return the in-memory configuration. At most once per CONFIG_VERSION_CHECK_INTERVAL
+        one thread checks the active version; the full row is re-read only when it changed.
+        """
+        cls = ModelConfigService
+        with cls._changed:
+            fresh = time.monotonic() - cls._checked_at < CONFIG_VERSION_CHECK_INTERVAL
+            if cls._config is not None and not force and (cls._refreshing or fresh):
+                return cls._config
+            cls._refreshing = True
+
+        try:
+            version = self.repository.get_active_version()
+            config = cls._config
+            if config is None or version != cls._version:
+                config = self.repository.get_active_config() or self._create_default_config()
+        finally:
+            with cls._changed:
+                cls._refreshing = False
+
+        with cls._changed:
+            cls._checked_at = time.monotonic()
+            version = config.get("version")
+            # لا نرجع إلى نسخة أقدم قرأها thread آخر متأخرًا
+            if cls._config is None or (version is not None and (cls._version is None or version > cls._version)):
+                cls._config = config
+                cls._version = version
+                cls._changed.notify_all()
+            return cls._config
+
     def update_config(self, config_id: int, config_data: Dict) -> Dict:
         """
         Update model configuration
@@ -46,7 +123,9 @@ class ModelConfigService:
         """
         try:
             self._validate_config(config_data)
-            return self.repository.update_config(config_id, config_data)
+            config = self.repository.update_config(config_id, config_data)
+            self._refresh(force=True)
+            return config
         except ValueError as ve:
             raise ValueError(f"Invalid data: {str(ve)}")
         except Exception as e:
@@ -63,7 +142,9 @@ class ModelConfigService:
             Exception: If there's a database error
         """
         try:
-            return self.repository.reset_to_default()
+            config = self.repository.reset_to_default()
+            self._refresh(force=True)
+            return config
         except Exception as e:
             raise Exception(f"Failed to reset to default: {str(e)}")
 
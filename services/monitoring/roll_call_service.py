@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional
+from database.vectors_repository import VectorsRepository
+from database.academic.exam_distribution_repository import ExamDistributionRepository
+from services.image_processor import ImageProcessor
+
+
+class RollCallService:
+
+    def __init__(self,
+                 vectors_repo: Optional[VectorsRepository] = None,
+                 distribution_repo: Optional[ExamDistributionRepository] = None):
+        self.vectors_repo = vectors_repo or VectorsRepository()
+        self.distribution_repo = distribution_repo or ExamDistributionRepository()
+
+    def roll_call(self, image_path: str, exam_id: int, center_id: int,
+                  room_number: str, threshold: float = 0.6, encoder_version: Optional[str] = None) -> Dict:
+        """
+        Identify every face of a room photo against the students of that room.
+        Faces are encoded with the settings of `encoder_version` (the gallery's active version).
+
+        Returns:
+            Dictionary with 'present', 'absent' and 'unknown' lists
+
+        Raises:
+            ValueError: If the image has no usable face
+            RuntimeError: For database errors
+        """
+        faces = ImageProcessor.convert_image_to_vectors(image_path, encoder_version)
+        roster = self.distribution_repo.get_room_roster(exam_id, center_id, room_number)
+
+        matches = []
+        if roster:
+            matches = self.vectors_repo.identify_faces_in_room(
+                [vector for _, vector in faces], exam_id, center_id, room_number, threshold
+            )
+
+        # كل طالب يُحسب مرة واحدة: نحتفظ بأقرب وجه له والباقي يعتبر غير معروف
+        best_by_student = {}
+        for match in matches:
+            student_id = match["student_id"]
+            if student_id is None:
+                continue
+            current = best_by_student.get(student_id)
+            if current is None or match["distance"] < current["distance"]:
+                best_by_student[student_id] = match
+
+        matched_faces = {m["face_index"] for m in best_by_student.values()}
+
+        present: List[Dict] = []
+        absent: List[Dict] = []
+        for student in roster:
+            match = best_by_student.get(student["student_id"])
+            if match:
+                present.append({
+                    **student,
+                    "face_index": match["face_index"],
+                    "face_location": self._format_location(faces[match["face_index"]][0]),
+                    "similarity": round(float(match["similarity"]), 4)
+                })
+            else:
+                absent.append(student)
+
+        unknown = [
+            {"face_index": index, "face_location": self._format_location(location)}
+            for index, (location, _) in enumerate(faces)
+            if index not in matched_faces
+        ]
+
+        return {
+            "exam_id": exam_id,
+            "center_id": center_id,
+            "room_number": room_number,
+            "faces_detected": len(faces),
+            "expected_students": len(roster),
+            "present": present,
+            "absent": absent,
+            "unknown": unknown
+        }
+
+    def _format_location(self, location) -> Dict:
+        top, right, bottom, left = location
+        return {"top": top, "right": right, "bottom": bottom, "left": left}
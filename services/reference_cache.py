@@ -0,0 +1,126 @@
+# services/reference_cache.py
+"""
+كاش داخل العملية للبيانات المرجعية (الكليات، التخصصات، المستويات، السنوات، الفصول، أنواع التنبيهات)
+Each dataset caches its loaded values per key. A create/update/delete bumps the
+dataset version, which drops every key of that dataset at once in this process;
+other worker processes pick the change up when their entries expire
+(REFERENCE_CACHE_TTL seconds). Misses (None / empty results) are kept only for
+REFERENCE_CACHE_NEGATIVE_TTL seconds (0 = not cached), so a row created in another
+worker is visible at once. Cached values are shared: callers must not mutate them.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "60"))
+REFERENCE_CACHE_NEGATIVE_TTL = float(os.getenv("REFERENCE_CACHE_NEGATIVE_TTL", "0"))
+
+_MISSING = object()
+
+
+def _utcnow():
+    # Last-Modified دقته ثانية واحدة
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class ReferenceCache:
+
+    def __init__(self, name, ttl=REFERENCE_CACHE_TTL, negative_ttl=REFERENCE_CACHE_NEGATIVE_TTL):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.last_modified = _utcnow()
+        self._entries = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._hits += 1
+                return entry[1], self._version
+            self._misses += 1
+            return _MISSING, self._version
+
+    def _store(self, key, value, version):
+        # نتيجة فارغة (غير موجود) قد تكون أُنشئت للتو في عملية أخرى
+        ttl = self.ttl if value else self.negative_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            # نتيجة قُرئت قبل invalidate() متزامن لا تُحفظ
+            if version != self._version:
+                return
+            previous = self._entries.get(key)
+            if previous is not None and previous[1] != value:
+                # تغيير من عملية أخرى ظهر بعد انتهاء الـ TTL
+                self.last_modified = _utcnow()
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def get(self, key, loader):
+        """Return the cached value of `key`, calling `loader()` on a miss."""
+        value, version = self._lookup(key)
+        if value is _MISSING:
+            value = loader()
+            self._store(key, value, version)
+        return value
+
+    async def get_async(self, key, loader):
+        """Same as get() for an async `loader()` (ASGI routes)."""
+        value, version = self._lookup(key)
+        if value is _MISSING:
+            value = await loader()
+            self._store(key, value, version)
+        return value
+
+    def invalidate(self):
+        """Drop every cached key of this dataset (called after create/update/delete)."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._invalidations += 1
+            self.last_modified = _utcnow()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "last_modified": self.last_modified.isoformat(),
+                "ttl": self.ttl,
+                "negative_ttl": self.negative_ttl
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_reference_cache(name):
+    """The process-wide cache of a dataset, shared by every service instance."""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = ReferenceCache(name)
+        return cache
+
+
+def invalidate(*names):
+    for name in names:
+        get_reference_cache(name).invalidate()
+
+
+def get_all_stats():
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.get_stats() for cache in caches}
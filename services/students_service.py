@@ -3,11 +3,14 @@ import os
 import uuid
 from werkzeug.utils import secure_filename
 from database.students import Student
+from database.students_pg import PgStudent
 
 
+# مخزن الطلاب: sqlite (students.db، الافتراضي) أو postgres بعد تشغيل database/migrate_students_to_pg.py
+STUDENTS_BACKEND = os.getenv("STUDENTS_BACKEND", "sqlite").lower()
 
 # إنشاء كائن قاعدة البيانات
-student_db = Student()
+student_db = PgStudent() if STUDENTS_BACKEND == "postgres" else Student()
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 MAX_IMAGE_SIZE = 2 * 1024 * 1024  # 2 MB
@@ -99,7 +102,6 @@ def fetch_student_info_by_number(number):
     """
     Fetch student info (number, college, image) using the Student database model.
     """
-    student_db = Student()
     return student_db.get_student_info_by_number(number)
 
 def fetch_students_by_ids(student_ids):
@@ -125,6 +127,11 @@ def fetch_students_by_ids(student_ids):
 
     except Exception as e:
         raise
-    
 
 
+def iter_students_by_ids(student_ids):
+    """
+    Stream student rows for any number of IDs (no chunking needed).
+    Yields tuples in the same column order as fetch_students_by_ids.
+    """
+    return student_db.iter_students_by_numbers(student_ids)
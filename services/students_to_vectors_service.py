@@ -1,9 +1,14 @@
 import os
 import logging
+from concurrent.futures import as_completed
 from services.image_processor import ImageProcessor
-from services.students_service import fetch_students_by_ids
+from services.students_service import iter_students_by_ids
 from services.vectors_service import VectorsService
-from database.vectors_repository import VectorsRepository
+from database.vectors_repository import VectorsRepository, StaleEncoderVersionError
+from database.face_chip_archive import FaceChipArchive
+from services.background_jobs import BackgroundJobs
+from services.encoder_version_service import EncoderVersionService
+from services.encoding_executor import get_encoding_executor
 from services.logging_config import setup_logging
 
 # إعداد logger
@@ -11,6 +16,8 @@ logger = setup_logging()
 
 class StudentsToVectorsService:
     IMAGE_DIRECTORY = os.path.join("database", "student_images")
+    REEMBED_JOB_NAME = "reembed_from_chips"
+    REEMBED_BATCH_SIZE = 200
 
     @staticmethod
     def get_image_path(image_name):
@@ -28,47 +35,60 @@ class StudentsToVectorsService:
             logger.error(f"Error: {error_message}")
 
     @staticmethod
-    def save_vector(student_id, college, vector):
+    def save_vector(student_id, college, vector, encoder_version=None):
         """Save the student vector to the database using VectorsService."""
         try:
             repository = VectorsRepository()
             service = VectorsService(repository)
-            vector_id = service.add_vector(student_id, college, vector)
+            vector_id = service.add_vector(student_id, college, vector, encoder_version)
             return vector_id
         except Exception as e:
             raise
 
     @staticmethod
-    def process_students_to_vectors(student_ids, batch_size=200):
-        """Process students in batches to convert their images to vectors and save them."""
+    def process_students_to_vectors(student_ids):
+        """Convert the images of the given students to vectors and save them (rows are streamed)."""
         success_count = 0
         failure_count = 0
         failure_details = []
-        for i in range(0, len(student_ids), batch_size):
-            batch_ids = student_ids[i:i + batch_size]
-            try:
-                students_data = fetch_students_by_ids(batch_ids)
-
-
-                for student in students_data:
-                    try:
-                        student_id, college, image_name = student[1], student[2], student[7]
-                        image_path = StudentsToVectorsService.get_image_path(image_name)
-                        # Convert image to vector
-                        vector = ImageProcessor.convert_image_to_vector(image_path)
-                        # Save vector to the database
-                        StudentsToVectorsService.save_vector(student_id, college, vector)
-                        success_count += 1
-                    except Exception as e:
-                        failure_count += 1
-                        failure_details.append({"student_id": student_id, "error": str(e)})
-                        # تسجيل الخطأ في ملف log
-                        StudentsToVectorsService.log_error(str(e), student_id=student_id)
-            except Exception as e:
-                failure_count += len(batch_ids)
-                failure_details.append({"batch_ids": batch_ids, "error": str(e)})
-                # تسجيل الخطأ في ملف log
-                StudentsToVectorsService.log_error(str(e), batch_ids=batch_ids)
+        archive = FaceChipArchive()
+        encoder_service = EncoderVersionService(archive=archive)
+        found_ids = set()
+        try:
+            for student in iter_students_by_ids(student_ids):
+                student_id, college, image_name = student[1], student[6], student[7]
+                found_ids.add(str(student_id))
+                try:
+                    image_path = StudentsToVectorsService.get_image_path(image_name)
+                    # Convert image to vector (keeping the aligned chip for later re-embedding) and save it
+                    (vector, chip_record), _ = encoder_service.encode_and_write(
+                        lambda version: ImageProcessor.convert_image_to_vector_with_chip(image_path, version),
+                        lambda encoded, version: StudentsToVectorsService.save_vector(
+                            student_id, college, encoded[0], version
+                        )
+                    )
+                    archive.save(student_id, chip_record)
+                    encoder_service.refresh_shadow_vector(student_id, chip_record, vector)
+                    success_count += 1
+                except Exception as e:
+                    failure_count += 1
+                    failure_details.append({"student_id": student_id, "error": str(e)})
+                    # تسجيل الخطأ في ملف log
+                    StudentsToVectorsService.log_error(str(e), student_id=student_id)
+        except Exception as e:
+            # فشل قراءة بيانات الطلاب نفسها: كل الطلاب غير المعالجين يعتبرون فاشلين
+            remaining = [sid for sid in student_ids if str(sid) not in found_ids]
+            failure_count += len(remaining)
+            failure_details.append({"batch_ids": remaining, "error": str(e)})
+            StudentsToVectorsService.log_error(str(e), batch_ids=remaining)
+            found_ids.update(str(sid) for sid in remaining)
+
+        # الطلاب غير الموجودين في قاعدة بيانات الطلاب
+        for student_id in dict.fromkeys(str(sid) for sid in student_ids):
+            if student_id not in found_ids:
+                failure_count += 1
+                failure_details.append({"student_id": student_id, "error": "Student not found."})
+                StudentsToVectorsService.log_error("Student not found.", student_id=student_id)
 
         # إنشاء رسالة واحدة بناءً على النتائج
         if success_count > 0 and failure_count == 0:
@@ -84,4 +104,99 @@ class StudentsToVectorsService:
             "success_count": success_count,
             "failure_count": failure_count,
             "failure_details": failure_details if failure_count > 0 else None
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def start_reembed(student_ids=None):
+        """
+        Start re-embedding from the archived face chips as a background job (see reembed_from_chips).
+        Returns the job id; poll it with get_reembed_job from any worker.
+        """
+        if student_ids is not None:
+            student_ids = [str(student_id) for student_id in student_ids]
+        return BackgroundJobs.submit_shared(
+            StudentsToVectorsService.REEMBED_JOB_NAME, StudentsToVectorsService.reembed_from_chips, student_ids
+        )
+
+    @staticmethod
+    def get_reembed_job(job_id):
+        return BackgroundJobs.get(job_id)
+
+    @staticmethod
+    def reembed_from_chips(job, student_ids=None):
+        """
+        Re-run only the encoder on the archived face chips and update the stored vectors
+        with the active encoder version settings. No image decoding or face detection happens here.
+        Chips are encoded in the process pool and written with one bulk update per batch.
+        To move to another encoder version without downtime use EncoderVersionService instead.
+        """
+        archive = FaceChipArchive()
+        repository = VectorsRepository()
+        encoder_service = EncoderVersionService(vectors_repo=repository, archive=archive)
+        failure_details = []
+        missing_chips = []
+        job["progress"] = {"processed": 0, "success_count": 0, "failure_count": 0}
+
+        if student_ids is not None:
+            missing_chips = [student_id for student_id in student_ids if not archive.exists(student_id)]
+
+        batch = []
+        for record in archive.iter_records(student_ids):
+            batch.append(record)
+            if len(batch) == StudentsToVectorsService.REEMBED_BATCH_SIZE:
+                StudentsToVectorsService._reembed_batch(batch, repository, encoder_service, job, failure_details)
+                batch = []
+        if batch:
+            StudentsToVectorsService._reembed_batch(batch, repository, encoder_service, job, failure_details)
+
+        success_count = job["progress"]["success_count"]
+        return {
+            "message": f"Re-embedded {success_count} students from archived face chips.",
+            "success_count": success_count,
+            "failure_count": len(failure_details),
+            "failure_details": failure_details if failure_details else None,
+            "missing_chips": missing_chips if missing_chips else None
+        }
+
+    @staticmethod
+    def _reembed_batch(batch, repository, encoder_service, job, failure_details, retry_stale=True):
+        if retry_stale:
+            encoder_version = encoder_service.get_active_version()
+        else:
+            encoder_version = encoder_service.get_settings(force_refresh=True)["active_version"]
+        num_jitters = ImageProcessor.get_encoder_settings(encoder_version)["num_jitters"]
+        executor = get_encoding_executor()
+        futures = {
+            executor.submit(ImageProcessor.encode_face_chip, record["chip"], num_jitters): record["student_id"]
+            for record in batch
+        }
+
+        errors = {}
+        vectors = []
+        for future in as_completed(futures):
+            student_id = futures[future]
+            try:
+                vectors.append((student_id, future.result()))
+            except Exception as e:
+                errors[student_id] = str(e)
+
+        try:
+            updated = set(repository.bulk_update_vectors(vectors, encoder_version))
+        except Exception as e:
+            if retry_stale and isinstance(e, StaleEncoderVersionError):
+                return StudentsToVectorsService._reembed_batch(
+                    batch, repository, encoder_service, job, failure_details, retry_stale=False
+                )
+            updated = set()
+            errors.update({student_id: str(e) for student_id, _ in vectors})
+
+        for student_id, _ in vectors:
+            if student_id not in updated:
+                errors.setdefault(student_id, "No stored vector for this student.")
+        for student_id, error in errors.items():
+            failure_details.append({"student_id": student_id, "error": error})
+            StudentsToVectorsService.log_error(error, student_id=student_id)
+
+        job["progress"]["processed"] += len(batch)
+        job["progress"]["success_count"] += len(updated)
+        job["progress"]["failure_count"] = len(failure_details)
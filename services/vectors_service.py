@@ -5,11 +5,14 @@ class VectorsService:
     def __init__(self, repository):
         self.repository = repository
 
-    def add_vector(self, student_id, college, vector):
-        return self.repository.insert_vector(student_id, college, vector)
+    def add_vector(self, student_id, college, vector, encoder_version=None):
+        return self.repository.insert_vector(student_id, college, vector, encoder_version)
 
-    def update_vector_by_id(self, vector_id, vector):
-        return self.repository.update_vector_by_id(vector_id,vector)
+    def update_vector_by_id(self, vector_id, vector, encoder_version=None):
+        return self.repository.update_vector_by_id(vector_id, vector, encoder_version)
+
+    def update_vector_by_student_id(self, student_id, vector, encoder_version=None):
+        return self.repository.update_vector_by_student_id(student_id, vector, encoder_version)
 
     def delete_vector(self, student_id):
         return self.repository.delete_vector(student_id)
@@ -29,4 +32,7 @@ class VectorsService:
         return self.repository.search_similar_vectors(vector, threshold,limit)
 
     def search_vectors_by_college(self, vector, college, threshold=0.8,limit=1):
-        return self.repository.search_similar_vectors_in_college(vector, college,  threshold, limit)
\ No newline at end of file
+        return self.repository.search_similar_vectors_in_college(vector, college,  threshold, limit)
+
+    def search_vectors_in_exam(self, vector, exam_id, exclude_student_id=None, threshold=0.6, limit=3):
+        return self.repository.search_similar_vectors_in_exam(vector, exam_id, exclude_student_id, threshold, limit)